@@ -1,11 +1,19 @@
 """
 Vercel Cron Job - Send Email Reminders
-Runs daily at 9:00 AM UTC to send expense reminder emails
+Runs daily at 9:00 AM UTC to send due expense reminder emails
+
+Due reminders (reminder_at <= now, reminder_sent = false) are processed in
+keyset chunks over (reminder_at, id). Each chunk goes out over one SMTP
+connection and is flagged sent with one bulk UPDATE before the next chunk
+starts. The handler stops before the wall-clock budget runs out and saves
+its position in `cron_cursor`, so a large backlog drains across several
+invocations without timeouts or duplicate emails.
 """
 
 import os
 import sys
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 
 # Add parent directories to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -15,111 +23,106 @@ os.environ['VERCEL_DEPLOYMENT'] = 'true'
 
 from flask import jsonify
 from app import app, mail
-from flask_mail import Message
-from routes.database import db, Expense, User
+from routes.database import db, CronCursor
+from services.mailer import send_batch
+from services.digest import flush_digests
+from services.reminders import due_reminders, build_reminder_messages, mark_reminders_sent, queue_digest_reminders
+
+
+CURSOR_NAME = 'send-reminders'
+# Stay well inside the serverless function limit
+TIME_BUDGET_SECONDS = float(os.environ.get('CRON_TIME_BUDGET_SECONDS', '8'))
+CHUNK_SIZE = int(os.environ.get('CRON_REMINDER_CHUNK', '50'))
 
 
 def handler(request):
     """
     Vercel Cron Job handler
-    Sends email reminders for expenses due today
+    Sends due reminder emails until the backlog is empty or the time budget is spent
     """
+    started = time.monotonic()
     with app.app_context():
         try:
-            # Get today's date
-            today = datetime.now().date()
-            
-            # Find all expenses with reminders due today that haven't been sent
-            expenses_to_remind = Expense.query.filter(
-                Expense.reminder_date == today,
-                Expense.reminder_sent == False
-            ).all()
-            
+            now = datetime.utcnow()
+            cursor = db.session.get(CronCursor, CURSOR_NAME)
+            if cursor is None:
+                cursor = CronCursor(name=CURSOR_NAME)
+                db.session.add(cursor)
+            after = (cursor.last_reminder_at, cursor.last_id) if cursor.last_id is not None else None
+            resumed = after is not None
+
             sent_count = 0
             failed_count = 0
-            
-            for expense in expenses_to_remind:
-                try:
-                    # Get user and email
-                    user = User.query.get(expense.user_id)
-                    if not user or not user.profile or not user.profile.email:
-                        continue
-                    
-                    email = user.profile.email
-                    
-                    # Create email message
-                    msg = Message(
-                        subject=f'Reminder: {expense.category} - {expense.name}',
-                        recipients=[email],
-                        html=f'''
-                        <html>
-                            <head>
-                                <style>
-                                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                                    .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                                              color: white; padding: 20px; border-radius: 10px 10px 0 0; text-align: center; }}
-                                    .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-                                    .expense-details {{ background: white; padding: 20px; border-radius: 8px; 
-                                                       margin: 20px 0; border-left: 4px solid #667eea; }}
-                                    .amount {{ font-size: 24px; font-weight: bold; color: #667eea; }}
-                                    .footer {{ text-align: center; margin-top: 20px; color: #666; font-size: 12px; }}
-                                </style>
-                            </head>
-                            <body>
-                                <div class="container">
-                                    <div class="header">
-                                        <h1>💰 Payment Reminder</h1>
-                                    </div>
-                                    <div class="content">
-                                        <p>Hello {user.username},</p>
-                                        <p>This is a friendly reminder about your upcoming {expense.category.lower()}:</p>
-                                        
-                                        <div class="expense-details">
-                                            <h2>{expense.name}</h2>
-                                            <p><strong>Category:</strong> {expense.category}</p>
-                                            <p><strong>Amount:</strong> <span class="amount">${expense.amount:.2f}</span></p>
-                                            {f'<p><strong>Description:</strong> {expense.description}</p>' if expense.description else ''}
-                                            <p><strong>Date:</strong> {expense.date.strftime('%B %d, %Y')}</p>
-                                        </div>
-                                        
-                                        <p>Don't forget to make this payment on time!</p>
-                                        
-                                        <div class="footer">
-                                            <p>This is an automated reminder from FinBuddy</p>
-                                            <p>Stay on top of your finances! 💪</p>
-                                        </div>
-                                    </div>
-                                </div>
-                            </body>
-                        </html>
-                        '''
-                    )
-                    
-                    # Send email
-                    mail.send(msg)
-                    
-                    # Mark as sent
-                    expense.reminder_sent = True
-                    db.session.commit()
-                    
-                    sent_count += 1
-                    
-                except Exception as e:
-                    print(f"Failed to send reminder for expense {expense.id}: {str(e)}")
-                    failed_count += 1
-                    continue
-            
+            queued_count = 0
+            checked = 0
+            chunks = 0
+            slowest_chunk = 0.0
+            complete = False
+
+            while True:
+                # Always make progress, but don't start a chunk that might overrun the budget
+                if chunks and time.monotonic() - started + slowest_chunk > TIME_BUDGET_SECONDS:
+                    break
+
+                chunk_started = time.monotonic()
+                rows = due_reminders(db.session, now, limit=CHUNK_SIZE, after=after)
+                if not rows:
+                    complete = True
+                    break
+
+                # Digest-mode users get these in their daily summary instead
+                immediate = queue_digest_reminders(db.session, rows)
+                queued_count += len(rows) - len(immediate)
+                messages = build_reminder_messages(immediate)
+                sent, failed = send_batch(app, mail, messages, chunk_size=CHUNK_SIZE, workers=1)
+                if sent:
+                    mark_reminders_sent(db.session, sent)
+
+                # Failed rows stay unsent; the cursor moves past them until the next full pass
+                after = (rows[-1].reminder_at, rows[-1].id)
+                cursor.last_reminder_at, cursor.last_id = after
+                db.session.commit()
+
+                sent_count += len(sent)
+                failed_count += len(failed)
+                checked += len(rows)
+                chunks += 1
+                slowest_chunk = max(slowest_chunk, time.monotonic() - chunk_started)
+                if len(rows) < CHUNK_SIZE:
+                    complete = True
+                    break
+
+            if complete:
+                # Next run starts from the beginning, retrying anything that failed
+                cursor.last_reminder_at, cursor.last_id = None, None
+            db.session.commit()
+
+            # No scheduler on Vercel: closed digest windows go out from here too
+            digests = None
+            if complete and time.monotonic() - started + slowest_chunk <= TIME_BUDGET_SECONDS:
+                digests = flush_digests(app, mail, chunk_size=CHUNK_SIZE, workers=1)
+
             return jsonify({
                 'success': True,
-                'message': f'Reminder cron job completed',
+                'message': 'Reminder cron job completed' if complete else 'Time budget reached, will resume',
                 'reminders_sent': sent_count,
                 'failed': failed_count,
-                'total_checked': len(expenses_to_remind),
+                'queued_for_digest': queued_count,
+                'digests': digests,
+                'total_checked': checked,
+                'chunks': chunks,
+                'resumed': resumed,
+                'complete': complete,
+                'cursor': None if complete else {
+                    'reminder_at': after[0].isoformat() if after and after[0] else None,
+                    'id': after[1] if after else None,
+                },
+                'elapsed_seconds': round(time.monotonic() - started, 2),
                 'timestamp': datetime.now().isoformat()
             }), 200
-            
+
         except Exception as e:
+            db.session.rollback()
             print(f"Cron job error: {str(e)}")
             return jsonify({
                 'success': False,
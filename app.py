@@ -2,8 +2,9 @@
 from flask import Flask, render_template, session, redirect, url_for, flash, request, jsonify
 import re
 import os
+import time
 from datetime import datetime, timezone, timedelta
-from flask_mail import Mail, Message
+from flask_mail import Mail
 from flask_login import LoginManager, current_user
 from dotenv import load_dotenv
 
@@ -48,6 +49,17 @@ if GROQ_API_KEY:
 else:
     print("Key NOT found.")
 GROQ_MODEL_NAME = os.environ.get('GROQ_MODEL_NAME', 'mixtral-8x7b-32768')
+# Optional OpenAI-compatible endpoint, e.g. tools/mock_groq_server.py for load tests
+GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL')
+CHATBOT_FAST_PATH = os.environ.get('CHATBOT_FAST_PATH', 'true').lower() == 'true'
+CHATBOT_TOOL_MODE = os.environ.get('CHATBOT_TOOL_MODE', 'true').lower() == 'true'
+CHATBOT_MAX_TOOL_ROUNDS = int(os.environ.get('CHATBOT_MAX_TOOL_ROUNDS', '3'))
+CHATBOT_RETRIEVAL = os.environ.get('CHATBOT_RETRIEVAL', 'true').lower() == 'true'
+CHATBOT_RETRIEVAL_K = int(os.environ.get('CHATBOT_RETRIEVAL_K', '5'))
+CHATBOT_MEMORY = os.environ.get('CHATBOT_MEMORY', 'true').lower() == 'true'
+CHATBOT_HISTORY_TURNS = int(os.environ.get('CHATBOT_HISTORY_TURNS', '4'))
+CHATBOT_CONTEXT_BUDGET = int(os.environ.get('CHATBOT_CONTEXT_BUDGET', '3000'))
+CHATBOT_SUMMARY_TOKENS = int(os.environ.get('CHATBOT_SUMMARY_TOKENS', '400'))
 groq_client = None
 
 try:
@@ -59,13 +71,18 @@ except ImportError:
 
 if Groq and GROQ_API_KEY:
     try:
-        groq_client = Groq(api_key=GROQ_API_KEY)
-        print(f"✅ Groq initialized with model: {GROQ_MODEL_NAME}")
+        groq_client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL) if GROQ_BASE_URL else Groq(api_key=GROQ_API_KEY)
+        print(f"✅ Groq initialized with model: {GROQ_MODEL_NAME}" + (f" at {GROQ_BASE_URL}" if GROQ_BASE_URL else ""))
     except Exception as e:
         print(f"❌ Groq initialization failed: {e}")
 else:
     print("⚠️ Groq API Key missing. AI features disabled.")
 
+from services.chat_router import ModelRouter
+chat_router = ModelRouter.from_env(GROQ_MODEL_NAME)
+# Each attempt is bounded by the latency budget; the router does fallback instead of SDK retries
+llm_client = groq_client.with_options(timeout=chat_router.latency_budget, max_retries=0) if groq_client else None
+
 
 # --- APP CONFIGURATION ---
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -99,7 +116,8 @@ def load_user(user_id):
 @app.after_request
 def add_security_headers(response):
     if request.endpoint and request.endpoint not in ['static', 'home', 'auth.login', 'auth.register']:
-        if current_user.is_authenticated:
+        # Responses with an ETag (e.g. cached PDFs) set their own revalidation policy
+        if current_user.is_authenticated and not response.get_etag()[0]:
             response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
             response.headers['Pragma'] = 'no-cache'
             response.headers['Expires'] = '0'
@@ -123,39 +141,37 @@ app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER') or os.environ.get('MAIL_USERNAME', 'noreply@FinBuddy.com')
 
 mail = Mail(app)
+# Batched sends: messages per SMTP connection and parallel connections
+MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', '50'))
+MAIL_SENDER_THREADS = int(os.environ.get('MAIL_SENDER_THREADS', '4'))
 
 # Initialize SocketIO and Scheduler
 if not IS_VERCEL:
     socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    # Periodic jobs persist in the database so their schedule survives restarts
+    if os.environ.get('SCHEDULER_PERSISTENT_JOBS', 'true').lower() == 'true':
+        from services.job_store import sqlalchemy_jobstores
+        app.config['SCHEDULER_JOBSTORES'] = sqlalchemy_jobstores(app, db)
+    app.config['SCHEDULER_JOB_DEFAULTS'] = {'coalesce': True, 'max_instances': 1,
+                                            'misfire_grace_time': 3600}
+    # Started paused so no stored job runs before its function is defined and the
+    # jobs are reconciled below; with leader election only the elected worker resumes
+    SCHEDULER_LEADER_ELECTION = os.environ.get('SCHEDULER_LEADER_ELECTION', 'true').lower() == 'true'
     scheduler = APScheduler()
     scheduler.init_app(app)
-    scheduler.start()
+    scheduler.start(paused=True)
 else:
     socketio = None
     scheduler = None
+    SCHEDULER_LEADER_ELECTION = False
 
 # --- HELPER FUNCTIONS ---
 
-def _username_maybe_email(username: str) -> bool:
-    return isinstance(username, str) and '@' in username and '.' in username
-
 def _week_range():
     today = datetime.now(timezone.utc).date()
     start = today - timedelta(days=7)
     return start, today
 
-def _render_email(template_path: str, **context) -> str:
-    """Lightweight placeholder replacement for email templates."""
-    try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            html = f.read()
-        for key, value in context.items():
-            html = html.replace(f'{{{{ {key} }}}}', str(value))
-        return html
-    except FileNotFoundError:
-        print(f"Error: Template {template_path} not found.")
-        return ""
-
 def _parse_time_str(value: str):
     if not value:
         return None
@@ -168,123 +184,123 @@ def _parse_time_str(value: str):
 
 # --- EMAIL LOGIC ---
 
-def send_reminder_email(expense_id):
-    from routes.database import Expense, User
-    with app.app_context():
-        expense = Expense.query.get(expense_id)
-        if not expense or expense.reminder_sent:
-            return
-
-        user = User.query.get(expense.user_id)
-        if not user or not user.profile or not user.profile.email:
-            return
+# Reminders fire from an in-process timer heap instead of interval polling
+REMINDER_HEAP_SIZE = int(os.environ.get('REMINDER_HEAP_SIZE', '500'))
+REMINDER_RESYNC_MINUTES = int(os.environ.get('REMINDER_RESYNC_MINUTES', '60'))
+# Under leader election the leader polls a shared counter that other workers bump
+REMINDER_SIGNAL_SECONDS = int(os.environ.get('REMINDER_SIGNAL_SECONDS',
+                                             '15' if SCHEDULER_LEADER_ELECTION else '0'))
 
-        try:
-            msg = Message(
-                subject=f'Reminder: {expense.category} - {expense.name}',
-                recipients=[user.profile.email],
-                html=f"Reminder for expense: {expense.name} - {expense.amount}" # Simplified for safety
-            )
-            mail.send(msg)
-            expense.reminder_sent = True
-            db.session.commit()
-        except Exception as e:
-            print(f'Error sending reminder email: {str(e)}')
+reminder_timer = None
+if scheduler:
+    from services.reminders import ReminderTimer
+    reminder_timer = ReminderTimer(app, mail, capacity=REMINDER_HEAP_SIZE,
+                                   resync_minutes=REMINDER_RESYNC_MINUTES,
+                                   signal_seconds=REMINDER_SIGNAL_SECONDS,
+                                   chunk_size=MAIL_BATCH_SIZE, workers=MAIL_SENDER_THREADS)
+    if SCHEDULER_LEADER_ELECTION:
+        reminder_timer.pause()
+    reminder_timer.start()
 
 def schedule_reminder_email(expense_id, reminder_datetime):
-    if not scheduler: return
+    """Queue (or move, or with None cancel) an expense reminder on the timer."""
+    if not reminder_timer: return
     try:
-        scheduler.add_job(
-            func=send_reminder_email,
-            trigger='date',
-            run_date=reminder_datetime,
-            args=[expense_id],
-            id=f'reminder_{expense_id}',
-            replace_existing=True
-        )
+        reminder_timer.schedule(expense_id, reminder_datetime)
+        if reminder_datetime is not None and not reminder_timer.active.is_set():
+            # This worker's timer is paused; let the leader's timer know
+            from services.reminders import signal_reminders_changed
+            signal_reminders_changed(db.session)
     except Exception as e:
         print(f'Error scheduling reminder: {str(e)}')
 
-if scheduler:
-    @scheduler.task('interval', id='check_reminders', minutes=15)
-    def check_and_send_reminders():
-        from routes.database import Expense
-        with scheduler.app.app_context():
-            now = datetime.now(timezone.utc)
-            due_expenses = Expense.query.filter(
-                Expense.reminder_at <= now,
-                Expense.reminder_sent == False,
-                Expense.reminder_at.isnot(None)
-            ).all()
-            for expense in due_expenses:
-                send_reminder_email(expense.id)
-
-def _build_weekly_report_html(user_id: int):
-    from routes.database import Expense
+def cancel_reminder_email(expense_id):
+    schedule_reminder_email(expense_id, None)
+
+def send_weekly_reports():
+    from services.weekly_reports import send_weekly_reports as deliver_weekly_reports
     start_date, end_date = _week_range()
-    
-    expenses = Expense.query.filter(
-        Expense.user_id == user_id,
-        Expense.date >= start_date,
-        Expense.date <= end_date,
-    ).order_by(Expense.created_at.desc()).all()
+    try:
+        stats = deliver_weekly_reports(app, mail, start_date, end_date,
+                                       chunk_size=MAIL_BATCH_SIZE, workers=MAIL_SENDER_THREADS)
+        print(f"Weekly reports: sent {stats['sent']} of {stats['recipients']} ({stats['failed']} failed)")
+    except Exception as e:
+        print(f"Failed to send weekly reports: {e}")
 
-    total = sum((e.amount or 0) for e in expenses)
-    
-    # Simple table generation
-    if expenses:
-        transaction_rows = "".join([f"<p>{e.name}: {e.amount}</p>" for e in expenses[:5]])
-    else:
-        transaction_rows = "<p>No expenses.</p>"
-
-    html = _render_email(
-        'templates/email_weekly_report.html',
-        start_date=start_date,
-        end_date=end_date,
-        total=f"{total:,.2f}",
-        transaction_rows=transaction_rows,
-        category_rows="", 
-        no_expenses_message=""
-    )
-    subject = f"FinBuddy Weekly Report ({start_date} - {end_date})"
-    return subject, html
+def send_notification_digests():
+    from services.digest import flush_digests
+    try:
+        stats = flush_digests(app, mail, chunk_size=MAIL_BATCH_SIZE, workers=MAIL_SENDER_THREADS)
+        if stats['users']:
+            print(f"Digests: sent {stats['sent']} of {stats['users']} ({stats['items']} items, {stats['failed']} failed)")
+    except Exception as e:
+        print(f"Failed to send notification digests: {e}")
 
-def send_weekly_reports():
-    from routes.database import User
-    test_override = os.environ.get('REPORT_TEST_EMAIL')
-    with app.app_context():
-        users = User.query.all()
-        for user in users:
-            recipient = None
-            if getattr(user, 'profile', None) and getattr(user.profile, 'email', None):
-                recipient = user.profile.email
-            elif _username_maybe_email(user.username):
-                recipient = user.username
-            elif test_override:
-                recipient = test_override
-
-            if not recipient: continue
-
-            subject, html = _build_weekly_report_html(user.id)
-            try:
-                msg = Message(subject=subject, recipients=[recipient], html=html)
-                mail.send(msg)
-            except Exception as e:
-                print(f"Failed to send weekly report: {e}")
-
-if scheduler and os.environ.get('ENABLE_WEEKLY_REPORTS', 'true').lower() == 'true':
-    day = os.environ.get('WEEKLY_REPORT_DAY', 'sun')
-    hour = int(os.environ.get('WEEKLY_REPORT_HOUR', '8'))
-    scheduler.add_job(id='weekly_reports', func=send_weekly_reports, trigger='cron',
-                      day_of_week=day, hour=hour, minute=0, replace_existing=True)
+from services.tuition_reminders import slot_index as tuition_slot_index
+from services.pdf_jobs import render_pool as pdf_render_pool
 
 def send_tuition_email_reminders():
-    # Logic for tuition reminders
-    pass 
+    from services.tuition_reminders import send_tuition_reminders
+    try:
+        stats = send_tuition_reminders(app, mail, chunk_size=MAIL_BATCH_SIZE, workers=MAIL_SENDER_THREADS)
+        if stats['due']:
+            print(f"Tuition reminders: sent {stats['sent']} of {stats['due']} ({stats['failed']} failed)")
+    except Exception as e:
+        print(f"Failed to send tuition reminders: {e}")
+
+def prerender_routine_pdfs():
+    from services.pdf_jobs import prerender_weekly_routines
+    try:
+        batch = prerender_weekly_routines(app)
+        if batch:
+            batch.wait()
+            print(f"Routine PDFs: {batch.done_count} of {batch.total} ready ({batch.failed_count} failed)")
+    except Exception as e:
+        print(f"Failed to prerender routine PDFs: {e}")
+
+# Only jobs missing from the persistent store are added; existing ones keep their next run
+if scheduler:
+    from services.job_store import reconcile_jobs
+    scheduled_jobs = []
+    if os.environ.get('ENABLE_WEEKLY_REPORTS', 'true').lower() == 'true':
+        scheduled_jobs.append({'id': 'weekly_reports', 'func': send_weekly_reports, 'trigger': 'cron',
+                               'day_of_week': os.environ.get('WEEKLY_REPORT_DAY', 'sun'),
+                               'hour': int(os.environ.get('WEEKLY_REPORT_HOUR', '8')), 'minute': 0})
+    # Digest windows close on the hour in UTC, whatever the host's timezone
+    scheduled_jobs.append({'id': 'notification_digests', 'func': send_notification_digests, 'trigger': 'cron',
+                           'hour': int(os.environ.get('NOTIFICATION_DIGEST_HOUR', '18')), 'minute': 0,
+                           'timezone': 'UTC'})
+    if os.environ.get('ENABLE_ROUTINE_PRERENDER', 'true').lower() == 'true':
+        # Start of the tuition week (Sunday): warm the PDF cache for every tutor
+        scheduled_jobs.append({'id': 'routine_prerender', 'func': prerender_routine_pdfs, 'trigger': 'cron',
+                               'day_of_week': 'sun', 'hour': 0, 'minute': 30})
+    if os.environ.get('ENABLE_TUITION_REMINDERS', 'true').lower() == 'true':
+        scheduled_jobs.append({'id': 'tuition_email_reminders', 'func': send_tuition_email_reminders,
+                               'trigger': 'interval', 'minutes': 1})
+    try:
+        job_stats = reconcile_jobs(scheduler, scheduled_jobs)
+        print(f"✅ Scheduler jobs reconciled: {job_stats}")
+    except Exception as e:
+        print(f"⚠️ Scheduler job reconciliation failed: {e}")
+    if not SCHEDULER_LEADER_ELECTION:
+        scheduler.resume()
+
+# Only the elected worker runs periodic jobs and fires reminders
+leader_elector = None
+if scheduler and SCHEDULER_LEADER_ELECTION:
+    from services.leader import LeaderElector
+
+    def _on_elected():
+        tuition_slot_index.resume()
+        scheduler.resume()
+        reminder_timer.resume()
+
+    def _on_demoted():
+        scheduler.pause()
+        reminder_timer.pause()
 
-if scheduler and os.environ.get('ENABLE_TUITION_REMINDERS', 'true').lower() == 'true':
-    scheduler.add_job(id='tuition_email_reminders', func=send_tuition_email_reminders,
-                      trigger='interval', minutes=1, replace_existing=True)
+    leader_elector = LeaderElector(app, db, lease_seconds=int(os.environ.get('SCHEDULER_LEASE_SECONDS', '30')),
+                                   on_elected=_on_elected, on_demoted=_on_demoted).start()
 
 # --- ROUTES ---
 
@@ -304,22 +320,17 @@ def send_weekly_now():
     if not current_user.is_authenticated:
         return redirect(url_for('auth.login'))
     
-    recipient = None
-    if getattr(current_user, 'profile', None) and getattr(current_user.profile, 'email', None):
-        recipient = current_user.profile.email
-    elif _username_maybe_email(current_user.username):
-        recipient = current_user.username
-    else:
-        recipient = os.environ.get('MAIL_DEFAULT_SENDER')
-        
-    if not recipient:
+    from services.weekly_reports import build_weekly_report_messages
+    start_date, end_date = _week_range()
+    messages = build_weekly_report_messages(db.session, start_date, end_date, user_ids=[current_user.id],
+                                            opted_in_only=False,
+                                            recipient_override=os.environ.get('MAIL_DEFAULT_SENDER'))
+    if not messages:
         flash('No recipient email found.', 'error')
         return redirect(url_for('dashboard.dashboard'))
-        
-    subject, html = _build_weekly_report_html(current_user.id)
+
     try:
-        msg = Message(subject=subject, recipients=[recipient], html=html)
-        mail.send(msg)
+        mail.send(messages[0][1])
         flash('Weekly report sent.', 'success')
     except Exception as e:
         flash(f'Failed to send email: {e}', 'error')
@@ -329,54 +340,277 @@ def send_weekly_now():
 def send_tuition_reminders_now():
     if not current_user.is_authenticated:
         return redirect(url_for('auth.login'))
-    # Logic to send immediate tuition reminder
-    flash('Tuition reminder check triggered.', 'info')
+
+    from services.mailer import send_batch
+    from services.tuition_reminders import build_tuition_messages, todays_classes
+    now = datetime.now()
+    items = [item for item in todays_classes(db.session, now.date(), user_ids=[current_user.id],
+                                             opted_in_only=False,
+                                             recipient_override=os.environ.get('MAIL_DEFAULT_SENDER'))
+             if item['starts_at'] > now]
+    if not items:
+        flash('No more classes today.', 'info')
+        return redirect(url_for('tuition.tuition_list'))
+
+    messages = build_tuition_messages(items, now)
+    sent, failed = send_batch(app, mail, messages, chunk_size=MAIL_BATCH_SIZE, workers=MAIL_SENDER_THREADS)
+    if failed:
+        flash(f'Sent {len(sent)} of {len(messages)} tuition reminders.', 'error')
+    else:
+        flash(f'Sent {len(sent)} tuition reminder{"s" if len(sent) != 1 else ""}.', 'success')
     return redirect(url_for('tuition.tuition_list'))
 
+def _chat_history(system_prompt: str, user_message: str) -> list:
+    """Prior turns for the current user, trimmed to the chatbot token budget."""
+    if not CHATBOT_MEMORY:
+        return []
+    from services.chat_memory import build_history
+    try:
+        return build_history(current_user.id, db.session, system_prompt=system_prompt,
+                             user_message=user_message, budget_tokens=CHATBOT_CONTEXT_BUDGET)
+    except Exception as e:
+        print(f"Chat history unavailable: {e}")
+        return []
+
+def _remember_turn(user_message: str, reply: str):
+    if not CHATBOT_MEMORY or not user_message or not reply:
+        return
+    from services.chat_memory import record_turn
+    try:
+        record_turn(current_user.id, db.session, user_message, reply,
+                    keep_turns=CHATBOT_HISTORY_TURNS, summary_tokens=CHATBOT_SUMMARY_TOKENS)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Failed to store chat turn: {e}")
+
+def _stream_completion(model: str, kwargs: dict, cancelled):
+    """
+    Stream one chat completion from `model` and assemble the message.
+
+    Runs on a router worker thread, so it must not touch the Flask request
+    or database session. Returns (message, stats) where message has
+    `content` and `tool_calls` and stats holds ttft/usage for telemetry.
+    """
+    from types import SimpleNamespace
+
+    t0 = time.perf_counter()
+    stats = {'ttft_ms': None, 'usage': None}
+    content = []
+    calls = {}
+    if cancelled.is_set():
+        raise TimeoutError(f'{model} attempt cancelled')
+    stream = llm_client.chat.completions.create(model=model, stream=True, **kwargs)
+    try:
+        for chunk in stream:
+            if cancelled.is_set():
+                raise TimeoutError(f'{model} attempt cancelled')
+            # Groq reports usage on the final chunk under x_groq; OpenAI under usage
+            chunk_usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None) or getattr(chunk, 'usage', None)
+            if chunk_usage:
+                stats['usage'] = chunk_usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if stats['ttft_ms'] is None and (delta.content or delta.tool_calls):
+                stats['ttft_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+            if delta.content:
+                content.append(delta.content)
+            for part in delta.tool_calls or []:
+                call = calls.setdefault(part.index, {'id': None, 'name': '', 'arguments': ''})
+                if part.id:
+                    call['id'] = part.id
+                if part.function and part.function.name:
+                    call['name'] += part.function.name
+                if part.function and part.function.arguments:
+                    call['arguments'] += part.function.arguments
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+
+    tool_calls = [
+        SimpleNamespace(id=c['id'], function=SimpleNamespace(name=c['name'], arguments=c['arguments']))
+        for _, c in sorted(calls.items())
+    ]
+    return SimpleNamespace(content=''.join(content), tool_calls=tool_calls or None), stats
+
+def _llm_complete(trace: dict, **kwargs):
+    """
+    Routed, streamed chat completion that records LLM time, time-to-first-token and usage.
+
+    The model chain comes from trace['models'] (planned once per request by
+    the router); the router handles hedging, fallback and circuit breaking.
+    """
+    from services.chat_telemetry import record_usage
+    from services.chat_memory import count_tokens
+
+    trace['llm_calls'] += 1
+    trace['prompt_estimate'] = trace.get('prompt_estimate', 0) + sum(
+        count_tokens(m.get('content')) for m in kwargs.get('messages', []))
+
+    t0 = time.perf_counter()
+    try:
+        message, stats = chat_router.run(
+            lambda model, cancelled: _stream_completion(model, kwargs, cancelled),
+            trace.get('models') or [GROQ_MODEL_NAME],
+            trace
+        )
+    finally:
+        trace['llm_ms'] = round(trace.get('llm_ms', 0) + (time.perf_counter() - t0) * 1000, 1)
+
+    if 'ttft_ms' not in trace and stats['ttft_ms'] is not None:
+        trace['ttft_ms'] = stats['ttft_ms']
+    record_usage(trace, stats['usage'])
+    return message
+
+def _chat_with_tools(user_message: str, system_prompt: str, history: list, trace: dict) -> str:
+    """Run a function-calling conversation where the model fetches data through read-only tools."""
+    from services.chat_tools import TOOL_SPECS, run_tool
+    from services.chat_telemetry import phase
+
+    messages = [{"role": "system", "content": system_prompt}, *history,
+                {"role": "user", "content": user_message}]
+
+    for _ in range(CHATBOT_MAX_TOOL_ROUNDS):
+        message = _llm_complete(
+            trace,
+            messages=messages,
+            tools=TOOL_SPECS,
+            tool_choice='auto',
+            temperature=0.6,
+            max_tokens=800
+        )
+        if not message.tool_calls:
+            return (message.content or '').strip()
+
+        messages.append({
+            "role": "assistant",
+            "content": message.content or '',
+            "tool_calls": [
+                {"id": call.id, "type": "function",
+                 "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                for call in message.tool_calls
+            ]
+        })
+        with phase(trace, 'db'):
+            for call in message.tool_calls:
+                trace.setdefault('tools', []).append(call.function.name)
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": call.id,
+                    "name": call.function.name,
+                    "content": run_tool(call.function.name, call.function.arguments, current_user.id, db.session)
+                })
+
+    # Out of tool rounds: ask for a final answer from what was gathered
+    message = _llm_complete(
+        trace,
+        messages=messages,
+        temperature=0.6,
+        max_tokens=800
+    )
+    return (message.content or '').strip()
+
 @app.route('/api/chatbot', methods=['POST'])
 def ai_chatbot():
     """AI responder with full user context."""
     if not current_user.is_authenticated:
         return jsonify({'error': 'unauthorized'}), 401
 
+    from services.chat_telemetry import start_trace, finish_trace, phase, record_error
+    trace = start_trace()
+
     payload = request.get_json(silent=True) or {}
     user_message = (payload.get('message') or '').strip()
 
+    # Deterministic fast path: common questions are answered straight from
+    # aggregate queries without a round trip to Groq.
+    if user_message and CHATBOT_FAST_PATH:
+        from services.chat_intents import answer_fast_path
+        with phase(trace, 'fast_path'):
+            fast_answer = answer_fast_path(user_message, current_user.id, db.session)
+        if fast_answer:
+            intent, reply = fast_answer
+            trace['cache_hits'].append('fast_path')
+            trace['intent'] = intent
+            _remember_turn(user_message, reply)
+            finish_trace(trace, 'fast_path')
+            return jsonify({'reply': reply, 'intent': intent})
+
     # Import snapshot builder (Ensure these files exist in your project)
     try:
         from services.chat_context import build_user_finance_snapshot, get_display_name
         from routes.database import Expense, TuitionRecord, GroupMember
-    except ImportError:
+    except ImportError as e:
+        record_error(trace, e)
+        finish_trace(trace, 'error')
         return jsonify({'reply': "Error: Chat services module missing on server."})
 
     display_name = get_display_name(current_user)
-    snapshot = build_user_finance_snapshot(current_user.id, db.session, days=60)
 
     # Gather Context
     profile = getattr(current_user, 'profile', None)
     profession = getattr(profile, 'profession', None) or 'not set'
     institution = getattr(profile, 'institution', None) or 'not set'
 
-    # Stats
-    week_ago = datetime.now(timezone.utc).date() - timedelta(days=7)
-    recent_expenses = Expense.query.filter(Expense.user_id == current_user.id, Expense.date >= week_ago).all()
-    total_recent = sum((e.amount or 0) for e in recent_expenses)
-    
-    all_expenses = Expense.query.filter(Expense.user_id == current_user.id).all()
-    total_all_time = sum((e.amount or 0) for e in all_expenses)
-
-    # Tuition Stats
-    tuition_records = TuitionRecord.query.filter(TuitionRecord.user_id == current_user.id).all()
-    total_tuition_income = sum((t.amount or 0) for t in tuition_records)
-    active_students = len(tuition_records)
-    
-    group_count = GroupMember.query.filter(GroupMember.user_id == current_user.id).count()
-
     ai_user_message = user_message or "Give me a friendly summary of my status."
 
     if not groq_client:
+        finish_trace(trace, 'unavailable')
         return jsonify({'reply': "AI is currently unavailable. Check server logs for API Key or Library issues."})
 
+    # Small fast model for factual questions, larger one for open-ended planning
+    trace['models'] = chat_router.plan(ai_user_message)
+
+    # Only the expenses relevant to this question, from the in-process index
+    relevant_expenses = ''
+    if user_message and CHATBOT_RETRIEVAL:
+        from services.chat_retrieval import retrieve_relevant_expenses, is_index_loaded
+        index_version = current_user.expense_index_version
+        if is_index_loaded(current_user.id, index_version):
+            trace['cache_hits'].append('retrieval_index')
+        with phase(trace, 'retrieval'):
+            relevant_expenses = retrieve_relevant_expenses(
+                current_user.id, db.session, user_message, version=index_version, k=CHATBOT_RETRIEVAL_K)
+
+    # Function-calling mode: the model queries only the data it needs
+    if CHATBOT_TOOL_MODE:
+        from services.chat_tools import build_tool_system_prompt
+        tool_prompt = build_tool_system_prompt(display_name, profession, institution)
+        if relevant_expenses:
+            tool_prompt += f"\n\nExpenses matching the question (date · name · category · amount):\n{relevant_expenses}"
+        try:
+            with phase(trace, 'history'):
+                history = _chat_history(tool_prompt, ai_user_message)
+            reply = _chat_with_tools(ai_user_message, tool_prompt, history, trace)
+            _remember_turn(user_message, reply)
+            finish_trace(trace, 'tools')
+            return jsonify({'reply': reply})
+        except Exception as e:
+            record_error(trace, e)
+            print(f"Groq tool-mode error, falling back to snapshot prompt: {e}")
+
+    with phase(trace, 'snapshot'):
+        snapshot = build_user_finance_snapshot(current_user.id, db.session, days=60)
+
+    with phase(trace, 'db'):
+        # Stats
+        week_ago = datetime.now(timezone.utc).date() - timedelta(days=7)
+        recent_expenses = Expense.query.filter(Expense.user_id == current_user.id, Expense.date >= week_ago).all()
+        total_recent = sum((e.amount or 0) for e in recent_expenses)
+
+        all_expenses = Expense.query.filter(Expense.user_id == current_user.id).all()
+        total_all_time = sum((e.amount or 0) for e in all_expenses)
+
+        # Tuition Stats
+        tuition_records = TuitionRecord.query.filter(TuitionRecord.user_id == current_user.id).all()
+        total_tuition_income = sum((t.amount or 0) for t in tuition_records)
+        active_students = len(tuition_records)
+
+        group_count = GroupMember.query.filter(GroupMember.user_id == current_user.id).count()
+
+    relevant_section = f"\n### RELEVANT EXPENSES\n{relevant_expenses}\n" if relevant_expenses else ""
+
     system_prompt = f"""
 You are FeinBuddy, a warm, intelligent personal finance assistant. 
 
@@ -393,6 +627,7 @@ You are FeinBuddy, a warm, intelligent personal finance assistant.
 
 ### HISTORY
 {snapshot}
+{relevant_section}
 
 ### INSTRUCTIONS
 1. Be friendly and polite. Use emojis (💰, 📊).
@@ -402,21 +637,77 @@ You are FeinBuddy, a warm, intelligent personal finance assistant.
     """
 
     try:
-        completion = groq_client.chat.completions.create(
-            model=GROQ_MODEL_NAME,
+        with phase(trace, 'history'):
+            history = _chat_history(system_prompt, ai_user_message)
+        message = _llm_complete(
+            trace,
             messages=[
                 {"role": "system", "content": system_prompt},
+                *history,
                 {"role": "user", "content": ai_user_message}
             ],
             temperature=0.6,
             max_tokens=800
         )
-        reply = (completion.choices[0].message.content or '').strip()
+        reply = (message.content or '').strip()
+        _remember_turn(user_message, reply)
+        finish_trace(trace, 'snapshot')
         return jsonify({'reply': reply})
     except Exception as e:
+        record_error(trace, e)
+        finish_trace(trace, 'error')
         print(f"Groq API Error: {e}")
         return jsonify({'reply': "I'm having trouble accessing my brain right now. 🧠"})
 
+def _metrics_authorized() -> bool:
+    """Ops endpoints need the X-Metrics-Token header; a user login is not enough."""
+    import hmac
+    token = os.environ.get('CHATBOT_METRICS_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token)
+
+@app.route('/api/chatbot/metrics')
+def chatbot_metrics():
+    """Rolling chatbot latency, token and error metrics."""
+    if not _metrics_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    from services.chat_telemetry import metrics_summary
+    summary = metrics_summary()
+    summary['router'] = chat_router.status()
+    return jsonify(summary)
+
+@app.route('/api/scheduler/status')
+def scheduler_status():
+    """
+    Which worker leads background jobs, plus job and reminder timer state.
+
+    Shows hostnames, PIDs and job timings, so it takes the metrics token
+    just like /api/chatbot/metrics; a user login is not enough.
+    """
+    if not _metrics_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    if not scheduler:
+        return jsonify({'enabled': False})
+    jobs = [{'id': job.id, 'next_run_time': job.next_run_time.isoformat() if job.next_run_time else None}
+            for job in scheduler.get_jobs()]
+    return jsonify({
+        'enabled': True,
+        'leader_election': leader_elector.status() if leader_elector else None,
+        'scheduler_state': {0: 'stopped', 1: 'running', 2: 'paused'}.get(scheduler.state, scheduler.state),
+        'jobs': jobs,
+        'reminders': reminder_timer.status() if reminder_timer else None,
+        'tuition_reminders': tuition_slot_index.status(),
+        'pdf_jobs': pdf_render_pool.status(),
+    })
+
+@app.route('/api/chatbot/reset', methods=['POST'])
+def reset_chatbot():
+    """Forget the stored chatbot conversation for the current user."""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'unauthorized'}), 401
+    from services.chat_memory import clear_history
+    clear_history(current_user.id, db.session)
+    return jsonify({'success': True})
+
 # --- PREFERENCES TOGGLES ---
 
 @app.route('/toggle-email-notifications', methods=['POST'])
@@ -448,6 +739,19 @@ def toggle_tuition_reminder():
         data = request.get_json()
         current_user.tuition_reminder = data.get('enabled', False)
         db.session.commit()
+        tuition_slot_index.invalidate()
+        return jsonify({'success': True, 'message': 'Updated'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/toggle-notification-digest', methods=['POST'])
+def toggle_notification_digest():
+    if not current_user.is_authenticated: return jsonify({'success': False}), 401
+    from services.digest import DIGEST, IMMEDIATE
+    try:
+        data = request.get_json()
+        current_user.notification_mode = DIGEST if data.get('enabled', False) else IMMEDIATE
+        db.session.commit()
         return jsonify({'success': True, 'message': 'Updated'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,30 @@
+"""
+Migration script to add User.expense_index_version, the stamp that
+in-process chatbot expense indexes are validated against
+"""
+from app import app, db
+from sqlalchemy import text, inspect
+
+
+def migrate():
+    with app.app_context():
+        try:
+            columns = [col['name'] for col in inspect(db.engine).get_columns('user')]
+
+            if 'expense_index_version' not in columns:
+                print("Adding expense_index_version column to User table...")
+                db.session.execute(text(
+                    'ALTER TABLE "user" ADD COLUMN expense_index_version INTEGER DEFAULT 0 NOT NULL'
+                ))
+                db.session.commit()
+                print("✓ Successfully added expense_index_version column")
+            else:
+                print("✓ expense_index_version column already exists")
+
+        except Exception as e:
+            print(f"✗ Migration failed: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
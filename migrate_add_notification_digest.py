@@ -0,0 +1,35 @@
+"""
+Migration script to add digest delivery settings (User.notification_mode)
+and the notification_queue table
+"""
+from app import app, db
+from sqlalchemy import text
+
+
+def migrate():
+    with app.app_context():
+        try:
+            result = db.session.execute(text("PRAGMA table_info(user)"))
+            columns = [row[1] for row in result]
+
+            if 'notification_mode' not in columns:
+                print("Adding notification_mode column to User table...")
+                db.session.execute(text(
+                    "ALTER TABLE user ADD COLUMN notification_mode VARCHAR(10) DEFAULT 'immediate' NOT NULL"
+                ))
+                db.session.commit()
+                print("✓ Successfully added notification_mode column")
+            else:
+                print("✓ notification_mode column already exists")
+
+            # Creates notification_queue (and its index) if missing
+            db.create_all()
+            print("✓ notification_queue table present")
+
+        except Exception as e:
+            print(f"✗ Migration failed: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
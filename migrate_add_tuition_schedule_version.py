@@ -0,0 +1,30 @@
+"""
+Migration script to add User.tuition_schedule_version, the stamp that
+cached weekly tuition schedules are validated against
+"""
+from app import app, db
+from sqlalchemy import text, inspect
+
+
+def migrate():
+    with app.app_context():
+        try:
+            columns = [col['name'] for col in inspect(db.engine).get_columns('user')]
+
+            if 'tuition_schedule_version' not in columns:
+                print("Adding tuition_schedule_version column to User table...")
+                db.session.execute(text(
+                    'ALTER TABLE "user" ADD COLUMN tuition_schedule_version INTEGER DEFAULT 0 NOT NULL'
+                ))
+                db.session.commit()
+                print("✓ Successfully added tuition_schedule_version column")
+            else:
+                print("✓ tuition_schedule_version column already exists")
+
+        except Exception as e:
+            print(f"✗ Migration failed: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,21 @@
+"""
+Migration script to add the tuition_session attendance log table.
+Existing progress counters are kept as they are; history starts from
+the first class marked after this migration.
+"""
+from app import app, db
+
+
+def migrate():
+    with app.app_context():
+        try:
+            # Creates tuition_session (and its (tuition_id, date) index) if missing
+            db.create_all()
+            print("✓ tuition_session table present")
+        except Exception as e:
+            print(f"✗ Migration failed: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
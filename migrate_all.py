@@ -3,10 +3,11 @@ Unified migration script for FinBuddy Money Manager
 This script adds all missing columns to the relevant tables in the database.
 """
 import os
+import pickle
 import sqlite3
 from flask import Flask
 from sqlalchemy import text, inspect
-from routes.database import db
+from routes.database import db, days_to_mask
 
 # --- CONFIGURATION ---
 DB_PATHS = [
@@ -67,7 +68,10 @@ def migrate_sqlite():
     columns = [row[1] for row in cursor.fetchall()]
     user_columns = {
         'weekly_expense_report': 'BOOLEAN DEFAULT 0 NOT NULL',
-        'tuition_reminder': 'BOOLEAN DEFAULT 0 NOT NULL'
+        'tuition_reminder': 'BOOLEAN DEFAULT 0 NOT NULL',
+        'notification_mode': "VARCHAR(10) DEFAULT 'immediate' NOT NULL",
+        'tuition_schedule_version': 'INTEGER DEFAULT 0 NOT NULL',
+        'expense_index_version': 'INTEGER DEFAULT 0 NOT NULL'
     }
     for col, col_type in user_columns.items():
         if col not in columns:
@@ -88,6 +92,37 @@ def migrate_sqlite():
     else:
         print("✓ 'completed_date' column already exists in tuition_record table")
 
+    # --- TuitionRecord Table: pickled days list -> days_mask bitmask ---
+    if 'days_mask' not in columns:
+        print("Adding 'days_mask' column to tuition_record table...")
+        cursor.execute(
+            "ALTER TABLE tuition_record ADD COLUMN days_mask INTEGER DEFAULT 0 NOT NULL")
+        print("✓ Added 'days_mask' column to tuition_record table")
+    else:
+        print("✓ 'days_mask' column already exists in tuition_record table")
+    if 'days' in columns:
+        cursor.execute("SELECT id, days FROM tuition_record WHERE days IS NOT NULL")
+        # Legacy values were only ever written by the app's own PickleType column
+        updates = [(days_to_mask(pickle.loads(value)), record_id)
+                   for record_id, value in cursor.fetchall()]
+        cursor.executemany(
+            "UPDATE tuition_record SET days_mask = ? WHERE id = ?", updates)
+        cursor.execute("UPDATE tuition_record SET days = NULL")
+        print(f"✓ Converted {len(updates)} pickled day lists to days_mask")
+
+    # --- Indexes used by chatbot query tools and reminder sweeps ---
+    indexes = {
+        'ix_expense_user_date': 'expense (user_id, date)',
+        'ix_expense_user_reminder': 'expense (user_id, reminder_at)',
+        'ix_expense_reminder_due': 'expense (reminder_sent, reminder_at)',
+        'ix_group_member_user': 'group_member (user_id)',
+        'ix_expense_split_user': 'expense_split (user_id, is_paid)',
+        'ix_tuition_record_user_days': 'tuition_record (user_id, days_mask)',
+    }
+    for name, target in indexes.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        print(f"✓ Index '{name}' present")
+
     conn.commit()
     conn.close()
     print("\nAll migrations complete!\n")
@@ -0,0 +1,73 @@
+"""
+Migration script to replace the pickled TuitionRecord.days list with the
+days_mask weekday bitmask (bit 0 = Sunday ... bit 6 = Saturday).
+Existing pickled values are converted, then the legacy column is dropped.
+"""
+import pickle
+
+from app import app, db
+from sqlalchemy import inspect, text
+from routes.database import days_to_mask
+
+
+def legacy_days_to_mask(value) -> int:
+    """Decode one pickled `days` value written by the old PickleType column."""
+    if value is None:
+        return 0
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    # Only ever written by this app's own PickleType column
+    return days_to_mask(pickle.loads(value))
+
+
+def migrate():
+    with app.app_context():
+        try:
+            columns = [col['name'] for col in inspect(db.engine).get_columns('tuition_record')]
+
+            if 'days_mask' not in columns:
+                print("Adding days_mask column to tuition_record table...")
+                db.session.execute(text(
+                    "ALTER TABLE tuition_record ADD COLUMN days_mask INTEGER DEFAULT 0 NOT NULL"
+                ))
+                db.session.commit()
+                print("✓ Successfully added days_mask column")
+            else:
+                print("✓ days_mask column already exists")
+
+            if 'days' in columns:
+                rows = db.session.execute(text(
+                    "SELECT id, days FROM tuition_record WHERE days IS NOT NULL"
+                )).fetchall()
+                updates, failed = [], []
+                for record_id, value in rows:
+                    try:
+                        updates.append({'id': record_id, 'mask': legacy_days_to_mask(value)})
+                    except Exception as e:
+                        failed.append(record_id)
+                        print(f"✗ Could not decode days for tuition {record_id}: {e}")
+                if updates:
+                    db.session.execute(text("UPDATE tuition_record SET days_mask = :mask WHERE id = :id"), updates)
+                db.session.commit()
+                print(f"✓ Converted {len(updates)} pickled day lists")
+
+                if failed:
+                    print("✗ Keeping legacy days column until the records above are fixed")
+                else:
+                    db.session.execute(text("ALTER TABLE tuition_record DROP COLUMN days"))
+                    db.session.commit()
+                    print("✓ Dropped legacy days column")
+
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_tuition_record_user_days ON tuition_record (user_id, days_mask)"
+            ))
+            db.session.commit()
+            print("✓ Index 'ix_tuition_record_user_days' present")
+
+        except Exception as e:
+            print(f"✗ Migration failed: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
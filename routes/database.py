@@ -13,6 +13,15 @@ class User(db.Model, UserMixin):
     weekly_expense_report = db.Column(
         db.Boolean, default=False, nullable=False)
     tuition_reminder = db.Column(db.Boolean, default=False, nullable=False)
+    # 'immediate' sends each notification; 'digest' batches them into one daily email
+    notification_mode = db.Column(
+        db.String(10), default='immediate', nullable=False)
+    # Bumped on every tuition write; cached weekly schedules must match it
+    tuition_schedule_version = db.Column(
+        db.Integer, default=0, nullable=False)
+    # Bumped on every expense write; in-process chatbot retrieval indexes must match it
+    expense_index_version = db.Column(
+        db.Integer, default=0, nullable=False)
     expenses = db.relationship(
         'Expense', backref='user', lazy=True, cascade='all, delete-orphan')
     debts = db.relationship('Debt', backref='user',
@@ -39,6 +48,12 @@ class Expense(db.Model):
     # Optional reminder message
     reminder_note = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_expense_user_date', 'user_id', 'date'),
+        db.Index('ix_expense_user_reminder', 'user_id', 'reminder_at'),
+        db.Index('ix_expense_reminder_due', 'reminder_sent', 'reminder_at'),
+    )
+
 
 class Debt(db.Model):
     """Debt model for tracking dues (owed to me) and owes (I owe others)"""
@@ -53,6 +68,25 @@ class Debt(db.Model):
                            default=datetime.utcnow)
 
 
+# Tuition weekdays are 0=Sunday ... 6=Saturday, stored as bit (1 << day)
+ALL_DAYS_MASK = 0b1111111
+
+
+def days_to_mask(days) -> int:
+    """[0, 1, 3] -> 0b1011; ignores anything outside 0-6."""
+    mask = 0
+    for day in days or ():
+        day = int(day)
+        if 0 <= day <= 6:
+            mask |= 1 << day
+    return mask
+
+
+def mask_to_days(mask) -> list:
+    """0b1011 -> [0, 1, 3]"""
+    return [day for day in range(7) if (mask or 0) & (1 << day)]
+
+
 class TuitionRecord(db.Model):
     """Tuition Record model"""
     id = db.Column(db.Integer, primary_key=True)
@@ -64,9 +98,30 @@ class TuitionRecord(db.Model):
     completed_date = db.Column(db.Date, nullable=True)
     address = db.Column(db.String(200), nullable=False)
     amount = db.Column(db.Float, nullable=False)
-    days = db.Column(db.PickleType, nullable=True)
+    # Weekdays as a bitmask so schedule queries can filter in SQL
+    days_mask = db.Column(db.Integer, default=0, nullable=False)
     tuition_time = db.Column(db.String(10), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_tuition_record_user_days', 'user_id', 'days_mask'),
+    )
+
+    @property
+    def days(self) -> list:
+        return mask_to_days(self.days_mask)
+
+    @days.setter
+    def days(self, days):
+        self.days_mask = days_to_mask(days)
+
+    def has_day(self, day: int) -> bool:
+        return bool((self.days_mask or 0) & (1 << day))
+
+    @classmethod
+    def on_day(cls, day: int):
+        """SQL filter: classes held on weekday `day` (days_mask & bit)."""
+        return cls.days_mask.op('&')(1 << day) != 0
+
 
 class Profile(db.Model):
     """Profile model for user profiles"""
@@ -103,6 +158,25 @@ class TuitionReschedule(db.Model):
     tuition = db.relationship('TuitionRecord', backref='reschedules')
 
 
+class TuitionSession(db.Model):
+    """Append-only log of held tuition classes and their corrections"""
+    id = db.Column(db.Integer, primary_key=True)
+    tuition_id = db.Column(db.Integer, db.ForeignKey(
+        'tuition_record.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    # completed, or undone (cancels one completed class on the same date)
+    status = db.Column(db.String(10), nullable=False, default='completed')
+    # Set when the class was held on a rescheduled date
+    reschedule_id = db.Column(db.Integer, db.ForeignKey(
+        'tuition_reschedule.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tuition_session_tuition_date', 'tuition_id', 'date'),
+    )
+
+
 class Group(db.Model):
     """Group model for group expenses"""
     id = db.Column(db.Integer, primary_key=True)
@@ -126,6 +200,10 @@ class GroupMember(db.Model):
     joined_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user = db.relationship('User', backref='group_memberships', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_group_member_user', 'user_id'),
+    )
+
 
 class GroupExpense(db.Model):
     """Group Expense model"""
@@ -152,6 +230,81 @@ class ExpenseSplit(db.Model):
     share_amount = db.Column(db.Float, nullable=False)
     is_paid = db.Column(db.Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        db.Index('ix_expense_split_user', 'user_id', 'is_paid'),
+    )
+
+
+class ChatMessage(db.Model):
+    """Chatbot conversation turn (verbatim, not yet folded into the summary)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    role = db.Column(db.String(10), nullable=False)  # 'user' or 'assistant'
+    content = db.Column(db.Text, nullable=False)
+    token_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_chat_message_user', 'user_id', 'id'),
+    )
+
+
+class ChatMemory(db.Model):
+    """Rolling summary of older chatbot turns, one row per user"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        'user.id'), unique=True, nullable=False)
+    summary = db.Column(db.Text, nullable=True)
+    summary_tokens = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NotificationQueue(db.Model):
+    """Notification waiting for a user's next digest email"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # e.g. reminder
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    due_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow)
+    # When the digest window closes for this item
+    deliver_after = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_queue_pending', 'sent_at', 'deliver_after'),
+    )
+
+
+class SchedulerLease(db.Model):
+    """Leader lease for background jobs (lock row on SQLite, informational on Postgres)"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(120), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False,
+                            default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class ChangeSignal(db.Model):
+    """Shared version counter a worker bumps so the others notice its writes"""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CronCursor(db.Model):
+    """Resume position of a time-budgeted cron job (keyset over reminder_at, id)"""
+    name = db.Column(db.String(50), primary_key=True)
+    last_reminder_at = db.Column(db.DateTime, nullable=True)
+    last_id = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+
 
 def init_db(app):
     """Initialize the database"""
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from routes.database import db, Expense, Debt, Group, GroupMember, GroupExpense
 from datetime import datetime
 from sqlalchemy import extract, func, text
+from services.chat_retrieval import index_expense, remove_expense, drop_user_index, mark_changed
 
 expense = Blueprint("expense", __name__)
 
@@ -217,12 +218,15 @@ def add_expense():
 
                 new_expense = Expense(**expense_data)
                 db.session.add(new_expense)
+                mark_changed(db.session, current_user.id)
                 db.session.commit()
+                index_expense(new_expense, current_user.expense_index_version)
 
-                # Schedule email reminder if set
-                if reminder_at and reminder_at > datetime.utcnow():
+                # Schedule email reminder if set (past times fire right away)
+                if reminder_at:
                     from app import schedule_reminder_email
                     schedule_reminder_email(new_expense.id, reminder_at)
+                if reminder_at and reminder_at > datetime.utcnow():
                     flash(
                         f"Expense added with reminder set for {reminder_at.strftime('%Y-%m-%d %H:%M')}", 'success')
                 else:
@@ -326,7 +330,9 @@ def clear_expenses():
     """Delete all expenses for current user."""
     try:
         Expense.query.filter_by(user_id=current_user.id).delete()
+        mark_changed(db.session, current_user.id)
         db.session.commit()
+        drop_user_index(current_user.id)
         flash('All expenses cleared!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -355,9 +361,13 @@ def delete_expense(expense_id=None):
             "DELETE FROM expense WHERE id = :expense_id AND user_id = :user_id")
         result = db.session.execute(
             delete_query, {"expense_id": expense_id, "user_id": current_user.id})
+        mark_changed(db.session, current_user.id)
         db.session.commit()
 
         if result.rowcount > 0:
+            remove_expense(current_user.id, expense_id, current_user.expense_index_version)
+            from app import cancel_reminder_email
+            cancel_reminder_email(expense_id)
             flash('Expense deleted successfully!', 'success')
         else:
             flash('Expense not found!', 'danger')
@@ -393,7 +403,20 @@ def update_expense(expense_id):
                 expense_to_update.date = datetime.strptime(
                     date_str, '%Y-%m-%d').date()
 
+            # Optional reminder change; an empty value clears it
+            reminder_changed = 'reminder_at' in request.form
+            if reminder_changed:
+                reminder_at_str = request.form.get('reminder_at', '')
+                expense_to_update.reminder_at = datetime.strptime(
+                    reminder_at_str, '%Y-%m-%dT%H:%M') if reminder_at_str else None
+                expense_to_update.reminder_sent = False
+
+            mark_changed(db.session, current_user.id)
             db.session.commit()
+            index_expense(expense_to_update, current_user.expense_index_version)
+            if reminder_changed:
+                from app import schedule_reminder_email
+                schedule_reminder_email(expense_to_update.id, expense_to_update.reminder_at)
             flash('Expense updated successfully!', 'success')
         else:
             flash('Expense not found!', 'danger')
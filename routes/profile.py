@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, session
 from flask_login import login_required, current_user, logout_user
-from routes.database import db, Profile, Expense, User, Debt, GroupMember, GroupExpense, ExpenseSplit
+from routes.database import db, Profile, Expense, User, Debt, GroupMember, GroupExpense, ExpenseSplit, ChatMessage, ChatMemory, NotificationQueue
+from services.chat_retrieval import drop_user_index
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash
 from datetime import datetime
@@ -341,7 +342,15 @@ def delete_profile():
         # 6. Remove user from all groups
         GroupMember.query.filter_by(user_id=user_id).delete()
 
-        # 7. Finally, delete the user account
+        # 7. Delete chatbot conversation history
+        ChatMessage.query.filter_by(user_id=user_id).delete()
+        ChatMemory.query.filter_by(user_id=user_id).delete()
+        drop_user_index(user_id)
+
+        # Pending digest notifications
+        NotificationQueue.query.filter_by(user_id=user_id).delete()
+
+        # 8. Finally, delete the user account
         db.session.delete(user)
         db.session.commit()
 
@@ -1,112 +1,55 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, make_response
 from routes.auth import login_required
-from routes.database import db, TuitionRecord, TuitionReschedule
+from routes.database import db, TuitionRecord, TuitionReschedule, TuitionSession, days_to_mask
+from services.tuition_reminders import invalidate_index
+from services.tuition_schedule import get_schedule, mark_changed, parse_class_time, weekday_index
+from services.tuition_conflicts import find_conflicts, moving_keys, next_free_slots, describe_conflict
+from services.tuition_holidays import MAX_HOLIDAY_DAYS, plan_holiday, check_plan, apply_plan
+from services.tuition_sessions import log_session, undo_last_session, undo_sessions, last_held_date, monthly_summary
+from services.tuition_statements import collect_statements
+from services import pdf_cache
+from services.pdf_render import ROUTINE_PDF_VERSION, STATEMENT_PDF_VERSION, routine_data
+from services.pdf_jobs import render_pool, PdfQueueFull, zip_combiner
 from flask_login import current_user
+from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-from io import BytesIO
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
-# Try to register Luckiest Guy font for PDF branding
-# If font file exists in static/fonts/, use it; otherwise fallback to Helvetica-Bold
-BRAND_FONT = 'Helvetica-Bold'  # Default fallback
-try:
-    font_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
-                             'static', 'fonts', 'LuckiestGuy-Regular.ttf')
-    if os.path.exists(font_path):
-        pdfmetrics.registerFont(TTFont('LuckiestGuy', font_path))
-        BRAND_FONT = 'LuckiestGuy'
-except Exception:
-    pass  # Silently fallback to Helvetica-Bold
 
 tuition_bp = Blueprint('tuition', __name__)
 
+# How long an export request waits for the PDF pool before handing back a job to poll
+PDF_WAIT_SECONDS = float(os.environ.get('PDF_WAIT_SECONDS', '10'))
+
 
 @tuition_bp.route('/tuition')
 @login_required
 def tuition_list():
     """Display tuition records."""
-    user_id = current_user.id
-
-    # Get all tuition records for the user, sorted by most completed days first
-    records = TuitionRecord.query.filter_by(
-        user_id=user_id).order_by(TuitionRecord.total_completed.desc()).all()
-
-    # Calculate statistics
-    total_amount = sum(rec.amount for rec in records) if records else 0
-    total_students = len(records)
-    total_completed_classes = sum(
-        rec.total_completed for rec in records) if records else 0
-    total_classes = sum(rec.total_days for rec in records) if records else 0
+    # Records, weekday slots, reschedules and totals come from the cached schedule
+    schedule = get_schedule(db.session, current_user)
 
     # Get current date and day of week
     today = datetime.now().date()
-    current_day_index = today.weekday()  # 0=Monday, 6=Sunday
-    # Convert to our format: 0=Sunday, 1=Monday, ..., 6=Saturday
-    current_day_index = (current_day_index + 1) % 7
-
-    # Calculate dates for the current week (Sunday to Saturday)
-    # Get Sunday of the current week
-    days_since_sunday = (today.weekday() + 1) % 7
-    week_start = today - timedelta(days=days_since_sunday)
-
-    # Create list of dates for the week
-    week_dates = []
-    for i in range(7):
-        week_dates.append(week_start + timedelta(days=i))
-
-    # Group tuitions by day of week
-    schedule_by_day = {
-        0: [],  # Sunday
-        1: [],  # Monday
-        2: [],  # Tuesday
-        3: [],  # Wednesday
-        4: [],  # Thursday
-        5: [],  # Friday
-        6: []   # Saturday
-    }
-
-    for record in records:
-        if record.days:  # If days field exists
-            for day in record.days:
-                schedule_by_day[day].append(record)
+    # Our format: 0=Sunday, 1=Monday, ..., 6=Saturday
+    current_day_index = weekday_index(today)
 
     # Reorder days to put current day first
-    ordered_days = []
-    for i in range(7):
-        day_idx = (current_day_index + i) % 7
-        ordered_days.append(day_idx)
+    ordered_days = [(current_day_index + i) % 7 for i in range(7)]
 
     # Ensure dates progress linearly from today without wrapping
-    ordered_dates = []
-    for i in range(7):
-        ordered_dates.append(today + timedelta(days=i))
-
-    # Get recent rescheduled classes (pending and confirmed)
-    record_ids = [rec.id for rec in records]
-    recent_reschedules = TuitionReschedule.query.filter(
-        TuitionReschedule.tuition_id.in_(record_ids),
-        TuitionReschedule.reschedule_status.in_(['pending', 'confirmed'])
-    ).order_by(TuitionReschedule.created_at.desc()).limit(10).all()
+    ordered_dates = [today + timedelta(days=i) for i in range(7)]
 
     return render_template(
         'tuition.html',
-        tuition_list=records,
-        schedule_by_day=schedule_by_day,
+        tuition_list=schedule.records,
+        schedule_by_day=schedule.by_day,
         ordered_days=ordered_days,
         ordered_dates=ordered_dates,
-        recent_reschedules=recent_reschedules,
-        total_amount=total_amount,
-        total_students=total_students,
-        total_completed_classes=total_completed_classes,
-        total_classes=total_classes,
+        recent_reschedules=schedule.reschedules[:10],
+        total_amount=schedule.total_amount,
+        total_students=schedule.total_students,
+        total_completed_classes=schedule.total_completed_classes,
+        total_classes=schedule.total_classes,
         now=datetime.now(),
         current_day_index=current_day_index,
         today=today
@@ -158,10 +101,12 @@ def add_tuition():
         address=address,
         amount=amount,
         tuition_time=tuition_time if tuition_time else None,
-        days=days if days else None
+        days_mask=days_to_mask(days)
     )
     db.session.add(new_record)
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Tuition record added successfully!', 'success')
     return redirect(url_for('tuition.tuition_list'))
@@ -188,21 +133,33 @@ def update_completed(record_id, action):
         if action == 'increment' and record.total_completed < record.total_days:
             record.total_completed += 1
             record.completed_date = today
+            log_session(db.session, record.id, today)
+            mark_changed(db.session, current_user.id)
             db.session.commit()
             flash('✅ Class marked as completed!', 'success')
-        elif action == 'undo' and record.completed_date == today:
+        elif action == 'undo' and (record.completed_date == today
+                                   or (record.total_completed > 0 and last_held_date(db.session, record.id))):
+            # Reverts the latest logged class, not only one marked today
+            undo_last_session(db.session, record.id)
             if record.total_completed > 0:
                 record.total_completed -= 1
-            record.completed_date = None
+            record.completed_date = last_held_date(db.session, record.id)
+            mark_changed(db.session, current_user.id)
             db.session.commit()
-            flash('Marked completion undone for today!', 'success')
+            flash('Marked completion undone!', 'success')
         elif action == 'decrement' and record.total_completed > 0:
+            undo_last_session(db.session, record.id)
             record.total_completed -= 1
+            record.completed_date = last_held_date(db.session, record.id)
+            mark_changed(db.session, current_user.id)
             db.session.commit()
             flash('Progress updated!', 'success')
         elif action == 'clear' and record.total_completed > 0:
+            # Keep the attendance log (history, statements) in step with the counter
+            undo_sessions(db.session, record.id)
             record.total_completed = 0
             record.completed_date = None
+            mark_changed(db.session, current_user.id)
             db.session.commit()
             flash('Progress reset to 0!', 'success')
         else:
@@ -258,6 +215,11 @@ def edit_tuition(record_id):
         flash(f'Invalid input: {str(e)}', 'error')
         return redirect(url_for('tuition.edit_tuition', record_id=record_id))
 
+    # Lowering progress by hand cancels that many of the latest logged classes
+    if total_completed < record.total_completed:
+        undo_sessions(db.session, record.id, record.total_completed - total_completed)
+        record.completed_date = last_held_date(db.session, record.id)
+
     # Update record
     record.student_name = student_name
     record.total_days = total_days
@@ -265,9 +227,11 @@ def edit_tuition(record_id):
     record.address = address
     record.amount = amount
     record.tuition_time = tuition_time if tuition_time else None
-    record.days = days if days else None
+    record.days_mask = days_to_mask(days)
 
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Tuition record updated successfully!', 'success')
     return redirect(url_for('tuition.tuition_list'))
@@ -287,9 +251,12 @@ def delete_tuition(record_id):
         flash('Record not found!', 'error')
         return redirect(url_for('tuition.tuition_list'))
 
-    # Delete record
+    # Delete record and its attendance history
+    TuitionSession.query.filter_by(tuition_id=record.id).delete()
     db.session.delete(record)
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Tuition record deleted successfully!', 'success')
     return redirect(url_for('tuition.tuition_list'))
@@ -334,6 +301,11 @@ def reschedule_class(record_id):
         flash('Invalid date format!', 'error')
         return redirect(url_for('tuition.reschedule_class', record_id=record_id))
 
+    clash = _reschedule_clash(new_date_obj, new_time, moving_keys(record_id, original_date_obj, new_date_obj))
+    if clash:
+        flash(clash, 'error')
+        return redirect(url_for('tuition.reschedule_class', record_id=record_id))
+
     # Create reschedule record
     reschedule = TuitionReschedule(
         tuition_id=record_id,
@@ -345,6 +317,7 @@ def reschedule_class(record_id):
         reschedule_status='pending'
     )
     db.session.add(reschedule)
+    mark_changed(db.session, current_user.id)
     db.session.commit()
 
     flash('Class reschedule request created! Status: Pending', 'success')
@@ -388,6 +361,12 @@ def edit_reschedule(reschedule_id):
         flash('Invalid date format!', 'error')
         return redirect(url_for('tuition.edit_reschedule', reschedule_id=reschedule_id))
 
+    clash = _reschedule_clash(new_date_obj, new_time,
+                              moving_keys(record.id, original_date_obj, new_date_obj, reschedule.id))
+    if clash:
+        flash(clash, 'error')
+        return redirect(url_for('tuition.edit_reschedule', reschedule_id=reschedule_id))
+
     # Update reschedule record
     reschedule.original_date = original_date_obj
     reschedule.new_date = new_date_obj
@@ -395,12 +374,127 @@ def edit_reschedule(reschedule_id):
     reschedule.new_time = new_time
     reschedule.reason = reason
 
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Reschedule updated successfully!', 'success')
     return redirect(url_for('tuition.tuition_list'))
 
 
+def _reschedule_clash(new_date, new_time: str, exclude: set):
+    """Error message if the new slot overlaps another class, else None. 'allow_conflict' skips the check."""
+    start = parse_class_time(new_time)
+    if start is None or request.form.get('allow_conflict'):
+        return None
+    schedule = get_schedule(db.session, current_user)
+    clashes = find_conflicts(schedule, new_date, start, exclude=exclude)
+    if not clashes:
+        return None
+    message = f"⚠️ That time clashes with {', '.join(describe_conflict(c, new_date) for c in clashes)}."
+    free = next_free_slots(schedule, new_date, count=3, exclude=exclude, after=datetime.now(), near=start)
+    if free:
+        message += ' Free slots: ' + ', '.join(f"{day.strftime('%a, %b %d')} {slot}" for day, slot in free) + '.'
+    return message
+
+
+@tuition_bp.route('/tuition/free-slots')
+@login_required
+def free_slots():
+    """
+    Clash check and next free slots for a reschedule form (JSON).
+
+    ?date=YYYY-MM-DD [&time=HH:MM] [&record_id=&original_date=] [&reschedule_id=] [&length=minutes]
+    """
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+        original = request.args.get('original_date')
+        original_day = datetime.strptime(original, '%Y-%m-%d').date() if original else None
+        record_id = request.args.get('record_id', type=int)
+        reschedule_id = request.args.get('reschedule_id', type=int)
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    try:
+        length = int(request.args['length']) if request.args.get('length') else None
+        if length is not None and not 0 < length <= 240:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'length must be 1-240 minutes'}), 400
+
+    exclude = moving_keys(record_id, original_day, day, reschedule_id) if record_id else set()
+    schedule = get_schedule(db.session, current_user)
+    start = parse_class_time(request.args.get('time'))
+    conflicts = find_conflicts(schedule, day, start, length, exclude) if start else []
+    slots = next_free_slots(schedule, day, length, count=6, exclude=exclude, after=datetime.now(),
+                           near=start)
+    return jsonify({
+        'conflicts': [{'tuition_id': c.tuition_id, 'student_name': c.student_name,
+                       'description': describe_conflict(c, day)} for c in conflicts],
+        'slots': [{'date': slot_day.isoformat(), 'time': slot,
+                   'label': f"{slot_day.strftime('%a, %b %d')} {slot}"} for slot_day, slot in slots],
+    })
+
+
+@tuition_bp.route('/tuition/holiday', methods=['GET', 'POST'])
+@login_required
+def holiday_reschedule():
+    """Move every class in a date range (holiday, exams) to free slots in one request."""
+    values = request.form if request.method == 'POST' else request.args
+    start_str = values.get('start_date')
+    end_str = values.get('end_date') or start_str
+    reason = values.get('reason', '')
+    if not start_str:
+        return render_template('holiday_reschedule.html', proposals=None, reason=reason,
+                               max_days=MAX_HOLIDAY_DAYS)
+
+    try:
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+    except ValueError:
+        flash('Invalid date format!', 'error')
+        return redirect(url_for('tuition.holiday_reschedule'))
+    if end < start or (end - start).days >= MAX_HOLIDAY_DAYS:
+        flash(f'Choose an end date on or after the start, at most {MAX_HOLIDAY_DAYS} days later.', 'error')
+        return redirect(url_for('tuition.holiday_reschedule'))
+    if start < datetime.now().date():
+        flash('Holidays must start today or later.', 'error')
+        return redirect(url_for('tuition.holiday_reschedule'))
+
+    schedule = get_schedule(db.session, current_user)
+    proposals = plan_holiday(schedule, start, end)
+    problems = []
+    if request.method == 'POST':
+        # The tutor may have edited any proposed slot or skipped a class
+        chosen = []
+        for proposal in proposals:
+            key = proposal['key']
+            proposal['skip'] = bool(request.form.get(f'skip_{key}'))
+            try:
+                new_date = request.form.get(f'new_date_{key}')
+                proposal['new_date'] = datetime.strptime(new_date, '%Y-%m-%d').date() if new_date else None
+            except ValueError:
+                proposal['new_date'] = None
+            proposal['new_time'] = request.form.get(f'new_time_{key}') or None
+            if not proposal['skip']:
+                chosen.append(proposal)
+
+        # 'allow_conflict' only waives the clash checks
+        problems = check_plan(schedule, chosen, start, end,
+                              check_clashes=not request.form.get('allow_conflict'))
+        if chosen and not problems:
+            count = apply_plan(db.session, chosen, reason)
+            mark_changed(db.session, current_user.id)
+            db.session.commit()
+            invalidate_index()
+            flash(f'{count} class{"es" if count != 1 else ""} rescheduled! Status: Pending', 'success')
+            return redirect(url_for('tuition.tuition_list'))
+        if not chosen:
+            problems = ['Every class is skipped, so nothing was rescheduled.']
+
+    return render_template('holiday_reschedule.html', proposals=proposals, problems=problems,
+                           start_date=start, end_date=end, reason=reason, max_days=MAX_HOLIDAY_DAYS)
+
+
 @tuition_bp.route('/tuition/reschedule/confirm/<int:reschedule_id>', methods=['POST'])
 @login_required
 def confirm_reschedule(reschedule_id):
@@ -415,7 +509,9 @@ def confirm_reschedule(reschedule_id):
         return redirect(url_for('tuition.tuition_list'))
 
     reschedule.reschedule_status = 'confirmed'
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Reschedule confirmed!', 'success')
     return redirect(url_for('tuition.reschedule_class', record_id=reschedule.tuition_id))
@@ -435,7 +531,9 @@ def cancel_reschedule(reschedule_id):
         return redirect(url_for('tuition.tuition_list'))
 
     reschedule.reschedule_status = 'cancelled'
+    mark_changed(db.session, current_user.id)
     db.session.commit()
+    invalidate_index()
 
     flash('Reschedule cancelled!', 'info')
     return redirect(url_for('tuition.tuition_list'))
@@ -463,6 +561,10 @@ def mark_reschedule_completed(reschedule_id):
         if tuition_record.total_completed < tuition_record.total_days:
             tuition_record.total_completed += 1
 
+        # The class was held on its new date
+        log_session(db.session, tuition_record.id, reschedule.new_date, reschedule_id=reschedule.id)
+
+        mark_changed(db.session, current_user.id)
         db.session.commit()
         flash('Class marked as completed! Progress updated.', 'success')
     except Exception as e:
@@ -472,232 +574,132 @@ def mark_reschedule_completed(reschedule_id):
     return redirect(url_for('tuition.tuition_list'))
 
 
+@tuition_bp.route('/tuition/history')
+@login_required
+def tuition_history():
+    """Monthly attendance, earnings and streaks per student (JSON)."""
+    month = request.args.get('month') or datetime.now().strftime('%Y-%m')
+    try:
+        year, month_num = (int(part) for part in month.split('-'))
+        summary = monthly_summary(db.session, current_user.id, year, month_num,
+                                  today=datetime.now().date())
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+    return jsonify(summary)
+
+
 @tuition_bp.route('/tuition/export-pdf')
 @login_required
 def export_routine_pdf():
     """Export tuition routine as PDF."""
-    user_id = current_user.id
+    # Weekday slots, already sorted by class time
+    schedule = get_schedule(db.session, current_user)
+    routine = routine_data(schedule)
 
-    # Get all tuition records for the user
-    records = TuitionRecord.query.filter_by(user_id=user_id).all()
-
-    # Group tuitions by day of week
-    schedule_by_day = {i: [] for i in range(7)}
-
-    for record in records:
-        # record.days is a list of integers (e.g., [0, 1, 3] for Sunday, Monday, Wednesday)
-        if record.days:
-            for day_idx in record.days:
-                if isinstance(day_idx, int) and 0 <= day_idx <= 6:
-                    schedule_by_day[day_idx].append(record)
-
-    # Sort by time
-    for day in schedule_by_day:
-        schedule_by_day[day].sort(key=lambda x: x.tuition_time or "00:00")
-
-    # Create PDF in landscape orientation for horizontal routine
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30,
-                            leftMargin=30, topMargin=30, bottomMargin=30)
-    elements = []
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#e74c3c'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
+    # Same routine data -> same key, file and ETag; only new routines hit ReportLab
+    key = pdf_cache.content_key('routine', ROUTINE_PDF_VERSION, routine)
+    filename = f'Weekly_Routine_for_{current_user.username}.pdf'
+    return _cached_download(key, filename, 'application/pdf', lambda: render_pool.render(
+        'routine', key, routine, owner=current_user.id, filename=filename))
 
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.grey,
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
 
-    # Title
-    elements.append(Paragraph("🎓 Weekly Tuition Routine", title_style))
-    elements.append(Paragraph(
-        f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", subtitle_style))
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Weekly Schedule Table
-    days = ['Sunday', 'Monday', 'Tuesday',
-            'Wednesday', 'Thursday', 'Friday', 'Saturday']
-
-    # Prepare table data - Days as columns
-    # First row: Day names
-    header_row = days
-
-    # Find the maximum number of classes on any day
-    max_classes = max(len(schedule_by_day[day_idx]) for day_idx in range(7))
-    if max_classes == 0:
-        max_classes = 1  # At least one row for empty message
-
-    # Initialize table data with header
-    table_data = [header_row]
-
-    # Create rows for each class slot
-    for row_idx in range(max_classes):
-        row = []
-        for day_idx in range(7):
-            day_classes = schedule_by_day[day_idx]
-            if row_idx < len(day_classes):
-                entry = day_classes[row_idx]
-                # Create a formatted cell with student name, time, and address
-                time_str = entry.tuition_time or "Time: N/A"
-                address = entry.address[:20] + \
-                    "..." if len(entry.address) > 20 else entry.address
-
-                cell_content = Paragraph(
-                    f"<b>{entry.student_name}</b><br/>"
-                    f"<font size=9>⏰ {time_str}</font><br/>"
-                    f"<font size=8>📍 {address}</font>",
-                    ParagraphStyle(
-                        'CellStyle',
-                        parent=styles['Normal'],
-                        fontSize=10,
-                        leading=12,
-                        alignment=TA_CENTER
-                    )
-                )
-                row.append(cell_content)
-            else:
-                # Empty cell if no class at this time slot
-                if row_idx == 0 and len(day_classes) == 0:
-                    row.append(Paragraph("<i>No classes</i>",
-                                         ParagraphStyle('EmptyStyle', parent=styles['Normal'],
-                                                        fontSize=9, alignment=TA_CENTER, textColor=colors.grey)))
-                else:
-                    row.append('')
-        table_data.append(row)
-
-    # Create table with equal column widths for landscape orientation
-    col_width = 10.5*inch / 7  # Distribute width evenly across 7 days in landscape
-    table = Table(table_data, colWidths=[col_width] * 7,
-                  rowHeights=[0.4*inch] + [1*inch] * max_classes)
-
-    # Table style
-    table_style = [
-        # Header row (days)
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a90e2')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-
-        # Data rows
-        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 1.5, colors.HexColor('#cccccc')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#4a90e2')),
-    ]
-
-    # Add alternating colors for data rows
-    for row_idx in range(1, len(table_data)):
-        if row_idx % 2 == 1:
-            table_style.append(
-                ('BACKGROUND', (0, row_idx),
-                 (-1, row_idx), colors.HexColor('#f8f9fa'))
-            )
-        else:
-            table_style.append(
-                ('BACKGROUND', (0, row_idx), (-1, row_idx), colors.white)
-            )
-
-    # Add light background to cells with content
-    for day_idx in range(7):
-        for row_idx in range(1, len(table_data)):
-            if schedule_by_day[day_idx] and (row_idx - 1) < len(schedule_by_day[day_idx]):
-                table_style.append(
-                    ('BACKGROUND', (day_idx, row_idx), (day_idx, row_idx),
-                     colors.HexColor('#e3f2fd'))
-                )
-
-    table.setStyle(TableStyle(table_style))
-
-    elements.append(table)
-    elements.append(Spacer(1, 0.5*inch))
-
-    # Summary statistics
-    total_students = len(records)
-    total_amount = sum(rec.amount for rec in records)
-    total_classes = sum(rec.total_days for rec in records)
-
-    summary_data = [
-        ['Summary Statistics', ''],
-        ['Total Students', str(total_students)],
-        ['Total Income', f"{total_amount:,.2f} bdt."],
-        ['Total Classes', str(total_classes)]
-    ]
-
-    summary_table = Table(summary_data, colWidths=[2.5*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('SPAN', (0, 0), (-1, 0)),
-
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0f0f0')),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 1), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-    ]))
-
-    elements.append(summary_table)
-
-    # Branding: header/footer on each page
-    def draw_branding(canvas_obj, doc_obj):
-        width, height = landscape(A4)
-        # Header bar
-        canvas_obj.setFillColor(colors.HexColor('#667eea'))
-        canvas_obj.rect(0, height - 25, width, 25, fill=1, stroke=0)
-        # Brand text - use Luckiest Guy if available, else Helvetica-Bold
-        canvas_obj.setFillColor(colors.whitesmoke)
-        canvas_obj.setFont(BRAND_FONT, 16)
-        canvas_obj.drawCentredString(width / 2, height - 18, 'FinBuddy')
-        # Footer
-        canvas_obj.setFillColor(colors.HexColor('#888888'))
-        canvas_obj.setFont('Helvetica', 9)
-        canvas_obj.drawString(
-            30, 15, f"Generated on {datetime.now().strftime('%b %d, %Y')} • FinBuddy")
-        canvas_obj.drawRightString(width - 30, 15, f"Page {doc_obj.page}")
-
-    # Build PDF with branding
-    doc.build(elements, onFirstPage=draw_branding, onLaterPages=draw_branding)
-
-    # Get PDF from buffer
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    # Create response
-    response = make_response(pdf)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers[
-        'Content-Disposition'] = f'attachment; filename=Weekly_Routine_for_{current_user.username}.pdf'
+@tuition_bp.route('/tuition/statements')
+@login_required
+def export_statements():
+    """Monthly statements for every student: one PDF, or ?format=zip for a PDF per student."""
+    month = request.args.get('month') or datetime.now().strftime('%Y-%m')
+    output = request.args.get('format', 'pdf')
+    if output not in ('pdf', 'zip'):
+        return jsonify({'error': 'format must be pdf or zip'}), 400
+    try:
+        year, month_num = (int(part) for part in month.split('-'))
+        statements = collect_statements(db.session, current_user.id, year, month_num)
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+    if not statements['statements']:
+        flash('Add a student before exporting statements.', 'error')
+        return redirect(url_for('tuition.tuition_list'))
 
+    key = pdf_cache.content_key(f'statements-{output}', STATEMENT_PDF_VERSION, statements)
+    if output == 'pdf':
+        filename = f"Tuition_Statements_{statements['month']}.pdf"
+        return _cached_download(key, filename, 'application/pdf', lambda: render_pool.render(
+            'statements', key, statements, owner=current_user.id, filename=filename))
+
+    # One document per student, spread across the PDF workers and zipped here
+    common = {'month_label': statements['month_label'], 'tutor_name': statements['tutor_name']}
+    parts = [('statement', {**common, 'statement': statement}) for statement in statements['statements']]
+    names = [f"{index:02d}_{secure_filename(statement['student_name']) or 'student'}_{statements['month']}.pdf"
+             for index, statement in enumerate(statements['statements'], 1)]
+    filename = f"Tuition_Statements_{statements['month']}.zip"
+    return _cached_download(key, filename, 'application/zip', lambda: render_pool.render_parts(
+        'statements', key, parts, zip_combiner(names), owner=current_user.id,
+        filename=filename, mimetype='application/zip'))
+
+
+def _cached_download(key: str, filename: str, mimetype: str, start_job):
+    """
+    Serve a generated document from the PDF cache, or render it in the pool.
+
+    Script requests (Accept: application/json, see static/js/pdf_export.js)
+    get renders that outlast PDF_WAIT_SECONDS back as a job to poll; plain
+    browser navigations wait for the render instead.
+    """
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    if key in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        data = pdf_cache.get(key)
+        if data is None:
+            try:
+                job = start_job()
+            except PdfQueueFull:
+                message = 'PDF export is busy, please try again shortly.'
+                if not wants_json:
+                    flash(message, 'error')
+                    return redirect(url_for('tuition.tuition_list'))
+                response = jsonify({'error': message})
+                response.status_code = 503
+                response.headers['Retry-After'] = '5'
+                return response
+            if not job.wait(PDF_WAIT_SECONDS if wants_json else None):
+                return jsonify({**job.to_dict(),
+                                'poll_url': url_for('tuition.pdf_job', job_id=job.id)}), 202
+            if job.status != 'done':
+                message = 'Could not generate the PDF, please try again.'
+                if not wants_json:
+                    flash(message, 'error')
+                    return redirect(url_for('tuition.tuition_list'))
+                return jsonify({'error': message}), 500
+            data = job.result
+        response = _download_response(data, filename, mimetype)
+
+    response.set_etag(key)
+    # Revalidate every time, but let the browser keep its copy for If-None-Match
+    response.headers['Cache-Control'] = 'private, no-cache'
     return response
+
+
+def _download_response(data: bytes, filename: str, mimetype: str = 'application/pdf'):
+    response = make_response(data)
+    response.headers['Content-Type'] = mimetype
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+@tuition_bp.route('/tuition/pdf-jobs/<job_id>')
+@login_required
+def pdf_job(job_id):
+    """Poll a background PDF job; ?download=1 returns the file once it is done."""
+    job = render_pool.get(job_id)
+    if job is None or job.owner != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    if request.args.get('download') and job.status == 'done':
+        data = job.result or pdf_cache.get(job.key)
+        if data is not None:
+            filename = job.filename or f'Weekly_Routine_for_{current_user.username}.pdf'
+            return _download_response(data, filename, job.mimetype)
+    info = job.to_dict()
+    if job.status == 'done':
+        info['download_url'] = url_for('tuition.pdf_job', job_id=job.id, download=1)
+    return jsonify(info)
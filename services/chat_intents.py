@@ -0,0 +1,335 @@
+"""
+Chat Intent Service - deterministic fast-path answers for common questions.
+
+Recognises a small catalogue of finance questions ("what did I spend this
+week", "top category this month", "how many classes left") and answers them
+straight from aggregate queries with templated Markdown. Anything that is not
+an exact catalogue match returns None so the caller can fall through to the LLM.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func
+
+
+# Periods understood by the spending intents. Returns (label, start, end)
+# with inclusive dates; None bounds mean all-time.
+def _period_bounds(period: str):
+    today = datetime.now(timezone.utc).date()
+    if period == 'today':
+        return 'today', today, today
+    if period == 'yesterday':
+        day = today - timedelta(days=1)
+        return 'yesterday', day, day
+    if period == 'week':
+        # Matches the rest of the app: "this week" is the last 7 days
+        return 'in the last 7 days', today - timedelta(days=7), today
+    if period == 'month':
+        return 'this month', today.replace(day=1), today
+    if period == 'last_month':
+        end = today.replace(day=1) - timedelta(days=1)
+        return 'last month', end.replace(day=1), end
+    if period == 'year':
+        return 'this year', today.replace(month=1, day=1), today
+    return 'in total', None, None
+
+
+_PERIOD_WORDS = {
+    'today': 'today',
+    'yesterday': 'yesterday',
+    'this week': 'week',
+    'last 7 days': 'week',
+    'past 7 days': 'week',
+    'the last 7 days': 'week',
+    'the past 7 days': 'week',
+    'this month': 'month',
+    'last month': 'last_month',
+    'this year': 'year',
+    'in total': 'all',
+    'total': 'all',
+    'overall': 'all',
+    'all time': 'all',
+    'of all time': 'all',
+    'so far': 'all',
+}
+
+_PERIOD_RE = '(?P<period>' + '|'.join(
+    re.escape(p) for p in sorted(_PERIOD_WORDS, key=len, reverse=True)) + ')'
+
+# Polite prefixes/suffixes that do not change the meaning of a question
+_FILLER_RE = re.compile(
+    r"^(?:hey|hi|hello|ok|okay|please|pls|finbuddy|can you tell me|tell me|"
+    r"could you tell me|do you know)\b[\s,]*|[\s,]*\b(?:please|pls|thanks|thank you)$")
+
+
+def _normalize(message: str) -> str:
+    text = message.lower().strip()
+    text = text.replace('’', "'")
+    text = re.sub(r"[?!.\s]+$", '', text)
+    text = re.sub(r"\s+", ' ', text)
+    previous = None
+    while previous != text:
+        previous = text
+        text = _FILLER_RE.sub('', text).strip()
+    return text
+
+
+def _money(amount) -> str:
+    return f"**৳{(amount or 0):,.2f}**"
+
+
+def _date_filters(model, start, end):
+    filters = []
+    if start is not None:
+        filters.append(model.date >= start)
+    if end is not None:
+        filters.append(model.date <= end)
+    return filters
+
+
+# === Intent handlers ===
+# Each handler takes (user_id, db_session, params) and returns Markdown.
+
+def _answer_spend(user_id: int, db_session, params: dict) -> str:
+    from routes.database import Expense
+
+    label, start, end = _period_bounds(params.get('period', 'all'))
+    total, count = db_session.query(
+        func.coalesce(func.sum(Expense.amount), 0),
+        func.count(Expense.id)
+    ).filter(Expense.user_id == user_id, *_date_filters(Expense, start, end)).one()
+
+    if not count:
+        return f"You haven't logged any expenses {label} (**৳0** spent). 💰"
+    noun = 'transaction' if count == 1 else 'transactions'
+    return f"You spent {_money(total)} {label} across **{count}** {noun}. 💰"
+
+
+def _answer_top_category(user_id: int, db_session, params: dict) -> str:
+    from routes.database import Expense
+
+    label, start, end = _period_bounds(params.get('period', 'month'))
+    category = func.coalesce(Expense.category, 'Other')
+    rows = db_session.query(
+        category.label('category'),
+        func.sum(Expense.amount).label('total')
+    ).filter(
+        Expense.user_id == user_id, *_date_filters(Expense, start, end)
+    ).group_by(category).order_by(func.sum(Expense.amount).desc()).limit(3).all()
+
+    if not rows:
+        return f"No spending recorded {label}, so there's no top category yet. 📊"
+
+    grand_total = db_session.query(func.coalesce(func.sum(Expense.amount), 0)).filter(
+        Expense.user_id == user_id, *_date_filters(Expense, start, end)).scalar() or 0
+    lines = [f"Your top category {label} is `{rows[0].category}` at {_money(rows[0].total)}.", ""]
+    for row in rows:
+        share = (row.total / grand_total * 100) if grand_total else 0
+        lines.append(f"- `{row.category}`: {_money(row.total)} (**{share:.0f}%**)")
+    return "\n".join(lines)
+
+
+def _answer_category_spend(user_id: int, db_session, params: dict) -> str:
+    from routes.database import Expense
+
+    label, start, end = _period_bounds(params.get('period', 'month'))
+    category = params['category']
+    total, count = db_session.query(
+        func.coalesce(func.sum(Expense.amount), 0),
+        func.count(Expense.id)
+    ).filter(
+        Expense.user_id == user_id,
+        func.lower(Expense.category) == category.lower(),
+        *_date_filters(Expense, start, end)
+    ).one()
+
+    if not count:
+        return f"Nothing spent on `{category}` {label}. 📊"
+    return f"You spent {_money(total)} on `{category}` {label} ({count} entries). 📊"
+
+
+def _answer_classes_left(user_id: int, db_session, params: dict) -> str:
+    from routes.database import TuitionRecord
+
+    rows = db_session.query(
+        TuitionRecord.student_name,
+        TuitionRecord.total_days,
+        TuitionRecord.total_completed
+    ).filter(TuitionRecord.user_id == user_id).order_by(TuitionRecord.student_name).all()
+
+    if not rows:
+        return "You don't have any tuition records yet. 🎓"
+
+    remaining = sum(max((r.total_days or 0) - (r.total_completed or 0), 0) for r in rows)
+    total = sum((r.total_days or 0) for r in rows)
+    lines = [f"You have **{remaining}** classes left out of **{total}**.", ""]
+    for r in rows:
+        left = max((r.total_days or 0) - (r.total_completed or 0), 0)
+        lines.append(f"- {r.student_name}: **{left}** left ({r.total_completed}/{r.total_days} done)")
+    return "\n".join(lines)
+
+
+def _answer_tuition_income(user_id: int, db_session, params: dict) -> str:
+    from routes.database import TuitionRecord
+
+    total, students = db_session.query(
+        func.coalesce(func.sum(TuitionRecord.amount), 0),
+        func.count(TuitionRecord.id)
+    ).filter(TuitionRecord.user_id == user_id).one()
+
+    if not students:
+        return "You don't have any tuition records yet. 🎓"
+    noun = 'student' if students == 1 else 'students'
+    return f"Your tuition income potential is {_money(total)} from **{students}** {noun}. 🎓"
+
+
+def _answer_group_balance(user_id: int, db_session, params: dict) -> str:
+    from routes.database import GroupExpense, ExpenseSplit
+
+    owed_to_user = db_session.query(func.coalesce(func.sum(ExpenseSplit.share_amount), 0)).select_from(ExpenseSplit).join(
+        GroupExpense, GroupExpense.id == ExpenseSplit.expense_id
+    ).filter(
+        GroupExpense.paid_by == user_id,
+        ExpenseSplit.user_id != user_id,
+        ExpenseSplit.is_paid == False
+    ).scalar() or 0
+
+    user_owes = db_session.query(func.coalesce(func.sum(ExpenseSplit.share_amount), 0)).select_from(ExpenseSplit).join(
+        GroupExpense, GroupExpense.id == ExpenseSplit.expense_id
+    ).filter(
+        GroupExpense.paid_by != user_id,
+        ExpenseSplit.user_id == user_id,
+        ExpenseSplit.is_paid == False
+    ).scalar() or 0
+
+    net = owed_to_user - user_owes
+    net_str = f"+৳{net:,.2f}" if net >= 0 else f"-৳{abs(net):,.2f}"
+    return (f"Group balance: **{net_str}**\n\n"
+            f"- Others owe you: {_money(owed_to_user)}\n"
+            f"- You owe: {_money(user_owes)}")
+
+
+def _answer_upcoming_reminders(user_id: int, db_session, params: dict) -> str:
+    from routes.database import Expense
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db_session.query(Expense.name, Expense.amount, Expense.reminder_at).filter(
+        Expense.user_id == user_id,
+        Expense.reminder_at.isnot(None),
+        Expense.reminder_sent == False,
+        Expense.reminder_at >= now
+    ).order_by(Expense.reminder_at).limit(5).all()
+
+    if not rows:
+        return "You have no upcoming bill reminders. ✅"
+    lines = ["Upcoming reminders:", ""]
+    for r in rows:
+        lines.append(f"- {r.name}: {_money(r.amount)} on {r.reminder_at.strftime('%d %b %Y, %I:%M %p')}")
+    return "\n".join(lines)
+
+
+# === Intent catalogue ===
+# Patterns are matched against the whole normalised message so compound
+# questions ("...and how can I save?") still go to the LLM.
+
+_SPEND_VERBS = r"(?:what did i spend|how much did i spend|how much have i spent|what have i spent|my (?:total )?spending|total spending|total spent|how much i spent)"
+
+INTENT_CATALOGUE = [
+    ('spend_period', re.compile(rf"^{_SPEND_VERBS} {_PERIOD_RE}$"), _answer_spend),
+    ('spend_period', re.compile(rf"^{_PERIOD_RE} (?:spending|expenses|total)$"), _answer_spend),
+    ('spend_period', re.compile(rf"^how much (?:did|have) i spent? {_PERIOD_RE}$"), _answer_spend),
+    ('top_category', re.compile(
+        rf"^(?:what(?:'s| is| was)? )?(?:my )?(?:top|biggest|largest|highest|main) (?:spending |expense )?category(?: {_PERIOD_RE})?$"),
+        _answer_top_category),
+    ('top_category', re.compile(
+        rf"^(?:where|what) did i spend (?:the )?most(?: on)?(?: {_PERIOD_RE})?$"), _answer_top_category),
+    ('category_spend', re.compile(
+        rf"^how much (?:did|have) i spen[dt] on (?P<category>[a-z][a-z &]*?)(?: {_PERIOD_RE})?$"),
+        _answer_category_spend),
+    ('classes_left', re.compile(
+        r"^(?:how many|number of) (?:tuition )?(?:classes|class|sessions) (?:are )?(?:left|remaining|pending)$"),
+        _answer_classes_left),
+    ('tuition_income', re.compile(
+        r"^(?:what(?:'s| is)? )?(?:my )?(?:total )?tuition (?:income|earnings?)(?: potential)?$|^how much (?:do|will) i earn from tuition$"),
+        _answer_tuition_income),
+    ('group_balance', re.compile(
+        r"^(?:what(?:'s| is)? )?my group balance$|^(?:who owes me|how much do i owe|how much am i owed)(?: in groups)?$"),
+        _answer_group_balance),
+    ('upcoming_reminders', re.compile(
+        r"^(?:what are )?(?:my )?(?:upcoming|next) (?:bills|reminders|bill reminders|payments)$|^(?:any|do i have any) (?:upcoming )?(?:bills|reminders)(?: due)?$"),
+        _answer_upcoming_reminders),
+]
+
+
+def match_intent(message: str) -> Optional[tuple]:
+    """
+    Match a chat message against the intent catalogue.
+
+    Returns:
+        (intent_name, handler, params) for a recognised question, else None.
+    """
+    text = _normalize(message or '')
+    if not text or len(text) > 120:
+        return None
+
+    for name, pattern, handler in INTENT_CATALOGUE:
+        match = pattern.match(text)
+        if not match:
+            continue
+        params = {k: v for k, v in match.groupdict().items() if v}
+        if 'period' in params:
+            params['period'] = _PERIOD_WORDS[params['period']]
+        return name, handler, params
+    return None
+
+
+def answer_fast_path(message: str, user_id: int, db_session) -> Optional[tuple]:
+    """
+    Answer a recognised question directly from aggregate queries.
+
+    Args:
+        message: The raw user message
+        user_id: The user's database ID
+        db_session: SQLAlchemy session (db.session)
+
+    Returns:
+        (intent_name, markdown_reply) or None if the message should go to the LLM.
+    """
+    matched = match_intent(message)
+    if not matched:
+        return None
+
+    name, handler, params = matched
+    try:
+        if name == 'category_spend':
+            # Only answer for categories the user actually has; anything else
+            # ("how much did I spend on my birthday trip") is left to the LLM.
+            category = _resolve_category(user_id, db_session, params.get('category', ''))
+            if not category:
+                return None
+            params['category'] = category
+        return name, handler(user_id, db_session, params)
+    except Exception as e:
+        # Never block the chatbot on a fast-path failure; a failed query
+        # leaves the transaction aborted (Postgres) for the LLM path's queries
+        db_session.rollback()
+        print(f"Chat fast-path error ({name}): {e}")
+        return None
+
+
+def _resolve_category(user_id: int, db_session, raw: str) -> Optional[str]:
+    from routes.database import Expense
+
+    wanted = raw.strip().lower()
+    if not wanted:
+        return None
+    categories = db_session.query(Expense.category).filter(
+        Expense.user_id == user_id, Expense.category.isnot(None)
+    ).distinct().all()
+    for (category,) in categories:
+        lowered = category.lower()
+        if lowered == wanted or lowered.rstrip('s') == wanted.rstrip('s'):
+            return category
+    return None
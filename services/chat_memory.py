@@ -0,0 +1,165 @@
+"""
+Chat Memory Service - token-budgeted conversation history for the chatbot.
+
+Keeps the last few turns verbatim and folds anything older into a rolling
+extractive summary, so the system prompt plus history always fits a fixed
+token budget. Tokens are estimated locally; no tokenizer download or API
+call is needed on the request path.
+"""
+
+import math
+import re
+from typing import List, Optional
+
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """
+    Estimate the number of LLM tokens in a string.
+
+    BPE vocabularies average about four characters per English token; digits
+    and non-ASCII characters (Bangla, emoji) tokenize much less efficiently,
+    so they are counted more conservatively. Errs on the high side.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece.isascii() and piece.isalpha():
+            tokens += max(1, math.ceil(len(piece) / 4))
+        elif piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isascii():
+            tokens += 1
+        else:
+            tokens += 2
+    return tokens
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = re.sub(r"[*`#>_]+", '', text or '')
+    text = re.sub(r"\s+", ' ', text).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    if len(sentence) > limit:
+        sentence = sentence[:limit - 1].rstrip() + '…'
+    return sentence
+
+
+def _fold_into_summary(summary: Optional[str], turns: list, max_tokens: int) -> str:
+    """Append one line per folded turn and drop the oldest lines to stay in budget."""
+    lines = [line for line in (summary or '').split('\n') if line.strip()]
+    for user_text, assistant_text in turns:
+        line = f"- User asked: {_first_sentence(user_text, 120)}"
+        if assistant_text:
+            line += f" | You answered: {_first_sentence(assistant_text, 160)}"
+        lines.append(line)
+
+    while lines and count_tokens('\n'.join(lines)) > max_tokens:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def record_turn(user_id: int, db_session, user_text: str, assistant_text: str, *,
+                keep_turns: int = 4, summary_tokens: int = 400) -> None:
+    """
+    Store a completed exchange and fold turns beyond `keep_turns` into the summary.
+
+    Folded rows are deleted once they are in the summary, so storage per user
+    stays bounded at `keep_turns` exchanges plus one summary row.
+    """
+    from routes.database import ChatMessage, ChatMemory
+
+    db_session.add(ChatMessage(user_id=user_id, role='user', content=user_text,
+                               token_count=count_tokens(user_text)))
+    db_session.add(ChatMessage(user_id=user_id, role='assistant', content=assistant_text,
+                               token_count=count_tokens(assistant_text)))
+    db_session.flush()
+
+    rows = db_session.query(ChatMessage).filter(
+        ChatMessage.user_id == user_id
+    ).order_by(ChatMessage.id).all()
+
+    excess = len(rows) - keep_turns * 2
+    if excess > 0:
+        folded = rows[:excess]
+        turns = []
+        pending_user = None
+        for row in folded:
+            if row.role == 'user':
+                if pending_user is not None:
+                    turns.append((pending_user, ''))
+                pending_user = row.content
+            else:
+                turns.append((pending_user or '', row.content))
+                pending_user = None
+        if pending_user is not None:
+            turns.append((pending_user, ''))
+
+        memory = db_session.query(ChatMemory).filter_by(user_id=user_id).first()
+        if not memory:
+            memory = ChatMemory(user_id=user_id)
+            db_session.add(memory)
+        memory.summary = _fold_into_summary(memory.summary, turns, summary_tokens)
+        memory.summary_tokens = count_tokens(memory.summary)
+
+        db_session.query(ChatMessage).filter(
+            ChatMessage.id.in_([row.id for row in folded])
+        ).delete(synchronize_session=False)
+
+    db_session.commit()
+
+
+def build_history(user_id: int, db_session, *, system_prompt: str, user_message: str,
+                  budget_tokens: int = 3000, reserve_tokens: int = 800) -> List[dict]:
+    """
+    Return prior conversation as chat messages that fit the token budget.
+
+    The budget covers the system prompt, the summary, the history and the new
+    user message, with `reserve_tokens` held back for the completion. Recent
+    turns are kept newest-first until the budget runs out; the summary is
+    included only if it still fits after the most recent exchange.
+    """
+    from routes.database import ChatMessage, ChatMemory
+
+    available = budget_tokens - reserve_tokens - count_tokens(system_prompt) - count_tokens(user_message)
+    if available <= 0:
+        return []
+
+    rows = db_session.query(ChatMessage).filter(
+        ChatMessage.user_id == user_id
+    ).order_by(ChatMessage.id.desc()).all()
+
+    history = []
+    used = 0
+    for row in rows:
+        # +4 per message for role/formatting overhead
+        cost = (row.token_count or count_tokens(row.content)) + 4
+        if used + cost > available:
+            break
+        history.append({'role': row.role, 'content': row.content})
+        used += cost
+    history.reverse()
+
+    # Never start the history with a dangling assistant message
+    if history and history[0]['role'] == 'assistant':
+        history.pop(0)
+
+    memory = db_session.query(ChatMemory).filter_by(user_id=user_id).first()
+    if memory and memory.summary and used + memory.summary_tokens + 12 <= available:
+        history.insert(0, {
+            'role': 'system',
+            'content': f"Summary of earlier conversation:\n{memory.summary}"
+        })
+    return history
+
+
+def clear_history(user_id: int, db_session) -> None:
+    """Forget the stored conversation and summary for a user."""
+    from routes.database import ChatMessage, ChatMemory
+
+    db_session.query(ChatMessage).filter(ChatMessage.user_id == user_id).delete()
+    db_session.query(ChatMemory).filter(ChatMemory.user_id == user_id).delete()
+    db_session.commit()
@@ -0,0 +1,315 @@
+"""
+Chat Retrieval Service - in-process search over a user's expense history.
+
+Each user gets a small hashed n-gram index (word unigrams plus character
+trigrams). The chatbot retrieves the top-k expenses that match a question
+("when did I last pay for internet") and injects only those rows into the
+prompt. There is no external vector database.
+
+Documents are stored sparsely: each row keeps only its non-zero
+bucket -> weight pairs, and an inverted list per bucket points back at the
+rows, so a query only touches rows sharing a bucket with it and IDF is
+computed for the query's buckets alone. Total indexed rows across all users
+are capped (least recently used users are dropped first).
+
+Indexes are stamped with `User.expense_index_version`, which every expense
+write bumps in its transaction. A worker rebuilds a user's index when the
+stamp no longer matches the (already loaded) user row, so writes made on
+other workers are never missed.
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+DIMENSIONS = 2 ** 12
+MAX_INDEXED_ROWS = int(os.environ.get('CHATBOT_RETRIEVAL_MAX_ROWS', '100000'))
+MIN_SCORE = 0.12
+
+_WORD_RE = re.compile(r"[a-z0-9ঀ-৿]+")
+_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'for', 'to', 'of', 'on', 'in', 'at', 'my', 'me', 'i',
+    'did', 'do', 'does', 'when', 'what', 'how', 'much', 'many', 'last', 'time', 'was',
+    'is', 'are', 'pay', 'paid', 'spend', 'spent', 'buy', 'bought', 'have', 'has', 'it',
+    'this', 'that', 'with', 'about', 'any', 'show', 'find', 'tell', 'you', 'can', 'please',
+}
+
+
+def _features(text: str) -> List[int]:
+    """Hash words and character trigrams of `text` into feature buckets."""
+    buckets = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        if word in _STOPWORDS:
+            continue
+        buckets.append(zlib.crc32(b'w:' + word.encode('utf-8')) % DIMENSIONS)
+        padded = f"^{word}$"
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3].encode('utf-8')
+            buckets.append(zlib.crc32(b'c:' + gram) % DIMENSIONS)
+    return buckets
+
+
+def _vector(text: str) -> Dict[int, float]:
+    """Sparse bucket -> weight; sublinear term frequency so repeated words do not dominate."""
+    counts = {}
+    for bucket in _features(text):
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return {bucket: math.log1p(count) for bucket, count in counts.items()}
+
+
+def _document_text(name, category, description) -> str:
+    return ' '.join(part for part in (name, name, category, description) if part)
+
+
+class ExpenseIndex:
+    """Sparse hashed TF-IDF index over one user's expenses."""
+
+    def __init__(self, version: int = 0):
+        self.lock = threading.Lock()
+        self.version = version
+        self.doc_freq = {}   # bucket -> number of live rows containing it
+        self.postings = {}   # bucket -> (array of row numbers, array of weights)
+        self.row_terms = []  # row number -> (buckets, weights), or None if dead
+        self.rows = {}       # expense_id -> row number
+        self.meta = []       # row number -> display tuple, or None if dead
+        self.live = 0
+
+    @property
+    def size(self) -> int:
+        """Rows held in memory, including dead ones awaiting compaction."""
+        return len(self.meta)
+
+    def _kill(self, row: int):
+        buckets, _ = self.row_terms[row]
+        for bucket in buckets:
+            self.doc_freq[bucket] -= 1
+        self.row_terms[row] = None
+        self.meta[row] = None
+        self.live -= 1
+
+    def _compact(self):
+        """Rebuild postings without dead rows once they outnumber live ones."""
+        terms, meta = self.row_terms, self.meta
+        self.postings, self.row_terms, self.meta, self.rows = {}, [], [], {}
+        for row_terms, row_meta in zip(terms, meta):
+            if row_meta is not None:
+                self._append(row_terms, row_meta)
+
+    def _append(self, row_terms, row_meta):
+        row = len(self.meta)
+        for bucket, weight in zip(*row_terms):
+            rows, weights = self.postings.setdefault(bucket, (array('i'), array('f')))
+            rows.append(row)
+            weights.append(weight)
+        self.row_terms.append(row_terms)
+        self.meta.append(row_meta)
+        self.rows[row_meta[0]] = row
+
+    def upsert(self, expense_id, name, category, description, amount, date):
+        vec = _vector(_document_text(name, category, description))
+        row_terms = (array('H', vec.keys()), array('f', vec.values()))
+        with self.lock:
+            row = self.rows.pop(expense_id, None)
+            if row is not None and self.meta[row] is not None:
+                # Updated rows are re-appended; the old postings are skipped as dead
+                self._kill(row)
+            self._append(row_terms, (expense_id, name, category, description, amount, date))
+            for bucket in vec:
+                self.doc_freq[bucket] = self.doc_freq.get(bucket, 0) + 1
+            self.live += 1
+            if self.size > 64 and self.size > 2 * self.live:
+                self._compact()
+
+    def remove(self, expense_id):
+        with self.lock:
+            row = self.rows.pop(expense_id, None)
+            if row is None or self.meta[row] is None:
+                return
+            self._kill(row)
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Return up to k best-matching (score, meta) pairs, newest expense first."""
+        qvec = _vector(query)
+        if not qvec:
+            return []
+        with self.lock:
+            if not self.live:
+                return []
+            live = self.live
+
+            def idf(bucket):
+                return math.log((1.0 + live) / (1.0 + self.doc_freq.get(bucket, 0))) + 1.0
+
+            # IDF for the query's buckets only; only rows sharing a bucket are scored
+            query_weights = {bucket: weight * idf(bucket) for bucket, weight in qvec.items()}
+            dots = {}
+            for bucket, q_weight in query_weights.items():
+                posting = self.postings.get(bucket)
+                if posting is None:
+                    continue
+                b_idf = idf(bucket)
+                for row, weight in zip(*posting):
+                    dots[row] = dots.get(row, 0.0) + weight * b_idf * q_weight
+            q_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+
+            hits = []
+            for row, dot in dots.items():
+                if self.meta[row] is None:
+                    continue
+                buckets, weights = self.row_terms[row]
+                d_norm = math.sqrt(sum((w * idf(b)) ** 2 for b, w in zip(buckets, weights)))
+                score = dot / ((d_norm * q_norm) or 1.0)
+                if score >= MIN_SCORE:
+                    hits.append((score, self.meta[row]))
+
+        # Chronological order reads better in a prompt ("when did I last...")
+        hits.sort(key=lambda h: -h[0])
+        hits = hits[:k]
+        hits.sort(key=lambda h: _sort_date(h[1][5]))
+        return hits
+
+
+def _sort_date(value):
+    return -value.toordinal() if value else math.inf
+
+
+_indexes = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def _build_index(user_id: int, db_session, version: int) -> ExpenseIndex:
+    from routes.database import Expense
+
+    index = ExpenseIndex(version)
+    # Newest first, so a huge history keeps its most recent rows under the cap
+    rows = db_session.query(
+        Expense.id, Expense.name, Expense.category, Expense.description, Expense.amount, Expense.date
+    ).filter(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.desc()).limit(
+        MAX_INDEXED_ROWS).all()
+    for row in rows:
+        index.upsert(*row)
+    return index
+
+
+def _enforce_row_cap(keep_user: Optional[int] = None) -> None:
+    """Drop least recently used indexes until the total row count fits MAX_INDEXED_ROWS."""
+    with _registry_lock:
+        total = sum(index.size for index in _indexes.values())
+        for user_id in list(_indexes):
+            if total <= MAX_INDEXED_ROWS:
+                break
+            if user_id == keep_user:
+                continue
+            total -= _indexes.pop(user_id).size
+
+
+def get_index(user_id: int, db_session, version: int) -> ExpenseIndex:
+    """The user's index for `version` (their User.expense_index_version), rebuilt if stale."""
+    version = version or 0
+    with _registry_lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user_id)
+            return index
+
+    index = _build_index(user_id, db_session, version)
+    with _registry_lock:
+        current = _indexes.get(user_id)
+        # Another request may have built the same or a newer version meanwhile
+        if current is not None and current.version >= version:
+            index = current
+        else:
+            _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+    _enforce_row_cap(keep_user=user_id)
+    return index
+
+
+def is_index_loaded(user_id: int, version: int) -> bool:
+    """True if the user's up-to-date index is already in memory (a retrieval cache hit)."""
+    index = _indexes.get(user_id)
+    return index is not None and index.version == (version or 0)
+
+
+def mark_changed(db_session, user_id: int) -> None:
+    """
+    Bump the user's expense index version in the current transaction; the caller commits.
+
+    Call this alongside any write to the user's expenses.
+    """
+    from routes.database import User
+
+    db_session.query(User).filter(User.id == user_id).update(
+        {User.expense_index_version: User.expense_index_version + 1}, synchronize_session=False)
+
+
+def _patchable(user_id: int, version: int) -> Optional[ExpenseIndex]:
+    """
+    The loaded index if it can be patched in place to `version`, else None.
+
+    Only a one-step bump (this worker's own write) is patched; anything
+    else means another write happened elsewhere, so the index is dropped
+    and rebuilt on next use.
+    """
+    index = _indexes.get(user_id)
+    if index is None:
+        return None
+    if index.version + 1 != (version or 0):
+        drop_user_index(user_id)
+        return None
+    index.version = version
+    return index
+
+
+def index_expense(expense, version: int) -> None:
+    """Add or refresh a committed expense in its owner's index, if that index is loaded."""
+    if expense is None:
+        return
+    index = _patchable(expense.user_id, version)
+    if index is not None:
+        index.upsert(expense.id, expense.name, expense.category, expense.description,
+                     expense.amount, expense.date)
+        _enforce_row_cap(keep_user=expense.user_id)
+
+
+def remove_expense(user_id: int, expense_id: int, version: int) -> None:
+    """Drop a deleted expense from its owner's index, if that index is loaded."""
+    index = _patchable(user_id, version)
+    if index is not None:
+        index.remove(expense_id)
+
+
+def drop_user_index(user_id: int) -> None:
+    """Forget a user's index entirely (e.g. after bulk deletes)."""
+    with _registry_lock:
+        _indexes.pop(user_id, None)
+
+
+def retrieve_relevant_expenses(user_id: int, db_session, question: str, *, version: int, k: int = 5) -> str:
+    """
+    Format the expenses most relevant to `question` for prompt injection.
+
+    `version` is the user's current expense_index_version.
+
+    Returns:
+        A short bullet list, or "" when nothing matches.
+    """
+    try:
+        hits = get_index(user_id, db_session, version).search(question, k=k)
+    except Exception as e:
+        print(f"Expense retrieval failed: {e}")
+        return ""
+
+    lines = []
+    for _, (_, name, category, description, amount, date) in hits:
+        line = f"- {date.isoformat() if date else 'no date'} · {name} · {category or 'Other'} · ৳{(amount or 0):,.0f}"
+        if description:
+            line += f" · {description[:60]}"
+        lines.append(line)
+    return "\n".join(lines)
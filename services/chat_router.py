@@ -0,0 +1,247 @@
+"""
+Chat Router Service - per-request model selection with latency budgets.
+
+Short factual questions go to a small fast model and open-ended planning
+questions to a larger one. Each model sits behind a circuit breaker; a call
+that has not answered by the hedge deadline is raced against the next model
+in the fallback chain, and the first success wins. A partial outage of one
+model therefore degrades latency a little instead of failing the request.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Optional
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open (cooldown) -> half-open (one trial)."""
+
+    def __init__(self, failure_threshold: int = 3, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> Optional[str]:
+        """Return 'closed' or 'trial' if a call may proceed, else None."""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return 'closed'
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return 'trial'
+            return None
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                # A failed half-open trial re-opens for another cooldown
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a half-open trial slot that was never used (e.g. cancelled hedge)."""
+        with self.lock:
+            self.trial_in_flight = False
+
+
+_COMPLEX_RE = re.compile(
+    r"\b(plan|planning|budget(?:ing)?|strategy|strateg(?:ies|ize)|compare|comparison|why|explain|"
+    r"analy[sz]e|analysis|advice|advise|should i|how can i|how do i|suggest|recommend|improve|"
+    r"save more|forecast|predict|trend|goal|step by step)\b")
+
+
+def classify_complexity(message: str) -> str:
+    """Return 'simple' for short factual questions and 'complex' for open-ended ones."""
+    text = (message or '').lower()
+    words = len(text.split())
+    if words > 25 or text.count('?') > 1 or _COMPLEX_RE.search(text):
+        return 'complex'
+    return 'simple'
+
+
+class ModelRouter:
+    """Choose a model chain per request and run calls with hedging and fallback."""
+
+    def __init__(self, fast_model: str, large_model: str, fallback_models: Optional[List[str]] = None, *,
+                 latency_budget_ms: int = 12000, hedge_after_ms: int = 3000, max_workers: int = 16,
+                 failure_threshold: int = 3, reset_after: float = 30.0):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.fallback_models = [m for m in (fallback_models or []) if m]
+        self.latency_budget = latency_budget_ms / 1000
+        self.hedge_after = hedge_after_ms / 1000 if hedge_after_ms else None
+        self.breakers = {}
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_model: str) -> 'ModelRouter':
+        fallbacks = os.environ.get('GROQ_FALLBACK_MODELS', 'llama-3.1-8b-instant')
+        return cls(
+            fast_model=os.environ.get('GROQ_FAST_MODEL', 'llama-3.1-8b-instant'),
+            large_model=os.environ.get('GROQ_LARGE_MODEL', default_model),
+            fallback_models=[m.strip() for m in fallbacks.split(',')],
+            latency_budget_ms=int(os.environ.get('CHATBOT_LATENCY_BUDGET_MS', '12000')),
+            hedge_after_ms=int(os.environ.get('CHATBOT_HEDGE_AFTER_MS', '3000')),
+        )
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self.lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return self.breakers[model]
+
+    def plan(self, message: str) -> List[str]:
+        """Ordered, de-duplicated model chain for a message."""
+        if classify_complexity(message) == 'simple':
+            chain = [self.fast_model, self.large_model]
+        else:
+            chain = [self.large_model, self.fast_model]
+        seen = []
+        for model in chain + self.fallback_models:
+            if model and model not in seen:
+                seen.append(model)
+        return seen
+
+    def run(self, call: Callable, models: List[str], trace: Optional[dict] = None):
+        """
+        Run `call(model, cancelled_event)` across the chain and return the first success.
+
+        The first allowed model starts immediately. If it has not finished after
+        the hedge delay, the next model is started alongside it; a failure
+        starts the next model at once. Losing attempts are signalled through
+        their cancel event. Raises the last error, or TimeoutError when the
+        latency budget runs out.
+        """
+        queue = []
+        trials = set()
+        for model in models:
+            permit = self.breaker(model).allow()
+            if permit:
+                queue.append(model)
+            if permit == 'trial':
+                trials.add(model)
+        if not queue:
+            # Every breaker is open: try the chain anyway rather than fail outright
+            queue = list(models)
+
+        def release_unused(models_left):
+            for model in models_left:
+                if model in trials:
+                    self.breaker(model).release()
+
+        deadline = time.monotonic() + self.latency_budget
+        pending = {}
+        errors = []
+
+        def launch():
+            model = queue.pop(0)
+            cancelled = threading.Event()
+            started = threading.Event()
+
+            def attempt():
+                # Attempts queued behind busy workers may already be lost
+                if cancelled.is_set():
+                    raise TimeoutError(f'{model} attempt cancelled before it started')
+                started.set()
+                return call(model, cancelled)
+
+            future = self.executor.submit(attempt)
+            pending[future] = (model, cancelled, started)
+            return time.monotonic()
+
+        def abandon():
+            """Cancel every pending attempt; only ones that actually ran count as failures."""
+            for future, (model, event, started) in pending.items():
+                event.set()
+                if future.cancel() or not started.is_set():
+                    if model in trials:
+                        self.breaker(model).release()
+                else:
+                    self.breaker(model).record_failure()
+
+        last_launch = launch()
+        while pending:
+            now = time.monotonic()
+            timeout = deadline - now
+            if queue and self.hedge_after is not None:
+                timeout = min(timeout, last_launch + self.hedge_after - now)
+            done, _ = wait(list(pending), timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model, _, started = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if started.is_set():
+                        self.breaker(model).record_failure()
+                    elif model in trials:
+                        self.breaker(model).release()
+                    errors.append(e)
+                    if trace is not None:
+                        trace.setdefault('errors', []).append(type(e).__name__)
+                        trace['fallbacks'] = trace.get('fallbacks', 0) + 1
+                    if queue and not pending:
+                        last_launch = launch()
+                    continue
+
+                self.breaker(model).record_success()
+                for other, (_, event, _) in pending.items():
+                    event.set()
+                    other.cancel()
+                release_unused([m for m, _, _ in pending.values()] + queue)
+                if trace is not None:
+                    trace['model'] = model
+                return result
+
+            if done:
+                continue
+            if time.monotonic() >= deadline:
+                abandon()
+                release_unused(queue)
+                raise TimeoutError(f'LLM latency budget of {self.latency_budget:.1f}s exceeded')
+            if queue:
+                # Hedge: race the next model against the slow one
+                if trace is not None:
+                    trace['hedged'] = trace.get('hedged', 0) + 1
+                last_launch = launch()
+
+        if errors:
+            raise errors[-1]
+        raise RuntimeError('No model available')
+
+    def status(self) -> dict:
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {
+            'fast_model': self.fast_model,
+            'large_model': self.large_model,
+            'fallback_models': self.fallback_models,
+            'latency_budget_ms': int(self.latency_budget * 1000),
+            'hedge_after_ms': int(self.hedge_after * 1000) if self.hedge_after else None,
+            'breakers': {model: {'state': b.state, 'failures': b.failures} for model, b in breakers.items()},
+        }
@@ -0,0 +1,155 @@
+"""
+Chat Telemetry Service - per-request latency, token and failure metrics.
+
+Every chatbot request gets a trace dict that records how long each phase
+took (fast path, retrieval, history, snapshot, DB stats, LLM), token usage,
+time-to-first-token, cache hits and the error class if it failed. Finished
+traces go to an in-memory ring buffer (for the metrics endpoint) and to a
+rotating JSON-lines log file for offline analysis.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+
+RECENT_TRACES = 1000
+
+_recent = deque(maxlen=RECENT_TRACES)
+_lock = threading.Lock()
+_totals = Counter()
+_errors = Counter()
+_started_at = datetime.now(timezone.utc)
+_logger = None
+
+
+def _get_logger():
+    """Lazily create the rotating metrics log (path from CHATBOT_METRICS_LOG)."""
+    global _logger
+    if _logger is not None:
+        return _logger
+
+    logger = logging.getLogger('finbuddy.chat_metrics')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    path = os.environ.get('CHATBOT_METRICS_LOG', os.path.join('logs', 'chatbot_metrics.log'))
+    if path and not logger.handlers:
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+        except OSError as e:
+            # Read-only filesystems (e.g. serverless) keep in-memory metrics only
+            print(f"Chat metrics log disabled: {e}")
+    _logger = logger
+    return logger
+
+
+def start_trace() -> dict:
+    """Begin timing a chatbot request."""
+    return {
+        'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        '_t0': time.perf_counter(),
+        'path': None,
+        'cache_hits': [],
+        'llm_calls': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+    }
+
+
+@contextmanager
+def phase(trace: dict, name: str):
+    """Accumulate wall time of a block into trace['<name>_ms']."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f'{name}_ms'
+        trace[key] = round(trace.get(key, 0) + (time.perf_counter() - t0) * 1000, 1)
+
+
+def record_usage(trace: dict, usage) -> None:
+    """Add provider-reported token usage (OpenAI/Groq `usage` object) to the trace."""
+    if usage is None:
+        return
+    trace['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+    trace['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+
+
+def record_error(trace: dict, error: Exception) -> None:
+    trace.setdefault('errors', []).append(type(error).__name__)
+
+
+def finish_trace(trace: dict, path: str) -> dict:
+    """Close a trace, add it to the rolling window and the metrics log."""
+    trace['path'] = path
+    trace['total_ms'] = round((time.perf_counter() - trace.pop('_t0')) * 1000, 1)
+
+    with _lock:
+        _recent.append(trace)
+        _totals['requests'] += 1
+        _totals[f'path:{path}'] += 1
+        for hit in trace['cache_hits']:
+            _totals[f'cache_hit:{hit}'] += 1
+        for name in trace.get('errors', []):
+            _errors[name] += 1
+
+    try:
+        _get_logger().info(json.dumps(trace, default=str))
+    except Exception:
+        pass
+    return trace
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def metrics_summary() -> dict:
+    """Aggregate the rolling window into latency percentiles, token counts and error rates."""
+    with _lock:
+        traces = list(_recent)
+        totals = dict(_totals)
+        errors = dict(_errors)
+
+    def stats(key):
+        values = [t[key] for t in traces if t.get(key) is not None]
+        if not values:
+            return None
+        return {
+            'count': len(values),
+            'avg': round(sum(values) / len(values), 1),
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'max': max(values),
+        }
+
+    paths = Counter(t['path'] for t in traces)
+    return {
+        'since': _started_at.isoformat(timespec='seconds'),
+        'window': len(traces),
+        'totals': totals,
+        'errors_by_class': errors,
+        'paths': dict(paths),
+        'latency_ms': {
+            key: stats(f'{key}_ms')
+            for key in ('total', 'fast_path', 'retrieval', 'history', 'snapshot', 'db', 'llm', 'ttft')
+        },
+        'tokens': {
+            'prompt': stats('prompt_tokens'),
+            'completion': stats('completion_tokens'),
+            'prompt_estimate': stats('prompt_estimate'),
+        },
+    }
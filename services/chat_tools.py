@@ -0,0 +1,255 @@
+"""
+Chat Tools Service - read-only query tools for function-calling chat.
+
+Instead of pasting a fixed snapshot into every system prompt, the chatbot
+exposes these tools to the model and runs only the queries a question needs.
+Every tool is scoped to the current user and backed by an indexed aggregate
+query, so older data is reachable without growing the prompt.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone, date
+from typing import Optional
+
+from sqlalchemy import func
+
+
+TOOL_SPECS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_spending",
+            "description": "Total personal spending between two dates, broken down by category. "
+                           "Use for any question about how much the user spent.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {"type": "string", "description": "Inclusive start date, YYYY-MM-DD"},
+                    "end_date": {"type": "string", "description": "Inclusive end date, YYYY-MM-DD"},
+                    "category": {"type": "string", "description": "Optional category filter, e.g. Food"}
+                },
+                "required": ["start_date", "end_date"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_group_balances",
+            "description": "Per-group totals, what the user paid, their fair share and net balance.",
+            "parameters": {"type": "object", "properties": {}}
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_tuition_progress",
+            "description": "Tuition students with completed/total classes, remaining classes and amount.",
+            "parameters": {"type": "object", "properties": {}}
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_upcoming_reminders",
+            "description": "Unsent bill/payment reminders due within the next N days.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "days_ahead": {"type": "integer", "description": "Look-ahead window in days (default 30)"}
+                }
+            }
+        }
+    },
+]
+
+
+def _parse_date(value, default: date) -> date:
+    if not value:
+        return default
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return default
+
+
+def get_spending(user_id: int, db_session, start_date=None, end_date=None, category=None) -> dict:
+    from routes.database import Expense
+
+    today = datetime.now(timezone.utc).date()
+    end = _parse_date(end_date, today)
+    start = _parse_date(start_date, end - timedelta(days=30))
+    if start > end:
+        start, end = end, start
+
+    filters = [Expense.user_id == user_id, Expense.date >= start, Expense.date <= end]
+    if category:
+        filters.append(func.lower(Expense.category) == str(category).lower())
+
+    category_col = func.coalesce(Expense.category, 'Other')
+    rows = db_session.query(
+        category_col.label('category'),
+        func.sum(Expense.amount).label('total'),
+        func.count(Expense.id).label('count')
+    ).filter(*filters).group_by(category_col).order_by(func.sum(Expense.amount).desc()).all()
+
+    return {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'total': round(sum(r.total or 0 for r in rows), 2),
+        'transactions': sum(r.count for r in rows),
+        'by_category': [
+            {'category': r.category, 'total': round(r.total or 0, 2), 'count': r.count}
+            for r in rows
+        ],
+    }
+
+
+def get_group_balances(user_id: int, db_session) -> dict:
+    from routes.database import Group, GroupMember, GroupExpense
+
+    group_ids = [gid for (gid,) in db_session.query(GroupMember.group_id).filter(
+        GroupMember.user_id == user_id).all()]
+    if not group_ids:
+        return {'groups': []}
+
+    names = dict(db_session.query(Group.id, Group.name).filter(Group.id.in_(group_ids)).all())
+    member_counts = dict(db_session.query(
+        GroupMember.group_id, func.count(GroupMember.id)
+    ).filter(GroupMember.group_id.in_(group_ids)).group_by(GroupMember.group_id).all())
+    totals = dict(db_session.query(
+        GroupExpense.group_id, func.sum(GroupExpense.amount)
+    ).filter(GroupExpense.group_id.in_(group_ids)).group_by(GroupExpense.group_id).all())
+    paid = dict(db_session.query(
+        GroupExpense.group_id, func.sum(GroupExpense.amount)
+    ).filter(
+        GroupExpense.group_id.in_(group_ids), GroupExpense.paid_by == user_id
+    ).group_by(GroupExpense.group_id).all())
+
+    groups = []
+    for gid in group_ids:
+        total = totals.get(gid) or 0
+        members = member_counts.get(gid) or 1
+        fair_share = total / members
+        user_paid = paid.get(gid) or 0
+        groups.append({
+            'group': names.get(gid, f'Group {gid}'),
+            'members': members,
+            'total_expense': round(total, 2),
+            'you_paid': round(user_paid, 2),
+            'fair_share': round(fair_share, 2),
+            'balance': round(user_paid - fair_share, 2),
+        })
+    return {'groups': groups}
+
+
+def get_tuition_progress(user_id: int, db_session) -> dict:
+    from routes.database import TuitionRecord
+
+    rows = db_session.query(
+        TuitionRecord.student_name,
+        TuitionRecord.total_days,
+        TuitionRecord.total_completed,
+        TuitionRecord.amount,
+        TuitionRecord.tuition_time
+    ).filter(TuitionRecord.user_id == user_id).order_by(TuitionRecord.student_name).all()
+
+    return {
+        'students': [
+            {
+                'student': r.student_name,
+                'completed': r.total_completed,
+                'total': r.total_days,
+                'remaining': max((r.total_days or 0) - (r.total_completed or 0), 0),
+                'amount': r.amount,
+                'time': r.tuition_time,
+            }
+            for r in rows
+        ],
+        'total_amount': round(sum((r.amount or 0) for r in rows), 2),
+    }
+
+
+def get_upcoming_reminders(user_id: int, db_session, days_ahead=30) -> dict:
+    from routes.database import Expense
+
+    try:
+        days_ahead = max(1, min(int(days_ahead or 30), 366))
+    except (TypeError, ValueError):
+        days_ahead = 30
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db_session.query(
+        Expense.name, Expense.amount, Expense.category, Expense.reminder_at, Expense.reminder_note
+    ).filter(
+        Expense.user_id == user_id,
+        Expense.reminder_sent == False,
+        Expense.reminder_at >= now,
+        Expense.reminder_at <= now + timedelta(days=days_ahead)
+    ).order_by(Expense.reminder_at).limit(20).all()
+
+    return {
+        'reminders': [
+            {
+                'name': r.name,
+                'amount': r.amount,
+                'category': r.category,
+                'due': r.reminder_at.strftime('%Y-%m-%d %H:%M'),
+                'note': r.reminder_note,
+            }
+            for r in rows
+        ]
+    }
+
+
+TOOL_HANDLERS = {
+    'get_spending': get_spending,
+    'get_group_balances': get_group_balances,
+    'get_tuition_progress': get_tuition_progress,
+    'get_upcoming_reminders': get_upcoming_reminders,
+}
+
+
+def run_tool(name: str, arguments: Optional[str], user_id: int, db_session) -> str:
+    """
+    Execute a tool call requested by the model.
+
+    Args:
+        name: Tool name from TOOL_SPECS
+        arguments: JSON-encoded arguments from the model (may be empty)
+        user_id: The current user's ID; tools never see other users' data
+        db_session: SQLAlchemy session (db.session)
+
+    Returns:
+        JSON string with the tool result, or an {"error": ...} object.
+    """
+    handler = TOOL_HANDLERS.get(name)
+    if not handler:
+        return json.dumps({'error': f'unknown tool {name}'})
+
+    try:
+        kwargs = json.loads(arguments) if arguments else {}
+        if not isinstance(kwargs, dict):
+            kwargs = {}
+    except ValueError:
+        kwargs = {}
+
+    # Only pass through parameters the tool declares
+    spec = next(t['function'] for t in TOOL_SPECS if t['function']['name'] == name)
+    allowed = spec['parameters'].get('properties', {})
+    kwargs = {k: v for k, v in kwargs.items() if k in allowed}
+
+    try:
+        return json.dumps(handler(user_id, db_session, **kwargs), default=str)
+    except Exception as e:
+        return json.dumps({'error': str(e)[:100]})
+
+
+def build_tool_system_prompt(display_name: str, profession: str, institution: str) -> str:
+    """Compact system prompt for tool mode; data is fetched through tools."""
+    today = datetime.now(timezone.utc).date()
+    return f"""You are FinBuddy, a warm, concise personal finance assistant for a student expense tracker.
+User: {display_name} ({profession}, {institution}). Today is {today.isoformat()} ({today.strftime('%A')}).
+
+Use the tools to look up the user's data before answering questions about their money, groups, tuition or reminders.
+Never guess numbers; if a tool returns nothing, say so briefly. Amounts are in Taka (৳).
+Answer finance/app questions only. Use Markdown, **bold** key amounts, at most one emoji, under 150 words."""
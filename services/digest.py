@@ -0,0 +1,133 @@
+"""
+Digest Service - per-user daily notification digests.
+
+Users in 'digest' mode don't get one email per reminder. Their payment
+reminders are queued in `notification_queue` until the daily window
+closes (NOTIFICATION_DIGEST_HOUR, UTC), then
+`flush_digests` sends each user a single summary email. Delivery reuses the
+pooled mailer and the whole flush is one SELECT and one bulk UPDATE.
+Tuition class reminders are time-critical and always go out immediately.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from flask_mail import Message
+
+from services.email_render import render_batch
+from services.mailer import send_batch
+
+
+IMMEDIATE = 'immediate'
+DIGEST = 'digest'
+MODES = (IMMEDIATE, DIGEST)
+
+# Kinds without a label get a section titled after the kind
+KIND_LABELS = OrderedDict([
+    ('reminder', '💰 Payment reminders'),
+])
+
+
+def digest_hour() -> int:
+    return int(os.environ.get('NOTIFICATION_DIGEST_HOUR', '18'))
+
+
+def window_close(now: Optional[datetime] = None, hour: Optional[int] = None) -> datetime:
+    """Next digest send time (naive UTC) at or after `now`."""
+    now = now or datetime.utcnow()
+    hour = digest_hour() if hour is None else hour
+    close = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if close < now:
+        close += timedelta(days=1)
+    return close
+
+
+def enqueue(db_session, items: Iterable[dict], *, now: Optional[datetime] = None) -> int:
+    """
+    Queue notifications for digest delivery; the caller commits.
+
+    Each item needs user_id, kind and title, and may carry body and due_at.
+    """
+    from routes.database import NotificationQueue
+
+    deliver_after = window_close(now)
+    rows = [
+        NotificationQueue(user_id=item['user_id'], kind=item['kind'], title=item['title'][:200],
+                          body=item.get('body'), due_at=item.get('due_at'), deliver_after=deliver_after)
+        for item in items
+    ]
+    db_session.add_all(rows)
+    return len(rows)
+
+
+def flush_digests(app, mail, *, now: Optional[datetime] = None,
+                  chunk_size: int = 50, workers: int = 4) -> dict:
+    """Send every closed digest window as one email per user; returns counts."""
+    from routes.database import db, NotificationQueue, User, Profile
+
+    with app.app_context():
+        now = now or datetime.utcnow()
+        rows = db.session.query(
+            NotificationQueue.id, NotificationQueue.user_id, NotificationQueue.kind,
+            NotificationQueue.title, NotificationQueue.body, NotificationQueue.due_at,
+            User.username, Profile.profile_name, Profile.email
+        ).join(User, User.id == NotificationQueue.user_id
+        ).outerjoin(Profile, Profile.user_id == NotificationQueue.user_id
+        ).filter(
+            NotificationQueue.sent_at.is_(None),
+            NotificationQueue.deliver_after <= now
+        ).order_by(NotificationQueue.user_id, NotificationQueue.due_at, NotificationQueue.id).all()
+        if not rows:
+            return {'users': 0, 'items': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+
+        by_user = OrderedDict()
+        for row in rows:
+            by_user.setdefault(row.user_id, []).append(row)
+
+        # Users without an email can never receive the digest; drop their items
+        dropped = [row.id for items in by_user.values() if not items[0].email for row in items]
+        users = [user_id for user_id, items in by_user.items() if items[0].email]
+
+        contexts = []
+        for user_id in users:
+            items = by_user[user_id]
+            sections = [
+                {'label': label, 'items': [row for row in items if row.kind == kind]}
+                for kind, label in KIND_LABELS.items()
+            ]
+            sections += [{'label': kind.title(), 'items': [row for row in items if row.kind == kind]}
+                         for kind in sorted({row.kind for row in items} - set(KIND_LABELS))]
+            contexts.append({
+                'display_name': items[0].profile_name or items[0].username,
+                'date': now.date(),
+                'count': len(items),
+                'sections': [section for section in sections if section['items']],
+            })
+        bodies = render_batch('email_digest.html', contexts)
+        messages = [
+            (user_id, Message(subject=f"FinBuddy daily digest: {context['count']} update"
+                                      f"{'s' if context['count'] != 1 else ''}",
+                              recipients=[by_user[user_id][0].email], html=html))
+            for user_id, context, html in zip(users, contexts, bodies)
+        ]
+        db.session.close()
+
+    sent, failed = send_batch(app, mail, messages, chunk_size=chunk_size, workers=workers)
+
+    done_ids = dropped + [row.id for user_id in sent for row in by_user[user_id]]
+    if done_ids:
+        with app.app_context():
+            try:
+                for i in range(0, len(done_ids), 500):
+                    db.session.query(NotificationQueue).filter(
+                        NotificationQueue.id.in_(done_ids[i:i + 500])
+                    ).update({NotificationQueue.sent_at: now}, synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error marking digests sent: {e}")
+
+    return {'users': len(users), 'items': len(rows), 'sent': len(sent),
+            'failed': len(failed), 'dropped': len(dropped)}
@@ -0,0 +1,134 @@
+"""
+Email Render Service - compiled, cached Jinja templates for outgoing mail.
+
+Email templates under templates/email_*.html are loaded once into a shared
+Jinja environment with autoescaping on. Any <style> block is inlined into
+the elements' style attributes when the template is loaded (mail clients
+ignore most <style> rules), so each message only pays for rendering.
+`render_batch` renders many contexts against one compiled template.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+
+_STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+_RULE_RE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_SIMPLE_SELECTOR_RE = re.compile(r'^([a-z][a-z0-9]*)?(?:\.([\w-]+))?(?:#([\w-]+))?$', re.I)
+_OPEN_TAG_RE = re.compile(r'<([a-z][a-z0-9]*)(\s[^<>]*?)?(/?)>', re.I)
+_ATTR_RE = r'\b{}\s*=\s*"([^"]*)"'
+
+
+def _parse_rules(css: str):
+    """Split CSS into inlinable (tag, class, id, declarations) rules and leftover CSS."""
+    rules, leftover = [], []
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    if '@' in css:
+        # @media and friends can't be inlined; keep the whole block
+        return [], css
+    for selectors, body in _RULE_RE.findall(css):
+        declarations = ';'.join(d.strip() for d in body.split(';') if d.strip())
+        for selector in selectors.split(','):
+            match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+            if match and any(match.groups()):
+                tag, cls, id_ = match.groups()
+                rules.append(((tag or '').lower(), cls, id_, declarations))
+            else:
+                leftover.append(f"{selector.strip()} {{{body}}}")
+    return rules, '\n'.join(leftover)
+
+
+def _specificity(rule) -> tuple:
+    tag, cls, id_, _ = rule
+    return (bool(id_), bool(cls), bool(tag))
+
+
+def inline_css(html: str) -> str:
+    """Move simple <style> rules (tag, .class, tag.class, #id) into style attributes."""
+    blocks = _STYLE_BLOCK_RE.findall(html)
+    if not blocks:
+        return html
+
+    rules, leftovers = [], []
+    for block in blocks:
+        block_rules, leftover = _parse_rules(block)
+        rules.extend(block_rules)
+        if leftover.strip():
+            leftovers.append(leftover)
+    # Later and more specific rules win, inline styles win over everything
+    rules = sorted(enumerate(rules), key=lambda item: (_specificity(item[1]), item[0]))
+
+    def replace_style(match):
+        return f"<style>{leftovers.pop(0)}</style>" if leftovers else ''
+
+    html = _STYLE_BLOCK_RE.sub(replace_style, html)
+
+    def inline(match):
+        tag, attrs, self_closing = match.group(1), match.group(2) or '', match.group(3)
+        if tag.lower() in ('html', 'head', 'meta', 'title', 'style', 'link', 'br'):
+            return match.group(0)
+        class_match = re.search(_ATTR_RE.format('class'), attrs)
+        id_match = re.search(_ATTR_RE.format('id'), attrs)
+        classes = set(class_match.group(1).split()) if class_match else set()
+        element_id = id_match.group(1) if id_match else None
+
+        declarations = [decl for _, (r_tag, r_cls, r_id, decl) in rules
+                        if (not r_tag or r_tag == tag.lower())
+                        and (not r_cls or r_cls in classes)
+                        and (not r_id or r_id == element_id)]
+        if not declarations:
+            return match.group(0)
+
+        style_match = re.search(_ATTR_RE.format('style'), attrs)
+        if style_match:
+            merged = ';'.join(declarations + [style_match.group(1).strip().rstrip(';')])
+            attrs = attrs[:style_match.start(1)] + merged + attrs[style_match.end(1):]
+        else:
+            attrs = f'{attrs} style="{";".join(declarations)}"'
+        return f"<{tag}{attrs}{self_closing}>"
+
+    return _OPEN_TAG_RE.sub(inline, html)
+
+
+class InliningLoader(FileSystemLoader):
+    """FileSystemLoader that inlines CSS once, when the template source is loaded."""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        return inline_css(source), filename, uptodate
+
+
+def _money(value) -> str:
+    return f"{(value or 0):,.2f}"
+
+
+@lru_cache(maxsize=1)
+def get_environment() -> Environment:
+    """Shared Jinja environment; compiled templates are cached by Jinja itself."""
+    env = Environment(
+        loader=InliningLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(['html', 'xml']),
+        auto_reload=os.environ.get('EMAIL_TEMPLATE_AUTO_RELOAD', 'false').lower() == 'true',
+        cache_size=50,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    env.filters['money'] = _money
+    return env
+
+
+def render_email(template_name: str, **context) -> str:
+    """Render one email template."""
+    return get_environment().get_template(template_name).render(**context)
+
+
+def render_batch(template_name: str, contexts: Iterable[dict]) -> List[str]:
+    """Render many contexts against a single compiled template."""
+    template = get_environment().get_template(template_name)
+    return [template.render(**context) for context in contexts]
@@ -0,0 +1,90 @@
+"""
+Job Store Service - persistent APScheduler jobs with startup reconciliation.
+
+Periodic jobs live in an `apscheduler_jobs` table on the app's own SQLAlchemy
+engine, so their next run time survives restarts and deploys. At startup
+`reconcile_jobs` compares the stored jobs with the ones the app wants: it
+only adds missing jobs, replaces jobs whose function or trigger changed and
+removes leftovers (such as the old per-expense `reminder_<id>` jobs, which
+are now rebuilt from the database by the reminder timer).
+"""
+
+from typing import List
+
+try:
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+    from apscheduler.util import obj_to_ref
+except ImportError:
+    SQLAlchemyJobStore = None
+
+
+JOBS_TABLE = 'apscheduler_jobs'
+
+
+def sqlalchemy_jobstores(app, db) -> dict:
+    """SCHEDULER_JOBSTORES config backed by the app engine ({} if unavailable)."""
+    if SQLAlchemyJobStore is None:
+        return {}
+    try:
+        with app.app_context():
+            engine = db.engine
+        return {'default': SQLAlchemyJobStore(engine=engine, tablename=JOBS_TABLE)}
+    except Exception as e:
+        print(f"Persistent job store unavailable, using memory: {e}")
+        return {}
+
+
+def _make_trigger(spec: dict, timezone):
+    # A spec may pin its own timezone (e.g. UTC) instead of the scheduler's
+    timezone = spec.get('timezone', timezone)
+    trigger_args = {k: v for k, v in spec.items() if k not in ('id', 'func', 'trigger', 'timezone')}
+    if spec['trigger'] == 'cron':
+        return CronTrigger(timezone=timezone, **trigger_args)
+    if spec['trigger'] == 'interval':
+        return IntervalTrigger(timezone=timezone, **trigger_args)
+    raise ValueError(f"Unsupported trigger: {spec['trigger']}")
+
+
+def reconcile_jobs(scheduler, desired: List[dict]) -> dict:
+    """
+    Make the scheduler's job store match `desired` with minimal writes.
+
+    Args:
+        scheduler: a started Flask-APScheduler instance.
+        desired: job specs such as
+            {'id': 'weekly_reports', 'func': send_weekly_reports,
+             'trigger': 'cron', 'day_of_week': 'sun', 'hour': 8, 'minute': 0}
+
+    Returns:
+        Counts of jobs kept, added, replaced and removed.
+    """
+    stats = {'kept': 0, 'added': 0, 'replaced': 0, 'removed': 0}
+    timezone = scheduler.scheduler.timezone
+    existing = {job.id: job for job in scheduler.get_jobs()}
+    wanted_ids = {spec['id'] for spec in desired}
+
+    for spec in desired:
+        trigger = _make_trigger(spec, timezone)
+        job = existing.get(spec['id'])
+        if job is not None:
+            # str(trigger) leaves out the timezone, so compare it separately
+            same_zone = str(getattr(job.trigger, 'timezone', None)) == str(getattr(trigger, 'timezone', None))
+            if job.func_ref == obj_to_ref(spec['func']) and str(job.trigger) == str(trigger) and same_zone:
+                # Keep the stored next_run_time
+                stats['kept'] += 1
+                continue
+            stats['replaced'] += 1
+        else:
+            stats['added'] += 1
+        scheduler.scheduler.add_job(spec['func'], trigger=trigger, id=spec['id'],
+                                    name=spec['id'], replace_existing=True)
+
+    for job_id in existing.keys() - wanted_ids:
+        try:
+            scheduler.remove_job(job_id)
+            stats['removed'] += 1
+        except Exception:
+            pass
+    return stats
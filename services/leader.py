@@ -0,0 +1,230 @@
+"""
+Leader Service - single-leader election for background jobs.
+
+Every web worker imports app.py and starts a scheduler, but only one of
+them should run periodic jobs and fire reminders. Workers compete for
+leadership through the database:
+
+- Postgres: a session-level `pg_try_advisory_lock` held on a dedicated
+  connection. If the leader process dies its session ends, the lock is
+  released and another worker takes over on its next attempt.
+- SQLite (and anything else): a `scheduler_lease` row with an expiry that
+  the leader renews. A worker takes over once the lease has expired.
+
+On both backends the leader records itself in `scheduler_lease`, so the
+status endpoint can show which worker currently leads.
+"""
+
+import os
+import socket
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+class LeaderElector:
+    """Background thread that acquires, renews and loses leadership."""
+
+    def __init__(self, app, db, *, name: str = 'scheduler', lease_seconds: int = 30,
+                 on_elected: Optional[Callable] = None, on_demoted: Optional[Callable] = None):
+        self.app = app
+        self.db = db
+        self.name = name
+        self.lease = timedelta(seconds=lease_seconds)
+        self.renew_every = max(1.0, lease_seconds / 3)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lock_key = zlib.crc32(f'finbuddy:{name}'.encode('utf-8'))
+        self.is_leader = False
+        self.leader_since = None
+        self.transitions = 0
+        self.last_error = None
+        self.backend = None
+        self._pg_conn = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            with self.app.app_context():
+                self.backend = 'advisory_lock' if self.db.engine.dialect.name == 'postgresql' else 'lease_row'
+            self.thread = threading.Thread(target=self._run, name='leader-elector', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_leader:
+            self._set_leader(False)
+        self._release()
+
+    # --- backends -------------------------------------------------------
+
+    def _try_advisory_lock(self) -> bool:
+        """Hold the advisory lock on a dedicated connection; a ping keeps it alive."""
+        if self._pg_conn is not None:
+            try:
+                self._pg_conn.execute(text('SELECT 1'))
+                self._pg_conn.commit()
+                return True
+            except Exception:
+                # Session lost, and with it the lock
+                self._close_pg_conn()
+                raise
+
+        conn = self.db.engine.connect()
+        try:
+            acquired = conn.execute(text('SELECT pg_try_advisory_lock(:key)'),
+                                    {'key': self.lock_key}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if acquired:
+            self._pg_conn = conn
+        else:
+            conn.close()
+        return bool(acquired)
+
+    def _close_pg_conn(self):
+        if self._pg_conn is not None:
+            try:
+                self._pg_conn.invalidate()
+            except Exception:
+                pass
+            self._pg_conn = None
+
+    def _try_lease(self, now: datetime) -> bool:
+        """Take over or renew the lease row with one conditional UPDATE."""
+        from routes.database import SchedulerLease
+
+        session = self.db.session
+        expires = now + self.lease
+        updated = session.query(SchedulerLease).filter(
+            SchedulerLease.name == self.name,
+            (SchedulerLease.holder == self.identity) | (SchedulerLease.expires_at < now)
+        ).update({
+            SchedulerLease.holder: self.identity,
+            SchedulerLease.expires_at: expires,
+        }, synchronize_session=False)
+        if updated:
+            session.commit()
+            return True
+        if session.get(SchedulerLease, self.name) is not None:
+            session.rollback()
+            return False
+        try:
+            session.add(SchedulerLease(name=self.name, holder=self.identity,
+                                       acquired_at=now, expires_at=expires))
+            session.commit()
+            return True
+        except IntegrityError:
+            session.rollback()
+            return False
+
+    def _record_holder(self, now: datetime):
+        """Advertise the advisory-lock holder in the lease table (informational)."""
+        from routes.database import SchedulerLease
+
+        session = self.db.session
+        row = session.get(SchedulerLease, self.name)
+        if row is None:
+            row = SchedulerLease(name=self.name, holder=self.identity, acquired_at=now)
+            session.add(row)
+        elif row.holder != self.identity:
+            row.holder = self.identity
+            row.acquired_at = now
+        row.expires_at = now + self.lease
+        session.commit()
+
+    def _release(self):
+        try:
+            if self.backend == 'advisory_lock':
+                self._close_pg_conn()
+            elif self.backend == 'lease_row':
+                from routes.database import SchedulerLease
+                with self.app.app_context():
+                    self.db.session.query(SchedulerLease).filter_by(
+                        name=self.name, holder=self.identity).delete()
+                    self.db.session.commit()
+        except Exception as e:
+            print(f"Leader release failed: {e}")
+
+    # --- loop -----------------------------------------------------------
+
+    def _attempt(self) -> bool:
+        now = datetime.utcnow()
+        with self.app.app_context():
+            try:
+                if self.backend == 'advisory_lock':
+                    leader = self._try_advisory_lock()
+                    if leader:
+                        self._record_holder(now)
+                else:
+                    leader = self._try_lease(now)
+                return leader
+            except Exception:
+                self.db.session.rollback()
+                raise
+            finally:
+                self.db.session.remove()
+
+    def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        self.leader_since = datetime.utcnow() if leader else None
+        self.transitions += 1
+        print(f"{'👑 Became' if leader else 'Lost'} {self.name} leader: {self.identity}")
+        callback = self.on_elected if leader else self.on_demoted
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Leader callback error: {e}")
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                leader = self._attempt()
+                self.last_error = None
+            except Exception as e:
+                # Can't confirm the lock or lease: step down rather than risk two leaders
+                self.last_error = str(e)
+                leader = False
+            self._set_leader(leader)
+            self.stopped.wait(self.renew_every)
+
+    def status(self) -> dict:
+        from routes.database import SchedulerLease
+
+        current = None
+        try:
+            with self.app.app_context():
+                row = self.db.session.get(SchedulerLease, self.name)
+                if row is not None:
+                    current = {
+                        'holder': row.holder,
+                        'acquired_at': row.acquired_at.isoformat(),
+                        'expires_at': row.expires_at.isoformat(),
+                        'expired': row.expires_at < datetime.utcnow(),
+                    }
+                self.db.session.remove()
+        except Exception as e:
+            current = {'error': str(e)}
+        return {
+            'backend': self.backend,
+            'worker': self.identity,
+            'is_leader': self.is_leader,
+            'leader_since': self.leader_since.isoformat() if self.leader_since else None,
+            'transitions': self.transitions,
+            'lease_seconds': int(self.lease.total_seconds()),
+            'last_error': self.last_error,
+            'current_leader': current,
+        }
@@ -0,0 +1,73 @@
+"""
+Mailer Service - batched email delivery over reused SMTP connections.
+
+Opening an SMTP session (TCP, STARTTLS, AUTH) costs far more than sending a
+message over it, so `send_batch` splits a batch into chunks and sends each
+chunk over one `mail.connect()` connection. Large batches fan out to a small
+pool of sender threads, each holding its own connection.
+"""
+
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Hashable, Iterable, List, Tuple
+
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_WORKERS = 4
+
+
+def _send_chunk(app, mail, chunk) -> Tuple[list, list]:
+    """Send [(key, Message)] over one connection and return (sent_keys, failed_keys)."""
+    sent, failed = [], []
+    with app.app_context():
+        try:
+            with mail.connect() as conn:
+                for key, msg in chunk:
+                    try:
+                        conn.send(msg)
+                        sent.append(key)
+                    except smtplib.SMTPServerDisconnected:
+                        raise
+                    except Exception as e:
+                        print(f"Error sending email to {', '.join(msg.recipients)}: {e}")
+                        failed.append(key)
+        except Exception as e:
+            # Connect/login failed or the server dropped us: the rest of the chunk is unsent
+            print(f"SMTP connection error: {e}")
+            done = set(sent) | set(failed)
+            failed.extend(key for key, _ in chunk if key not in done)
+    return sent, failed
+
+
+def send_batch(app, mail, messages: Iterable[Tuple[Hashable, object]], *,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               workers: int = DEFAULT_WORKERS) -> Tuple[List, List]:
+    """
+    Send many messages with as few SMTP sessions as possible.
+
+    Args:
+        messages: (key, flask_mail.Message) pairs; keys identify results.
+        chunk_size: messages per SMTP connection.
+        workers: sender threads used when there is more than one chunk.
+
+    Returns:
+        (sent_keys, failed_keys)
+    """
+    items = list(messages)
+    if not items:
+        return [], []
+
+    chunk_size = max(1, chunk_size)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if len(chunks) == 1 or workers <= 1:
+        results = [_send_chunk(app, mail, chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks)),
+                                thread_name_prefix='mailer') as pool:
+            results = list(pool.map(lambda chunk: _send_chunk(app, mail, chunk), chunks))
+
+    sent, failed = [], []
+    for chunk_sent, chunk_failed in results:
+        sent.extend(chunk_sent)
+        failed.extend(chunk_failed)
+    return sent, failed
@@ -0,0 +1,100 @@
+"""
+PDF Cache Service - content-addressed disk cache for generated PDFs.
+
+A PDF is stored under the SHA-256 of the data it was built from plus the
+layout's template version, so unchanged inputs map to the same file and
+any edit produces a new key. The key doubles as the HTTP ETag, letting
+browsers revalidate with If-None-Match without a byte of ReportLab work.
+The directory is bounded in size; least recently served files (by
+mtime, refreshed on every hit) are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+
+_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    # /tmp is the only writable location on serverless hosts
+    return os.environ.get('PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'finbuddy-pdf-cache')
+
+
+def max_bytes() -> int:
+    return int(float(os.environ.get('PDF_CACHE_MAX_MB', '64')) * 1024 * 1024)
+
+
+def enabled() -> bool:
+    return os.environ.get('PDF_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def content_key(kind: str, version: str, data) -> str:
+    """Stable hash of JSON-serialisable `data` for a given document kind and layout version."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(f"{kind}:{version}:".encode('utf-8') + payload.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(cache_dir(), f"{key}.pdf")
+
+
+def get(key: str) -> Optional[bytes]:
+    """Cached PDF bytes, or None. A hit marks the file as recently used."""
+    if not enabled():
+        return None
+    path = _path(key)
+    try:
+        with open(path, 'rb') as fh:
+            pdf = fh.read()
+        os.utime(path)
+        return pdf
+    except OSError:
+        return None
+
+
+def contains(key: str) -> bool:
+    return enabled() and os.path.exists(_path(key))
+
+
+def put(key: str, pdf: bytes) -> None:
+    """Store a PDF atomically, then trim the cache back under its size limit."""
+    if not enabled():
+        return
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf)
+        os.replace(tmp_path, _path(key))
+        _evict(directory)
+    except OSError as e:
+        print(f"PDF cache write failed: {e}")
+
+
+def _evict(directory: str) -> None:
+    with _lock:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.pdf'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        limit = max_bytes()
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,368 @@
+"""
+PDF Jobs Service - ReportLab rendering off the request thread.
+
+PDF layout is CPU-bound and holds the GIL, so a few concurrent exports
+used to stall every other request on the worker. Renders now run in a
+small process pool:
+
+- Interactive exports are coalesced by cache key, bounded by a queue
+  limit (callers get `PdfQueueFull` instead of piling up), and waited on
+  briefly; slow ones hand back a job id the browser can poll.
+- Batch jobs (e.g. every tutor's routine for the new week) feed the pool a
+  few documents at a time so interactive exports never queue behind them.
+- Multi-part jobs (e.g. one statement per student, zipped) feed their
+  parts to the pool at batch concurrency and combine the results in this
+  process.
+
+Finished PDFs land in the content-addressed PDF cache. Without `fork`
+(Windows) or on Vercel, documents are rendered inline as before.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Callable, Iterable, List, Optional
+
+from services import pdf_cache
+
+
+MAX_TRACKED_JOBS = 200
+JOB_TTL = timedelta(minutes=15)
+
+
+class PdfQueueFull(Exception):
+    """Too many interactive renders are already queued."""
+
+
+def _render_in_worker(kind: str, data: dict) -> bytes:
+    from services.pdf_render import render
+    return render(kind, data)
+
+
+def _first(results: List[bytes]) -> bytes:
+    return results[0]
+
+
+def zip_combiner(names: List[str]) -> Callable[[List[bytes]], bytes]:
+    """Combine step for `render_parts` that zips the parts under `names`."""
+    def combine(results: List[bytes]) -> bytes:
+        buffer = BytesIO()
+        # PDFs are already compressed; storing them keeps the zip step cheap
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for name, pdf in zip(names, results):
+                archive.writestr(name, pdf)
+        return buffer.getvalue()
+    return combine
+
+
+class PdfJob:
+    def __init__(self, kind: str, key: Optional[str] = None, owner: Optional[int] = None, total: int = 1,
+                 background: bool = False, filename: Optional[str] = None,
+                 mimetype: str = 'application/pdf'):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.owner = owner
+        # What a finished download is served as
+        self.filename = filename
+        self.mimetype = mimetype
+        # Part of a batch: doesn't count against the interactive queue limit
+        self.background = background
+        self.status = 'queued'
+        self.error = None
+        self.result = None
+        self.total = total
+        self.done_count = 0
+        self.failed_count = 0
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+    def to_dict(self) -> dict:
+        info = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.kind == 'batch':
+            info.update(total=self.total, done=self.done_count, failed=self.failed_count)
+        if self.error:
+            info['error'] = self.error
+        return info
+
+
+class PdfRenderPool:
+    """Process pool plus the job registry that tracks what it is rendering."""
+
+    def __init__(self, workers: int = 2, queue_limit: int = 8, batch_concurrency: int = 1,
+                 part_concurrency: Optional[int] = None, use_processes: bool = True):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.batch_concurrency = batch_concurrency
+        # Parts of one interactive download in the pool at once (default: every worker)
+        self.part_concurrency = part_concurrency or workers
+        self.use_processes = use_processes and 'fork' in multiprocessing.get_all_start_methods()
+        self.executor = None
+        self.jobs = OrderedDict()
+        # (owner, cache key) -> job; only the owner may poll a job, so jobs are never shared across owners
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def _get_executor(self):
+        if self.executor is None:
+            # fork, not spawn: spawn re-imports the main module (app.py) in every worker
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+            atexit.register(self.shutdown)
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _track(self, job: PdfJob):
+        self.jobs[job.id] = job
+        cutoff = datetime.utcnow() - JOB_TTL
+        for job_id, old in list(self.jobs.items()):
+            if len(self.jobs) <= MAX_TRACKED_JOBS and not (old.finished_at and old.finished_at < cutoff):
+                break
+            if old.finished.is_set():
+                del self.jobs[job_id]
+
+    def _finish(self, job: PdfJob, pdf: Optional[bytes] = None, error: Optional[str] = None):
+        if error is None:
+            pdf_cache.put(job.key, pdf)
+            job.result = pdf
+            job.status = 'done'
+        else:
+            print(f"PDF render failed ({job.kind}): {error}")
+            job.error = error
+            job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+        with self.lock:
+            self.in_flight.pop((job.owner, job.key), None)
+        job.finished.set()
+
+    def _start(self, job: PdfJob, parts: list, combine: Callable = _first):
+        """
+        Render a job's (kind, data) parts and combine them into its result.
+
+        Returns once the first parts are submitted (pool) or all are finished (inline).
+        """
+        if not self.use_processes:
+            job.status = 'running'
+            try:
+                self._finish(job, combine([_render_in_worker(kind, data) for kind, data in parts]))
+            except Exception as e:
+                self._finish(job, error=str(e))
+            return
+        if not parts:
+            self._finish(job, combine([]))
+            return
+        job.status = 'running'
+        results = [None] * len(parts)
+        errors = []
+        # Multi-part jobs feed the pool one part per finished part, so another
+        # export waits for at most one part to finish rather than the whole job
+        window = max(1, self.part_concurrency) if len(parts) > 1 else 1
+        pending = list(enumerate(parts))[::-1]
+        remaining = [len(parts)]
+        parts_lock = threading.Lock()
+
+        def finish_part(index, result=None, error=None):
+            with parts_lock:
+                if error is None:
+                    results[index] = result
+                else:
+                    errors.append(error)
+                    # Don't start the rest of a job that has already failed
+                    remaining[0] -= len(pending)
+                    pending.clear()
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if not last:
+                submit_next()
+            elif errors:
+                self._finish(job, error=errors[0])
+            else:
+                try:
+                    self._finish(job, combine(results))
+                except Exception as e:
+                    self._finish(job, error=str(e) or e.__class__.__name__)
+
+        def done(f, index):
+            result = error = None
+            try:
+                result = f.result()
+            except BrokenProcessPool as e:
+                # A worker died; start a fresh pool on the next submit
+                self.executor = None
+                error = str(e) or 'worker crashed'
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            finish_part(index, result, error)
+
+        def submit_next():
+            with parts_lock:
+                if not pending:
+                    return
+                index, (kind, data) = pending.pop()
+            try:
+                future = self._get_executor().submit(_render_in_worker, kind, data)
+            except Exception as e:
+                finish_part(index, error=str(e) or e.__class__.__name__)
+                return
+            future.add_done_callback(lambda f, index=index: done(f, index))
+
+        for _ in range(min(window, len(parts))):
+            submit_next()
+
+    def _enqueue(self, kind: str, key: str, owner: Optional[int], filename: Optional[str],
+                 mimetype: str) -> tuple:
+        """(job, is_new); the same owner's identical in-flight requests share a job."""
+        with self.lock:
+            job = self.in_flight.get((owner, key))
+            if job is not None:
+                return job, False
+            if sum(1 for j in self.in_flight.values() if not j.background) >= self.queue_limit:
+                raise PdfQueueFull()
+            job = PdfJob(kind, key, owner, filename=filename, mimetype=mimetype)
+            self.in_flight[(owner, key)] = job
+            self._track(job)
+        return job, True
+
+    def render(self, kind: str, key: str, data: dict, owner: Optional[int] = None,
+               filename: Optional[str] = None) -> PdfJob:
+        """Queue one document; the same owner's identical in-flight requests share a job."""
+        job, new = self._enqueue(kind, key, owner, filename, 'application/pdf')
+        if new:
+            self._start(job, [(kind, data)])
+        return job
+
+    def render_parts(self, kind: str, key: str, parts: list, combine: Callable,
+                     owner: Optional[int] = None, filename: Optional[str] = None,
+                     mimetype: str = 'application/pdf') -> PdfJob:
+        """
+        Queue one download built from several documents.
+
+        Up to `part_concurrency` (kind, data) parts are in the pool at once,
+        on any worker; `combine` turns the ordered part results into the
+        download and runs here.
+        """
+        job, new = self._enqueue(kind, key, owner, filename, mimetype)
+        if new:
+            self._start(job, parts, combine)
+        return job
+
+    def submit_batch(self, items: Iterable[tuple], owner: Optional[int] = None) -> PdfJob:
+        """
+        Render many (kind, key, data) documents in the background.
+
+        At most `batch_concurrency` of them occupy the pool at once; keys
+        that are already cached are skipped.
+        """
+        items = list(items)
+        batch = PdfJob('batch', owner=owner, total=len(items))
+        with self.lock:
+            self._track(batch)
+        threading.Thread(target=self._run_batch, args=(batch, items), name='pdf-batch', daemon=True).start()
+        return batch
+
+    def _run_batch(self, batch: PdfJob, items: list):
+        batch.status = 'running'
+        running = []
+        for kind, key, data in items:
+            if pdf_cache.contains(key):
+                batch.done_count += 1
+                continue
+            while len(running) >= self.batch_concurrency:
+                self._collect(batch, running.pop(0))
+            with self.lock:
+                job = self.in_flight.get((batch.owner, key))
+                new = job is None
+                if new:
+                    job = PdfJob(kind, key, batch.owner, background=True)
+                    self.in_flight[(batch.owner, key)] = job
+            if new:
+                self._start(job, [(kind, data)])
+            running.append(job)
+        for job in running:
+            self._collect(batch, job)
+        batch.status = 'done' if not batch.failed_count else 'failed'
+        batch.finished_at = datetime.utcnow()
+        batch.finished.set()
+
+    @staticmethod
+    def _collect(batch: PdfJob, job: PdfJob):
+        job.wait()
+        if job.status == 'done':
+            batch.done_count += 1
+        else:
+            batch.failed_count += 1
+
+    def get(self, job_id: str) -> Optional[PdfJob]:
+        return self.jobs.get(job_id)
+
+    def status(self) -> dict:
+        with self.lock:
+            jobs = list(self.jobs.values())
+            in_flight = len(self.in_flight)
+        return {
+            'mode': 'processes' if self.use_processes else 'inline',
+            'workers': self.workers if self.use_processes else 0,
+            'queue_limit': self.queue_limit,
+            'part_concurrency': self.part_concurrency,
+            'in_flight': in_flight,
+            'batches_running': sum(1 for job in jobs if job.kind == 'batch' and not job.finished.is_set()),
+            'tracked_jobs': len(jobs),
+        }
+
+
+def _default_workers() -> int:
+    return int(os.environ.get('PDF_WORKERS') or max(1, min(2, (os.cpu_count() or 2) - 1)))
+
+
+# Shared by the tuition routes and the scheduled batch job
+render_pool = PdfRenderPool(
+    workers=_default_workers(),
+    queue_limit=int(os.environ.get('PDF_QUEUE_LIMIT', '8')),
+    batch_concurrency=int(os.environ.get('PDF_BATCH_CONCURRENCY', '1')),
+    part_concurrency=int(os.environ.get('PDF_PART_CONCURRENCY', '0')) or None,
+    use_processes=(os.environ.get('PDF_PROCESS_POOL', 'true').lower() == 'true'
+                   and os.environ.get('VERCEL_DEPLOYMENT', 'false').lower() != 'true'),
+)
+
+
+def prerender_weekly_routines(app, pool: Optional[PdfRenderPool] = None) -> Optional[PdfJob]:
+    """Batch-render every tutor's routine so the week's first downloads are cache hits."""
+    from routes.database import db, TuitionRecord, User
+    from services.pdf_render import ROUTINE_PDF_VERSION, routine_data
+    from services.tuition_schedule import get_schedules
+
+    pool = pool or render_pool
+    with app.app_context():
+        versions = dict(db.session.query(User.id, User.tuition_schedule_version).filter(
+            User.id.in_(db.session.query(TuitionRecord.user_id).distinct())).all())
+        schedules = get_schedules(db.session, versions) if versions else {}
+        db.session.close()
+
+    items = []
+    for schedule in schedules.values():
+        data = routine_data(schedule)
+        items.append(('routine', pdf_cache.content_key('routine', ROUTINE_PDF_VERSION, data), data))
+    if not items:
+        return None
+    return pool.submit_batch(items)
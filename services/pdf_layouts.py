@@ -0,0 +1,382 @@
+"""
+PDF Layouts - the ReportLab side of the PDF render service.
+
+Importing ReportLab and registering the TTF brand font take a noticeable
+slice of a cold start, and most processes never export a PDF. This module
+is therefore only imported by `services.pdf_render.render` on first use
+(in a PDF worker process, or inline); nothing else should import it.
+"""
+
+import os
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.enums import TA_CENTER
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from services.pdf_render import BRAND_FONT_PATH
+
+
+@lru_cache(maxsize=1)
+def brand_font() -> str:
+    """Register Luckiest Guy on first use; fall back to Helvetica-Bold if it can't be loaded."""
+    try:
+        if os.path.exists(BRAND_FONT_PATH):
+            pdfmetrics.registerFont(TTFont('LuckiestGuy', BRAND_FONT_PATH))
+            return 'LuckiestGuy'
+    except Exception:
+        pass  # Silently fallback to Helvetica-Bold
+    return 'Helvetica-Bold'
+
+
+def render_routine_pdf(routine: dict) -> bytes:
+    """Build the weekly routine PDF from `routine_data` output."""
+    schedule_by_day = routine['days']
+
+    # Create PDF in landscape orientation for horizontal routine
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30,
+                            leftMargin=30, topMargin=30, bottomMargin=30)
+    elements = []
+
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#e74c3c'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.grey,
+        spaceAfter=20,
+        alignment=TA_CENTER
+    )
+
+    # Title
+    elements.append(Paragraph("🎓 Weekly Tuition Routine", title_style))
+    # No generation timestamp: cached copies are served for as long as the routine is unchanged
+    students = routine['total_students']
+    elements.append(Paragraph(
+        f"{students} student{'s' if students != 1 else ''} • repeats every week", subtitle_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Weekly Schedule Table
+    days = ['Sunday', 'Monday', 'Tuesday',
+            'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+    # Prepare table data - Days as columns
+    # First row: Day names
+    header_row = days
+
+    # Find the maximum number of classes on any day
+    max_classes = max(len(schedule_by_day[day_idx]) for day_idx in range(7))
+    if max_classes == 0:
+        max_classes = 1  # At least one row for empty message
+
+    # Initialize table data with header
+    table_data = [header_row]
+
+    # Create rows for each class slot
+    for row_idx in range(max_classes):
+        row = []
+        for day_idx in range(7):
+            day_classes = schedule_by_day[day_idx]
+            if row_idx < len(day_classes):
+                entry = day_classes[row_idx]
+                # Create a formatted cell with student name, time, and address
+                time_str = entry['tuition_time'] or "Time: N/A"
+                address = entry['address'][:20] + \
+                    "..." if len(entry['address']) > 20 else entry['address']
+
+                cell_content = Paragraph(
+                    f"<b>{entry['student_name']}</b><br/>"
+                    f"<font size=9>⏰ {time_str}</font><br/>"
+                    f"<font size=8>📍 {address}</font>",
+                    ParagraphStyle(
+                        'CellStyle',
+                        parent=styles['Normal'],
+                        fontSize=10,
+                        leading=12,
+                        alignment=TA_CENTER
+                    )
+                )
+                row.append(cell_content)
+            else:
+                # Empty cell if no class at this time slot
+                if row_idx == 0 and len(day_classes) == 0:
+                    row.append(Paragraph("<i>No classes</i>",
+                                         ParagraphStyle('EmptyStyle', parent=styles['Normal'],
+                                                        fontSize=9, alignment=TA_CENTER, textColor=colors.grey)))
+                else:
+                    row.append('')
+        table_data.append(row)
+
+    # Create table with equal column widths for landscape orientation
+    col_width = 10.5*inch / 7  # Distribute width evenly across 7 days in landscape
+    table = Table(table_data, colWidths=[col_width] * 7,
+                  rowHeights=[0.4*inch] + [1*inch] * max_classes)
+
+    # Table style
+    table_style = [
+        # Header row (days)
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a90e2')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('TOPPADDING', (0, 0), (-1, 0), 10),
+
+        # Data rows
+        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 1.5, colors.HexColor('#cccccc')),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+        ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#4a90e2')),
+    ]
+
+    # Add alternating colors for data rows
+    for row_idx in range(1, len(table_data)):
+        if row_idx % 2 == 1:
+            table_style.append(
+                ('BACKGROUND', (0, row_idx),
+                 (-1, row_idx), colors.HexColor('#f8f9fa'))
+            )
+        else:
+            table_style.append(
+                ('BACKGROUND', (0, row_idx), (-1, row_idx), colors.white)
+            )
+
+    # Add light background to cells with content
+    for day_idx in range(7):
+        for row_idx in range(1, len(table_data)):
+            if schedule_by_day[day_idx] and (row_idx - 1) < len(schedule_by_day[day_idx]):
+                table_style.append(
+                    ('BACKGROUND', (day_idx, row_idx), (day_idx, row_idx),
+                     colors.HexColor('#e3f2fd'))
+                )
+
+    table.setStyle(TableStyle(table_style))
+
+    elements.append(table)
+    elements.append(Spacer(1, 0.5*inch))
+
+    # Summary statistics
+    total_students = routine['total_students']
+    total_amount = routine['total_amount']
+    total_classes = routine['total_classes']
+
+    summary_data = [
+        ['Summary Statistics', ''],
+        ['Total Students', str(total_students)],
+        ['Total Income', f"{total_amount:,.2f} bdt."],
+        ['Total Classes', str(total_classes)]
+    ]
+
+    summary_table = Table(summary_data, colWidths=[2.5*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('SPAN', (0, 0), (-1, 0)),
+
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0f0f0')),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 1), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ]))
+
+    elements.append(summary_table)
+
+    # Branding: header/footer on each page
+    def draw_branding(canvas_obj, doc_obj):
+        width, height = landscape(A4)
+        # Header bar
+        canvas_obj.setFillColor(colors.HexColor('#667eea'))
+        canvas_obj.rect(0, height - 25, width, 25, fill=1, stroke=0)
+        # Brand text - use Luckiest Guy if available, else Helvetica-Bold
+        canvas_obj.setFillColor(colors.whitesmoke)
+        canvas_obj.setFont(brand_font(), 16)
+        canvas_obj.drawCentredString(width / 2, height - 18, 'FinBuddy')
+        # Footer
+        canvas_obj.setFillColor(colors.HexColor('#888888'))
+        canvas_obj.setFont('Helvetica', 9)
+        canvas_obj.drawString(30, 15, "Weekly Tuition Routine • FinBuddy")
+        canvas_obj.drawRightString(width - 30, 15, f"Page {doc_obj.page}")
+
+    # Build PDF with branding
+    doc.build(elements, onFirstPage=draw_branding, onLaterPages=draw_branding)
+
+    # Get PDF from buffer
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+
+@lru_cache(maxsize=1)
+def _statement_styles() -> dict:
+    """Paragraph and table styles shared by every statement a process renders."""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('StatementTitle', parent=styles['Heading1'], fontSize=20,
+                                textColor=colors.HexColor('#e74c3c'), spaceAfter=6,
+                                alignment=TA_CENTER, fontName='Helvetica-Bold'),
+        'subtitle': ParagraphStyle('StatementSubtitle', parent=styles['Normal'], fontSize=11,
+                                   textColor=colors.grey, spaceAfter=14, alignment=TA_CENTER),
+        'heading': ParagraphStyle('StatementHeading', parent=styles['Heading3'], fontSize=12,
+                                  textColor=colors.HexColor('#4a90e2'), spaceBefore=10, spaceAfter=6),
+        'body': ParagraphStyle('StatementBody', parent=styles['Normal'], fontSize=10, leading=13),
+        'muted': ParagraphStyle('StatementMuted', parent=styles['Normal'], fontSize=9,
+                                textColor=colors.grey),
+        'info_table': TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'list_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a90e2')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.75, colors.HexColor('#cccccc')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'total_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f0f0f0')),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#667eea')),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ]),
+    }
+
+
+def _format_day(value: str) -> str:
+    return date.fromisoformat(value).strftime('%a, %b %d')
+
+
+def _statement_flowables(statement: dict, month_label: str, tutor_name: str) -> list:
+    """One student's statement page."""
+    styles = _statement_styles()
+    elements = [
+        Paragraph("Monthly Tuition Statement", styles['title']),
+        Paragraph(f"{month_label}" + (f" • {tutor_name}" if tutor_name else ''), styles['subtitle']),
+    ]
+
+    schedule = ', '.join(statement['days']) or 'N/A'
+    if statement['tuition_time']:
+        schedule += f" at {statement['tuition_time']}"
+    elements.append(Table([
+        ['Student', Paragraph(statement['student_name'], styles['body'])],
+        ['Address', Paragraph(statement['address'], styles['body'])],
+        ['Schedule', Paragraph(schedule, styles['body'])],
+        ['Progress', f"{statement['total_completed']} / {statement['total_days']} classes"],
+    ], colWidths=[1.3*inch, 5.2*inch], style=styles['info_table']))
+
+    elements.append(Paragraph(f"Classes held ({statement['classes']})", styles['heading']))
+    if statement['dates']:
+        rows = [['#', 'Date']] + [[str(i), _format_day(day)] for i, day in enumerate(statement['dates'], 1)]
+        elements.append(Table(rows, colWidths=[0.5*inch, 2.5*inch], style=styles['list_table'],
+                              hAlign='LEFT', repeatRows=1))
+    else:
+        elements.append(Paragraph("<i>No classes recorded this month.</i>", styles['muted']))
+
+    if statement['reschedules']:
+        elements.append(Paragraph(f"Reschedules ({len(statement['reschedules'])})", styles['heading']))
+        rows = [['From', 'To', 'Status', 'Reason']]
+        for change in statement['reschedules']:
+            rows.append([
+                f"{_format_day(change['original_date'])} {change['original_time']}",
+                f"{_format_day(change['new_date'])} {change['new_time']}",
+                change['status'].capitalize(),
+                Paragraph(change['reason'] or '-', styles['muted']),
+            ])
+        elements.append(Table(rows, colWidths=[1.6*inch, 1.6*inch, 0.9*inch, 2.4*inch],
+                              style=styles['list_table'], hAlign='LEFT', repeatRows=1))
+
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Table([
+        ['Monthly fee', f"{statement['fee']:,.2f} bdt. / {statement['total_days']} classes"],
+        ['Per class', f"{statement['per_class']:,.2f} bdt."],
+        ['Classes held', str(statement['classes'])],
+        ['Amount due', f"{statement['amount_due']:,.2f} bdt."],
+    ], colWidths=[2*inch, 3*inch], style=styles['total_table'], hAlign='LEFT'))
+    return elements
+
+
+def _draw_statement_branding(canvas_obj, doc_obj):
+    width, height = A4
+    canvas_obj.setFillColor(colors.HexColor('#667eea'))
+    canvas_obj.rect(0, height - 25, width, 25, fill=1, stroke=0)
+    canvas_obj.setFillColor(colors.whitesmoke)
+    canvas_obj.setFont(brand_font(), 16)
+    canvas_obj.drawCentredString(width / 2, height - 18, 'FinBuddy')
+    canvas_obj.setFillColor(colors.HexColor('#888888'))
+    canvas_obj.setFont('Helvetica', 9)
+    # No generation timestamp: cached statements are reused until the month's data changes
+    canvas_obj.drawString(30, 15, "Monthly Tuition Statement • FinBuddy")
+    canvas_obj.drawRightString(width - 30, 15, f"Page {doc_obj.page}")
+
+
+def _build_statements(statements: list, month_label: str, tutor_name: str) -> bytes:
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40,
+                            topMargin=45, bottomMargin=35)
+    elements = []
+    for index, statement in enumerate(statements):
+        if index:
+            elements.append(PageBreak())
+        elements.extend(_statement_flowables(statement, month_label, tutor_name))
+    doc.build(elements, onFirstPage=_draw_statement_branding, onLaterPages=_draw_statement_branding)
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+
+def render_statement_pdf(data: dict) -> bytes:
+    """A single student's statement: {'month_label', 'tutor_name', 'statement'}."""
+    return _build_statements([data['statement']], data['month_label'], data['tutor_name'])
+
+
+def render_statements_pdf(data: dict) -> bytes:
+    """Every statement from `collect_statements` in one document, a page (or more) per student."""
+    return _build_statements(data['statements'], data['month_label'], data['tutor_name'])
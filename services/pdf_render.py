@@ -0,0 +1,59 @@
+"""
+PDF Render Service - ReportLab documents built from plain data.
+
+Renderers take JSON-able dicts rather than ORM objects, so the same input
+can be hashed for the PDF cache and shipped to a worker process.
+
+This module stays free of ReportLab so routes can build cache keys and
+serve cached PDFs without loading it; the layouts in `services.pdf_layouts`
+(and the brand font) are imported on the first actual render.
+"""
+
+import os
+from functools import lru_cache
+
+
+# Luckiest Guy brands the PDFs if static/fonts/ has it; otherwise Helvetica-Bold
+BRAND_FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                               'static', 'fonts', 'LuckiestGuy-Regular.ttf')
+
+
+@lru_cache(maxsize=1)
+def brand_font_name() -> str:
+    """The brand font the layouts will use, without loading ReportLab (part of the cache key)."""
+    return 'LuckiestGuy' if os.path.exists(BRAND_FONT_PATH) else 'Helvetica-Bold'
+
+
+# Bump when the routine layout changes so cached PDFs are rebuilt
+ROUTINE_PDF_VERSION = '2'
+# Same for the monthly statement layout
+STATEMENT_PDF_VERSION = '2'
+
+
+def routine_data(schedule) -> dict:
+    """Everything the routine PDF shows, as plain JSON-able data (also the cache key input)."""
+    return {
+        'days': [
+            [{'student_name': entry.student_name, 'tuition_time': entry.tuition_time,
+              'address': entry.address} for entry in schedule.by_day[day_idx]]
+            for day_idx in range(7)
+        ],
+        'total_students': schedule.total_students,
+        'total_amount': schedule.total_amount,
+        'total_classes': schedule.total_classes,
+        'brand_font': brand_font_name(),
+    }
+
+
+# kind -> renderer in services.pdf_layouts, used by the PDF worker pool
+RENDERERS = {
+    'routine': 'render_routine_pdf',
+    'statement': 'render_statement_pdf',
+    'statements': 'render_statements_pdf',
+}
+
+
+def render(kind: str, data: dict) -> bytes:
+    # First call in a process pays for ReportLab and the font; later ones reuse them
+    from services import pdf_layouts
+    return getattr(pdf_layouts, RENDERERS[kind])(data)
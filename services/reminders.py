@@ -0,0 +1,452 @@
+"""
+Reminder Service - batched delivery of due expense reminders.
+
+One joined query fetches every due, unsent reminder together with the
+owner's name and email. Messages go out through the pooled mailer and the
+delivered reminders are flagged with a single bulk UPDATE, so a month-end
+wave of bills costs one SELECT, a handful of SMTP sessions and one write.
+
+`ReminderTimer` replaces interval polling: it keeps a min-heap of the next
+few upcoming reminders and sleeps until exactly the earliest one is due.
+Workers that are not the scheduler leader bump a shared `ChangeSignal`
+row when they set a reminder; the leader's timer checks that version every
+few seconds and reloads when it moves.
+"""
+
+import heapq
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from flask_mail import Message
+
+from services.email_render import render_batch
+from services.mailer import send_batch
+
+
+UPDATE_CHUNK = 500
+REMINDER_SIGNAL = 'reminders'
+
+
+def due_reminders(db_session, now: Optional[datetime] = None, limit: Optional[int] = None,
+                  expense_ids=None, after=None) -> list:
+    """
+    Due, unsent reminders joined with the recipient's profile, oldest first.
+
+    `after` is a (reminder_at, id) keyset cursor: only rows strictly after it
+    are returned, so callers can page through a backlog in index order.
+    """
+    from sqlalchemy import and_, or_
+    from routes.database import Expense, User, Profile
+
+    now = now or datetime.utcnow()
+    query = db_session.query(
+        Expense.id, Expense.user_id, Expense.name, Expense.amount, Expense.category, Expense.description,
+        Expense.reminder_at, Expense.reminder_note,
+        User.username, User.notification_mode, Profile.profile_name, Profile.email
+    ).join(User, User.id == Expense.user_id
+    ).join(Profile, Profile.user_id == Expense.user_id
+    ).filter(
+        Expense.reminder_sent == False,
+        Expense.reminder_at.isnot(None),
+        Expense.reminder_at <= now,
+        Profile.email.isnot(None),
+        Profile.email != ''
+    ).order_by(Expense.reminder_at, Expense.id)
+    if expense_ids is not None:
+        query = query.filter(Expense.id.in_(list(expense_ids)))
+    if after is not None:
+        after_at, after_id = after
+        query = query.filter(or_(
+            Expense.reminder_at > after_at,
+            and_(Expense.reminder_at == after_at, Expense.id > after_id)
+        ))
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def build_reminder_messages(rows) -> list:
+    """[(expense_id, Message)] for rows of `due_reminders`, rendered in one batch."""
+    bodies = render_batch('email_reminder.html', (
+        {
+            'display_name': row.profile_name or row.username,
+            'name': row.name,
+            'category': row.category,
+            'amount': row.amount,
+            'description': row.description,
+            'due': row.reminder_at,
+            'note': row.reminder_note,
+        }
+        for row in rows
+    ))
+    return [
+        (row.id, Message(subject=f'Reminder: {row.category} - {row.name}', recipients=[row.email], html=html))
+        for row, html in zip(rows, bodies)
+    ]
+
+
+def queue_digest_reminders(db_session, rows) -> list:
+    """
+    Move reminders of digest-mode users into their digest queue.
+
+    Queued reminders are flagged sent right away. Returns the rows that
+    still need an immediate email.
+    """
+    from services.digest import DIGEST, enqueue
+
+    digest_rows = [row for row in rows if row.notification_mode == DIGEST]
+    if not digest_rows:
+        return list(rows)
+
+    enqueue(db_session, (
+        {
+            'user_id': row.user_id,
+            'kind': 'reminder',
+            'title': f"{row.name} · ৳{(row.amount or 0):,.2f}",
+            'body': row.reminder_note,
+            'due_at': row.reminder_at,
+        }
+        for row in digest_rows
+    ))
+    mark_reminders_sent(db_session, [row.id for row in digest_rows])
+    return [row for row in rows if row.notification_mode != DIGEST]
+
+
+def mark_reminders_sent(db_session, expense_ids) -> int:
+    """Flag reminders as sent with bulk UPDATEs; returns rows updated."""
+    from routes.database import Expense
+
+    ids = list(expense_ids)
+    updated = 0
+    for i in range(0, len(ids), UPDATE_CHUNK):
+        updated += db_session.query(Expense).filter(
+            Expense.id.in_(ids[i:i + UPDATE_CHUNK])
+        ).update({Expense.reminder_sent: True}, synchronize_session=False)
+    db_session.commit()
+    return updated
+
+
+def dispatch_due_reminders(app, mail, *, now: Optional[datetime] = None, expense_ids=None,
+                           chunk_size: int = 50, workers: int = 4) -> dict:
+    """
+    Send every due reminder (or only `expense_ids`, if given) in one batch.
+
+    Returns:
+        Stats dict: due, sent, failed, queued (for digests), failed_ids.
+    """
+    from routes.database import db
+
+    with app.app_context():
+        rows = due_reminders(db.session, now, expense_ids=expense_ids)
+        if not rows:
+            return {'due': 0, 'sent': 0, 'failed': 0, 'queued': 0, 'failed_ids': []}
+
+        immediate = queue_digest_reminders(db.session, rows)
+        queued = len(rows) - len(immediate)
+        messages = build_reminder_messages(immediate)
+        # Release the connection while SMTP runs
+        db.session.close()
+
+    sent, failed = send_batch(app, mail, messages, chunk_size=chunk_size, workers=workers)
+
+    if sent:
+        with app.app_context():
+            try:
+                mark_reminders_sent(db.session, sent)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error marking reminders sent: {e}")
+
+    if failed:
+        print(f"Reminder dispatch: {len(failed)} of {len(rows)} reminders failed")
+    return {'due': len(rows), 'sent': len(sent), 'failed': len(failed), 'queued': queued,
+            'failed_ids': failed}
+
+
+def upcoming_reminders(db_session, limit: int) -> list:
+    """(reminder_at, expense_id) of the next `limit` unsent reminders that have a recipient."""
+    from routes.database import Expense, Profile
+
+    return db_session.query(Expense.reminder_at, Expense.id).join(
+        Profile, Profile.user_id == Expense.user_id
+    ).filter(
+        Expense.reminder_sent == False,
+        Expense.reminder_at.isnot(None),
+        Profile.email.isnot(None),
+        Profile.email != ''
+    ).order_by(Expense.reminder_at, Expense.id).limit(limit).all()
+
+
+def reminder_version(db_session) -> int:
+    """Current value of the shared reminder change counter."""
+    from routes.database import ChangeSignal
+
+    return db_session.query(ChangeSignal.version).filter_by(name=REMINDER_SIGNAL).scalar() or 0
+
+
+def signal_reminders_changed(db_session) -> None:
+    """Bump the shared reminder counter so the leader's timer reloads; commits."""
+    from sqlalchemy.exc import IntegrityError
+    from routes.database import ChangeSignal
+
+    def bump():
+        return db_session.query(ChangeSignal).filter_by(name=REMINDER_SIGNAL).update(
+            {ChangeSignal.version: ChangeSignal.version + 1}, synchronize_session=False)
+
+    if not bump():
+        try:
+            db_session.add(ChangeSignal(name=REMINDER_SIGNAL, version=1))
+            db_session.commit()
+            return
+        except IntegrityError:
+            # Another worker created the row first
+            db_session.rollback()
+            bump()
+    db_session.commit()
+
+
+def _as_utc_naive(value: datetime) -> datetime:
+    # reminder_at is stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class ReminderTimer:
+    """
+    Background thread that fires reminders at their due time.
+
+    Holds at most `capacity` upcoming reminders in a heap loaded by one
+    indexed range query. Reminders scheduled beyond the loaded window are
+    picked up when the heap drains and is refilled. Cancelled or
+    rescheduled entries are dropped lazily when they reach the top.
+    Failed sends are retried with doubling delays; after `max_attempts`
+    the reminder is flagged sent so no reload retries it again.
+    """
+
+    def __init__(self, app, mail, *, capacity: int = 500, resync_minutes: int = 60,
+                 signal_seconds: int = 0, retry_minutes: int = 5, max_attempts: int = 5,
+                 chunk_size: int = 50, workers: int = 4):
+        self.app = app
+        self.mail = mail
+        self.capacity = capacity
+        self.resync = timedelta(minutes=resync_minutes) if resync_minutes else None
+        # How often to check the shared reminder counter (0: never)
+        self.signal_every = timedelta(seconds=signal_seconds) if signal_seconds else None
+        self.retry = timedelta(minutes=retry_minutes)
+        self.max_attempts = max_attempts
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.heap = []          # (reminder_at, expense_id)
+        self.due_at = {}        # expense_id -> reminder_at currently scheduled
+        self.failures = {}      # expense_id -> consecutive failed sends
+        self.retry_at = {}      # expense_id -> backed-off retry time, kept across refills
+        self.horizon = None     # latest reminder_at loaded, None if everything is loaded
+        self.loaded_at = None
+        self.seen_version = None
+        self.signal_checked_at = None
+        self.changed_during_refill = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.active = threading.Event()
+        self.active.set()
+        self.thread = None
+        self.stats = {'fired': 0, 'sent': 0, 'failed': 0, 'refills': 0}
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='reminder-timer', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+    def pause(self):
+        """Stop firing (e.g. this worker is not the scheduler leader)."""
+        self.active.clear()
+        self.wakeup.set()
+
+    def resume(self):
+        """Start firing again from a fresh load of the database."""
+        self.loaded_at = None
+        self.active.set()
+        self.wakeup.set()
+
+    def refill(self):
+        """Reload the heap with the earliest unsent reminders."""
+        from routes.database import db
+
+        with self.lock:
+            self.changed_during_refill = {}
+        try:
+            with self.app.app_context():
+                try:
+                    # Read before the rows, so a bump during the query triggers another reload
+                    version = reminder_version(db.session) if self.signal_every else None
+                    rows = upcoming_reminders(db.session, self.capacity)
+                finally:
+                    db.session.remove()
+        except Exception:
+            with self.lock:
+                self.changed_during_refill = None
+            raise
+
+        with self.lock:
+            self.heap = [(self.retry_at.get(expense_id) or _as_utc_naive(at), expense_id) for at, expense_id in rows]
+            self.due_at = {expense_id: at for at, expense_id in self.heap}
+            self.horizon = max(self.due_at.values()) if len(rows) >= self.capacity else None
+            # Changes made while the query ran may be missing from its snapshot
+            changes, self.changed_during_refill = self.changed_during_refill, None
+            for expense_id, at in changes.items():
+                self.due_at.pop(expense_id, None)
+                if at is not None and (self.horizon is None or at <= self.horizon):
+                    self.due_at[expense_id] = at
+                    self.heap.append((at, expense_id))
+            heapq.heapify(self.heap)
+            self.loaded_at = self.signal_checked_at = datetime.utcnow()
+            self.seen_version = version
+            self.stats['refills'] += 1
+        self.wakeup.set()
+
+    def schedule(self, expense_id: int, reminder_at: Optional[datetime]):
+        """Add, move or (with reminder_at=None) cancel an expense's reminder."""
+        if reminder_at is not None:
+            reminder_at = _as_utc_naive(reminder_at)
+        with self.lock:
+            # A new time from the user starts the attempt count over
+            self.failures.pop(expense_id, None)
+            self.retry_at.pop(expense_id, None)
+            if self.changed_during_refill is not None:
+                self.changed_during_refill[expense_id] = reminder_at
+            if reminder_at is None:
+                self.due_at.pop(expense_id, None)
+                return
+            if self.horizon is not None and reminder_at > self.horizon:
+                # Outside the loaded window; the next refill will find it
+                self.due_at.pop(expense_id, None)
+                return
+            self.due_at[expense_id] = reminder_at
+            heapq.heappush(self.heap, (reminder_at, expense_id))
+            is_next = self.heap[0] == (reminder_at, expense_id)
+        if is_next:
+            self.wakeup.set()
+
+    def cancel(self, expense_id: int):
+        self.schedule(expense_id, None)
+
+    def _signalled(self, now: datetime) -> bool:
+        """Whether another worker changed reminders since the last load (checked every signal_every)."""
+        from routes.database import db
+
+        if self.signal_every is None or now - self.signal_checked_at < self.signal_every:
+            return False
+        self.signal_checked_at = now
+        with self.app.app_context():
+            try:
+                return reminder_version(db.session) != self.seen_version
+            finally:
+                db.session.remove()
+
+    def _pop_due(self, now: datetime):
+        """Pop every due entry; return (due_ids, next_deadline, needs_refill)."""
+        due = []
+        with self.lock:
+            while self.heap:
+                at, expense_id = self.heap[0]
+                if self.due_at.get(expense_id) != at:
+                    heapq.heappop(self.heap)  # cancelled or rescheduled
+                    continue
+                if at > now:
+                    break
+                heapq.heappop(self.heap)
+                del self.due_at[expense_id]
+                due.append(expense_id)
+            next_at = self.heap[0][0] if self.heap else None
+            needs_refill = not self.heap and self.horizon is not None
+        return due, next_at, needs_refill
+
+    def _fire(self, expense_ids):
+        stats = dispatch_due_reminders(self.app, self.mail, expense_ids=expense_ids,
+                                       chunk_size=self.chunk_size, workers=self.workers)
+        self.stats['fired'] += 1
+        self.stats['sent'] += stats['sent']
+        self.stats['failed'] += stats['failed']
+        failed = set(stats['failed_ids'])
+        with self.lock:
+            for expense_id in expense_ids:
+                if expense_id not in failed:
+                    self.failures.pop(expense_id, None)
+                    self.retry_at.pop(expense_id, None)
+            attempts = {expense_id: self.failures.get(expense_id, 0) + 1 for expense_id in failed}
+
+        give_up = [expense_id for expense_id, count in attempts.items() if count >= self.max_attempts]
+        if give_up:
+            print(f"Reminder timer: giving up on {len(give_up)} reminders after {self.max_attempts} attempts")
+            try:
+                with self.app.app_context():
+                    from routes.database import db
+                    try:
+                        mark_reminders_sent(db.session, give_up)
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                print(f"Error marking reminders given up: {e}")
+        now = datetime.utcnow()
+        for expense_id, count in attempts.items():
+            if expense_id in give_up:
+                self.cancel(expense_id)
+                continue
+            retry_at = now + self.retry * 2 ** (count - 1)
+            self.schedule(expense_id, retry_at)
+            with self.lock:
+                self.failures[expense_id] = count
+                self.retry_at[expense_id] = retry_at
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.wakeup.clear()
+                if not self.active.is_set():
+                    self.wakeup.wait()
+                    continue
+                now = datetime.utcnow()
+                if (self.loaded_at is None or (self.resync and now - self.loaded_at >= self.resync)
+                        or self._signalled(now)):
+                    # Picks up reminders written by other processes
+                    self.refill()
+                due, next_at, needs_refill = self._pop_due(now)
+                if due:
+                    self._fire(due)
+                    continue
+                if needs_refill:
+                    self.refill()
+                    continue
+
+                timeout = (next_at - now).total_seconds() if next_at else None
+                if self.resync:
+                    until_resync = (self.loaded_at + self.resync - now).total_seconds()
+                    timeout = until_resync if timeout is None else min(timeout, until_resync)
+                if self.signal_every:
+                    until_check = (self.signal_checked_at + self.signal_every - now).total_seconds()
+                    timeout = until_check if timeout is None else min(timeout, until_check)
+                self.wakeup.wait(max(timeout, 0) if timeout is not None else None)
+            except Exception as e:
+                print(f"Reminder timer error: {e}")
+                self.wakeup.wait(30)
+
+    def status(self) -> dict:
+        with self.lock:
+            next_at = min((at for at, expense_id in self.heap if self.due_at.get(expense_id) == at), default=None)
+            return {
+                'running': bool(self.thread and self.thread.is_alive()),
+                'active': self.active.is_set(),
+                'scheduled': len(self.due_at),
+                'retrying': len(self.retry_at),
+                'next_due': next_at.isoformat() if next_at else None,
+                'window_complete': self.horizon is None,
+                **self.stats,
+            }
@@ -0,0 +1,171 @@
+"""
+Tuition Conflict Service - clash checks and free-slot search for reschedules.
+
+Classes have a start time but no stored length, so every class is taken to
+last TUITION_CLASS_MINUTES. For a given date, the tutor's classes (weekly
+slots plus pending and confirmed reschedules, via `WeeklySchedule.classes_on`)
+become a start-sorted interval list with a running maximum of end times:
+a clash check is a bisect on the starts plus a look at that running
+maximum, so it is O(log n) for the common "no clash" answer. Interval lists
+are memoised on the cached schedule, which is rebuilt whenever the tutor's
+tuition data changes.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from typing import Iterable, List, Optional
+
+from services.tuition_schedule import ACTIVE_RESCHEDULE_STATUSES
+
+
+# Free-slot suggestions stay within this part of the day, on this grid
+DAY_START_MINUTES = 7 * 60
+DAY_END_MINUTES = 22 * 60
+SLOT_STEP_MINUTES = 30
+MAX_CACHED_DAYS = 62
+
+# Cached schedules are shared by request threads
+_intervals_lock = threading.Lock()
+
+
+def class_minutes() -> int:
+    return int(os.environ.get('TUITION_CLASS_MINUTES', '60'))
+
+
+def to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DayIntervals:
+    """One date's classes as [start, end) minute intervals sorted by start."""
+
+    def __init__(self, classes: Iterable, length: int):
+        entries = []
+        for entry in classes:
+            if entry.start is None:
+                continue
+            start = to_minutes(entry.start)
+            key = ('reschedule', entry.reschedule.id) if entry.reschedule else ('class', entry.record.id)
+            entries.append(SimpleNamespace(start=start, end=start + length, key=key,
+                                           tuition_id=entry.record.id, student_name=entry.student_name))
+        entries.sort(key=lambda e: (e.start, e.end))
+        self.entries = entries
+        self.starts = [e.start for e in entries]
+        # max_end[i]: latest end among entries[0..i]
+        self.max_end = []
+        latest = -1
+        for e in entries:
+            latest = max(latest, e.end)
+            self.max_end.append(latest)
+
+    def conflicts(self, start: int, end: int, exclude: Iterable = ()) -> list:
+        """Classes overlapping [start, end), ignoring those whose key is in `exclude`."""
+        exclude = set(exclude)
+        # Only entries starting before `end` can overlap
+        index = bisect_left(self.starts, end) - 1
+        found = []
+        while index >= 0 and self.max_end[index] > start:
+            entry = self.entries[index]
+            if entry.end > start and entry.key not in exclude:
+                found.append(entry)
+            index -= 1
+        found.reverse()
+        return found
+
+    def free_starts(self, length: int, exclude: Iterable = (), after: int = DAY_START_MINUTES) -> List[int]:
+        """Grid-aligned start minutes in the day window where a `length`-minute class fits."""
+        exclude = set(exclude)
+        busy = [(e.start, e.end) for e in self.entries if e.key not in exclude]
+        first = max(after, DAY_START_MINUTES)
+        candidate = -(-first // SLOT_STEP_MINUTES) * SLOT_STEP_MINUTES
+        found, index = [], 0
+        while candidate + length <= DAY_END_MINUTES:
+            # Skip intervals that end before the candidate; busy is start-sorted
+            while index < len(busy) and busy[index][1] <= candidate:
+                index += 1
+            clash = None
+            for start, end in busy[index:]:
+                if start >= candidate + length:
+                    break
+                if end > candidate:
+                    clash = end
+                    break
+            if clash is None:
+                found.append(candidate)
+                candidate += SLOT_STEP_MINUTES
+            else:
+                candidate = -(-clash // SLOT_STEP_MINUTES) * SLOT_STEP_MINUTES
+        return found
+
+
+def intervals_on(schedule, day: date) -> DayIntervals:
+    """Memoised interval list for `day` on a (version-stamped, cached) schedule."""
+    length = class_minutes()
+    cached = schedule.intervals.get(day)
+    if cached is not None and cached[0] == length:
+        return cached[1]
+    intervals = DayIntervals(schedule.classes_on(day, statuses=ACTIVE_RESCHEDULE_STATUSES), length)
+    with _intervals_lock:
+        while len(schedule.intervals) >= MAX_CACHED_DAYS:
+            schedule.intervals.pop(next(iter(schedule.intervals)))
+        schedule.intervals[day] = (length, intervals)
+    return intervals
+
+
+def moving_keys(record_id: int, original_date: date, new_date: date,
+                reschedule_id: Optional[int] = None) -> set:
+    """Classes a reschedule replaces, so moving a class never clashes with itself."""
+    keys = set()
+    if original_date == new_date:
+        keys.add(('class', record_id))
+    if reschedule_id is not None:
+        keys.add(('reschedule', reschedule_id))
+    return keys
+
+
+def find_conflicts(schedule, day: date, start: time, length: Optional[int] = None,
+                   exclude: Iterable = ()) -> list:
+    """Classes on `day` overlapping a class starting at `start`."""
+    begin = to_minutes(start)
+    return intervals_on(schedule, day).conflicts(begin, begin + (length or class_minutes()), exclude)
+
+
+def next_free_slots(schedule, from_day: date, length: Optional[int] = None, count: int = 5,
+                    exclude: Iterable = (), after: Optional[datetime] = None, near: Optional[time] = None,
+                    days_ahead: int = 14) -> list:
+    """
+    The first `count` clash-free (date, 'HH:MM') starts from `from_day` on.
+
+    `after` skips times already past on its own date; `near` orders
+    `from_day`'s slots by closeness to the time the tutor asked for.
+    """
+    length = length or class_minutes()
+    exclude = set(exclude)
+    slots = []
+    for offset in range(days_ahead):
+        day = from_day + timedelta(days=offset)
+        earliest = DAY_START_MINUTES
+        if after is not None:
+            if day < after.date():
+                continue
+            if day == after.date():
+                earliest = to_minutes(after.time()) + 1
+        starts = intervals_on(schedule, day).free_starts(length, exclude, earliest)
+        if offset == 0 and near is not None:
+            starts.sort(key=lambda start: abs(start - to_minutes(near)))
+        for start in starts:
+            slots.append((day, format_minutes(start)))
+            if len(slots) >= count:
+                return slots
+    return slots
+
+
+def describe_conflict(entry, day: date) -> str:
+    return f"{entry.student_name} ({format_minutes(entry.start)}–{format_minutes(entry.end)} on {day.strftime('%a, %b %d')})"
@@ -0,0 +1,147 @@
+"""
+Tuition Holiday Service - move every class off a holiday in one go.
+
+For a date range, the classes that would be held (weekly slots and classes
+already rescheduled onto those dates) are read from the cached
+`WeeklySchedule`. Each gets a proposed replacement: the free slot closest
+to its usual time on the earliest day after the holiday, avoiding the
+tutor's other classes and the slots already handed out in the same plan.
+Applying a plan creates or moves all `TuitionReschedule` rows in a single
+transaction; every row it touches is left pending.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+from services.tuition_conflicts import (class_minutes, describe_conflict, find_conflicts, format_minutes,
+                                        intervals_on, moving_keys, to_minutes)
+from services.tuition_schedule import ACTIVE_RESCHEDULE_STATUSES, parse_class_time
+
+
+MAX_HOLIDAY_DAYS = 31
+SEARCH_DAYS = 14
+
+
+def affected_classes(schedule, start: date, end: date) -> List[dict]:
+    """Classes held between start and end inclusive, in date and time order."""
+    affected = []
+    day = start
+    while day <= end:
+        for entry in schedule.classes_on(day, statuses=ACTIVE_RESCHEDULE_STATUSES):
+            change = entry.reschedule
+            affected.append({
+                'key': f"reschedule-{change.id}" if change else f"class-{entry.record.id}-{day.isoformat()}",
+                'tuition_id': entry.record.id,
+                'student_name': entry.student_name,
+                'reschedule_id': change.id if change else None,
+                'original_date': day,
+                'original_time': change.new_time if change else entry.record.tuition_time,
+                'start': entry.start,
+            })
+        day += timedelta(days=1)
+    return affected
+
+
+def _overlaps(planned: list, start: int, end: int) -> bool:
+    return any(s < end and start < e for s, e in planned)
+
+
+def plan_holiday(schedule, start: date, end: date, length: Optional[int] = None,
+                 search_days: int = SEARCH_DAYS) -> List[dict]:
+    """
+    Affected classes with a proposed `new_date`/`new_time` each.
+
+    Proposals never clash with the tutor's schedule or with each other;
+    a class with no free slot in `search_days` is left with new_date None.
+    """
+    length = length or class_minutes()
+    proposals = affected_classes(schedule, start, end)
+    # Reschedules being moved no longer occupy their current slot
+    moved = {('reschedule', p['reschedule_id']) for p in proposals if p['reschedule_id']}
+    planned = {}
+    for proposal in proposals:
+        proposal['new_date'] = proposal['new_time'] = None
+        usual = to_minutes(proposal['start']) if proposal['start'] else None
+        for offset in range(1, search_days + 1):
+            day = end + timedelta(days=offset)
+            starts = intervals_on(schedule, day).free_starts(length, moved)
+            if usual is not None:
+                starts.sort(key=lambda minute: abs(minute - usual))
+            taken = planned.setdefault(day, [])
+            slot = next((minute for minute in starts if not _overlaps(taken, minute, minute + length)), None)
+            if slot is not None:
+                taken.append((slot, slot + length))
+                proposal['new_date'], proposal['new_time'] = day, format_minutes(slot)
+                break
+    return proposals
+
+
+def check_plan(schedule, proposals: List[dict], start: date, end: date,
+               length: Optional[int] = None, check_clashes: bool = True) -> List[str]:
+    """
+    Problems with a (possibly hand-edited) plan; empty when it can be applied.
+
+    With `check_clashes` False only missing slots and slots inside the
+    holiday are reported, for tutors who accept overlapping classes.
+    """
+    length = length or class_minutes()
+    moved = {('reschedule', p['reschedule_id']) for p in proposals if p['reschedule_id']}
+    problems, planned = [], {}
+    for proposal in proposals:
+        name, day = proposal['student_name'], proposal['new_date']
+        begin = parse_class_time(proposal['new_time'])
+        if day is None or begin is None:
+            problems.append(f"{name}: choose a new date and time")
+            continue
+        if start <= day <= end:
+            problems.append(f"{name}: {day.strftime('%a, %b %d')} is inside the holiday")
+            continue
+        if not check_clashes:
+            continue
+        exclude = moved | moving_keys(proposal['tuition_id'], proposal['original_date'], day,
+                                      proposal['reschedule_id'])
+        clashes = find_conflicts(schedule, day, begin, length, exclude)
+        if clashes:
+            problems.append(f"{name}: clashes with {', '.join(describe_conflict(c, day) for c in clashes)}")
+            continue
+        minute = to_minutes(begin)
+        taken = planned.setdefault(day, [])
+        if _overlaps(taken, minute, minute + length):
+            problems.append(f"{name}: overlaps another class moved to "
+                            f"{day.strftime('%a, %b %d')} {format_minutes(minute)}")
+        taken.append((minute, minute + length))
+    return problems
+
+
+def apply_plan(db_session, proposals: List[dict], reason: str) -> int:
+    """Create or move every TuitionReschedule in the plan; the caller commits."""
+    from routes.database import TuitionReschedule
+
+    existing = {}
+    ids = [p['reschedule_id'] for p in proposals if p['reschedule_id']]
+    if ids:
+        existing = {change.id: change for change in db_session.query(TuitionReschedule).filter(
+            TuitionReschedule.id.in_(ids))}
+
+    rows = []
+    for proposal in proposals:
+        change = existing.get(proposal['reschedule_id'])
+        if change is not None:
+            change.new_date = proposal['new_date']
+            change.new_time = proposal['new_time']
+            # A moved class needs confirming again
+            change.reschedule_status = 'pending'
+            if reason:
+                change.reason = reason
+        else:
+            rows.append(TuitionReschedule(
+                tuition_id=proposal['tuition_id'],
+                original_date=proposal['original_date'],
+                new_date=proposal['new_date'],
+                original_time=proposal['original_time'] or proposal['new_time'],
+                new_time=proposal['new_time'],
+                reason=reason,
+                reschedule_status='pending'
+            ))
+    db_session.add_all(rows)
+    return len(proposals)
@@ -0,0 +1,228 @@
+"""
+Tuition Reminder Service - class reminders from a precomputed daily index.
+
+The reminder job runs every minute, but which classes happen today only
+changes when the day rolls over or a tutor edits a record or reschedule.
+`TuitionSlotIndex` builds today's classes once from the cached weekly
+schedules (confirmed reschedules in or out of today included) and buckets
+each class under the minute its reminder should go out. A tick then only
+pops the slots that came due since the previous tick, so the steady-state
+cost is a dictionary lookup rather than a scan of every tuition record.
+"""
+
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from flask_mail import Message
+
+from services.email_render import render_batch
+from services.mailer import send_batch
+from services.tuition_schedule import get_schedules, weekday_index
+
+
+SLOT_FORMAT = '%H:%M'
+
+
+def lead_minutes() -> int:
+    """How long before class the reminder goes out."""
+    return int(os.environ.get('TUITION_REMINDER_LEAD_MINUTES', '60'))
+
+
+def _lead_text(minutes: int) -> str:
+    hours, mins = divmod(max(minutes, 0), 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if mins or not parts:
+        parts.append(f"{mins} minute{'s' if mins != 1 else ''}")
+    return ' '.join(parts)
+
+
+def todays_classes(db_session, day: date, *, user_ids=None, opted_in_only: bool = True,
+                   recipient_override: Optional[str] = None) -> list:
+    """
+    Every class on `day` whose owner has tuition reminders on and an email.
+
+    Owners with a class that weekday (days_mask & bit) or a confirmed
+    reschedule onto `day` are found in SQL; their classes come from the
+    cached weekly schedules, which apply reschedules in both directions.
+    `user_ids`, `opted_in_only` and `recipient_override` serve on-demand
+    sends, as in the weekly report.
+    """
+    from sqlalchemy import select
+    from routes.database import TuitionRecord, TuitionReschedule, User, Profile
+
+    moved_in = select(TuitionReschedule.tuition_id).where(
+        TuitionReschedule.reschedule_status == 'confirmed',
+        TuitionReschedule.new_date == day)
+    tutors = select(TuitionRecord.user_id).where(
+        TuitionRecord.on_day(weekday_index(day)) | TuitionRecord.id.in_(moved_in))
+    query = db_session.query(
+        User.id, User.tuition_schedule_version, User.username,
+        Profile.profile_name, Profile.email
+    ).outerjoin(Profile, Profile.user_id == User.id
+    ).filter(User.id.in_(tutors))
+    if opted_in_only:
+        query = query.filter(User.tuition_reminder == True)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(list(user_ids)))
+    if not recipient_override:
+        query = query.filter(Profile.email.isnot(None), Profile.email != '')
+    owners = query.all()
+    if not owners:
+        return []
+
+    schedules = get_schedules(db_session, {row.id: row.tuition_schedule_version for row in owners})
+    return [
+        {
+            'tuition_id': entry.record.id,
+            'user_id': owner.id,
+            'student_name': entry.student_name,
+            'address': entry.record.address,
+            'amount': entry.record.amount,
+            'starts_at': datetime.combine(day, entry.start),
+            'display_name': owner.profile_name or owner.username,
+            'email': owner.email or recipient_override,
+        }
+        for owner in owners
+        for entry in schedules[owner.id].classes_on(day)
+        if entry.start is not None
+    ]
+
+
+class TuitionSlotIndex:
+    """Today's tuition reminders keyed by the 'HH:MM' minute they are due."""
+
+    def __init__(self, refresh_minutes: int = 15):
+        self.day = None
+        self.slots = {}
+        self.built_at = None
+        self.last_tick = None
+        self.dirty = True
+        self.refresh = timedelta(minutes=refresh_minutes)
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        """Rebuild on the next tick (called after tuition edits)."""
+        self.dirty = True
+
+    def resume(self):
+        """Forget the last tick after a pause, so slots missed meanwhile are not sent late."""
+        with self.lock:
+            self.last_tick = None
+            self.dirty = True
+
+    def _needs_rebuild(self, now: datetime) -> bool:
+        # Other workers' edits only reach the leader through the periodic refresh
+        return (self.dirty or self.day != now.date()
+                or self.built_at is None or now - self.built_at >= self.refresh)
+
+    def rebuild(self, db_session, now: datetime):
+        lead = timedelta(minutes=lead_minutes())
+        slots = {}
+        for item in todays_classes(db_session, now.date()):
+            due = item['starts_at'] - lead
+            if due.date() != now.date():
+                # Class just after midnight: remind at the start of the day instead
+                due = datetime.combine(now.date(), datetime.min.time())
+            slots.setdefault(due.strftime(SLOT_FORMAT), []).append(item)
+
+        if self.day == now.date() and self.last_tick:
+            # Same day: drop slots already handled so a rebuild never resends
+            handled = self.last_tick.strftime(SLOT_FORMAT)
+            slots = {slot: items for slot, items in slots.items() if slot > handled}
+        else:
+            self.last_tick = None
+        self.day = now.date()
+        self.slots = slots
+        self.built_at = now
+        self.dirty = False
+
+    def take_due(self, db_session, now: datetime) -> list:
+        """
+        Pop every reminder due since the last tick, rebuilding the index when stale.
+
+        Slots from before the window (first tick of the day, of this worker or
+        after a pause) are discarded, and so are reminders for classes that
+        have already started by the time a late tick gets to them.
+        """
+        now = now.replace(second=0, microsecond=0)
+        current = now.strftime(SLOT_FORMAT)
+        with self.lock:
+            if self._needs_rebuild(now):
+                self.rebuild(db_session, now)
+            # With no previous tick only the current minute counts
+            after = self.last_tick.strftime(SLOT_FORMAT) if self.last_tick else None
+            due = []
+            for key in [slot for slot in self.slots if slot <= current]:
+                items = self.slots.pop(key)
+                if key == current or (after is not None and key > after):
+                    due.extend(items)
+            self.last_tick = now
+        started = [item for item in due if item['starts_at'] <= now]
+        if started:
+            print(f"Tuition reminders: skipped {len(started)} for classes that already started")
+        return [item for item in due if item['starts_at'] > now]
+
+    def status(self) -> dict:
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'slots': len(self.slots),
+            'pending': sum(len(items) for items in self.slots.values()),
+            'next_slot': min(self.slots) if self.slots else None,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'last_tick': self.last_tick.isoformat() if self.last_tick else None,
+        }
+
+
+# Shared by the scheduler job and the tuition routes that invalidate it
+slot_index = TuitionSlotIndex(int(os.environ.get('TUITION_INDEX_REFRESH_MINUTES', '15')))
+
+
+def invalidate_index():
+    slot_index.invalidate()
+
+
+def build_tuition_messages(items, now: datetime) -> list:
+    """[(tuition_id, Message)] for due reminders, rendered in one batch."""
+    bodies = render_batch('email_tuition_reminder.html', (
+        {
+            'reminder_time': now.strftime('%A, %B %d, %Y %I:%M %p'),
+            'hours_remaining': _lead_text(int((item['starts_at'] - now).total_seconds() // 60)),
+            'student_name': item['student_name'],
+            'class_time': item['starts_at'].strftime('%I:%M %p'),
+            'address': item['address'],
+            'amount': f"{(item['amount'] or 0):,.2f}",
+        }
+        for item in items
+    ))
+    return [
+        (item['tuition_id'], Message(subject=f"Tuition reminder: {item['student_name']} at "
+                                             f"{item['starts_at'].strftime('%I:%M %p')}",
+                                     recipients=[item['email']], html=html))
+        for item, html in zip(items, bodies)
+    ]
+
+
+def send_tuition_reminders(app, mail, *, now: Optional[datetime] = None, index: Optional[TuitionSlotIndex] = None,
+                           chunk_size: int = 50, workers: int = 4) -> dict:
+    """One scheduler tick: deliver the reminders whose slot has come due."""
+    from routes.database import db
+
+    index = index or slot_index
+    now = now or datetime.now()
+    with app.app_context():
+        due = index.take_due(db.session, now)
+        if not due:
+            db.session.close()
+            return {'due': 0, 'sent': 0, 'failed': 0}
+
+        # Always sent straight away, even to digest-mode users: the daily
+        # digest goes out after most classes have already started
+        messages = build_tuition_messages(due, now)
+        db.session.close()
+
+    sent, failed = send_batch(app, mail, messages, chunk_size=chunk_size, workers=workers)
+    return {'due': len(due), 'sent': len(sent), 'failed': len(failed)}
@@ -0,0 +1,203 @@
+"""
+Tuition Schedule Service - cached per-user weekly tuition schedules.
+
+A `WeeklySchedule` combines a tutor's records with their pending and
+confirmed reschedules into per-weekday, time-sorted slots plus the page
+totals. Completed reschedules from today on are kept too, so a class that
+was moved and already held never reappears on its original date. The tuition page, the routine PDF export and the reminder job all
+read it instead of re-querying and regrouping records on every use.
+
+Schedules are cached in process and stamped with `User.tuition_schedule_version`.
+Every tuition write bumps that version in the same transaction, so a cached
+schedule is only reused while it matches the version on the (already
+loaded) user row. This also keeps other workers' caches honest.
+"""
+
+import threading
+from collections import OrderedDict
+from collections import defaultdict
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+
+
+MAX_CACHED_SCHEDULES = 512
+ACTIVE_RESCHEDULE_STATUSES = ('pending', 'confirmed')
+COMPLETED_RESCHEDULE_STATUS = 'completed'
+
+_schedules = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def parse_class_time(value: Optional[str]):
+    """'16:30' / '04:30 PM' -> time, or None if missing or unparseable."""
+    if not value:
+        return None
+    for fmt in ('%H:%M', '%I:%M %p', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value.strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def weekday_index(day: date) -> int:
+    """Weekday in the tuition format: 0=Sunday ... 6=Saturday."""
+    return (day.weekday() + 1) % 7
+
+
+def _time_key(entry):
+    start = entry.start
+    return (start is None, start or datetime.min.time(), entry.student_name.lower())
+
+
+def _record_view(record):
+    """Detached copy of a TuitionRecord with just what the schedule consumers read."""
+    return SimpleNamespace(
+        id=record.id, user_id=record.user_id, student_name=record.student_name,
+        total_days=record.total_days, total_completed=record.total_completed,
+        completed_date=record.completed_date, address=record.address, amount=record.amount,
+        tuition_time=record.tuition_time, days_mask=record.days_mask, days=record.days,
+        start=parse_class_time(record.tuition_time),
+    )
+
+
+def _reschedule_view(reschedule, record):
+    return SimpleNamespace(
+        id=reschedule.id, tuition_id=reschedule.tuition_id, tuition=record,
+        original_date=reschedule.original_date, new_date=reschedule.new_date,
+        original_time=reschedule.original_time, new_time=reschedule.new_time,
+        reason=reschedule.reason, reschedule_status=reschedule.reschedule_status,
+        created_at=reschedule.created_at,
+    )
+
+
+class WeeklySchedule:
+    """One tutor's records grouped into weekday slots, plus active and completed reschedules."""
+
+    def __init__(self, user_id: int, version: int, records: list, reschedules: list):
+        self.user_id = user_id
+        self.version = version
+        # Most completed first, as the student list has always shown them
+        self.records = sorted(records, key=lambda r: r.total_completed, reverse=True)
+        self.by_day = {day: [] for day in range(7)}
+        for record in records:
+            for day in record.days:
+                self.by_day[day].append(record)
+        for slots in self.by_day.values():
+            slots.sort(key=_time_key)
+        # Newest first; only pending and confirmed ones are listed
+        active = [r for r in reschedules if r.reschedule_status in ACTIVE_RESCHEDULE_STATUSES]
+        self.reschedules = sorted(active, key=lambda r: r.created_at or datetime.min, reverse=True)
+        # original_date -> records whose class there was moved and has already been held
+        self.held_away = defaultdict(set)
+        for r in reschedules:
+            if r.reschedule_status == COMPLETED_RESCHEDULE_STATUS:
+                self.held_away[r.original_date].add(r.tuition_id)
+
+        self.total_amount = sum(r.amount for r in records)
+        self.total_students = len(records)
+        self.total_completed_classes = sum(r.total_completed for r in records)
+        self.total_classes = sum(r.total_days for r in records)
+        # date -> clash-check intervals, filled lazily by services.tuition_conflicts
+        self.intervals = {}
+
+    def classes_on(self, day: date, statuses: Iterable[str] = ('confirmed',)) -> list:
+        """
+        Classes actually held on `day`, time-sorted.
+
+        Weekly slots for that weekday, minus classes rescheduled away from
+        `day` (including moved classes already held elsewhere), plus classes
+        rescheduled onto it (at their new time).
+        """
+        statuses = set(statuses)
+        active = [r for r in self.reschedules if r.reschedule_status in statuses]
+        moved_away = {r.tuition_id for r in active if r.original_date == day}
+        moved_away |= self.held_away.get(day, set())
+
+        classes = [SimpleNamespace(record=record, start=record.start, student_name=record.student_name,
+                                   reschedule=None)
+                   for record in self.by_day[weekday_index(day)] if record.id not in moved_away]
+        for change in active:
+            if change.new_date == day and change.tuition is not None:
+                classes.append(SimpleNamespace(
+                    record=change.tuition, student_name=change.tuition.student_name, reschedule=change,
+                    start=parse_class_time(change.new_time) or change.tuition.start))
+        classes.sort(key=_time_key)
+        return classes
+
+
+def _build_schedules(db_session, versions: Dict[int, int]) -> Dict[int, WeeklySchedule]:
+    """Build schedules for many users with one query per table."""
+    from sqlalchemy import and_, or_
+    from routes.database import TuitionRecord, TuitionReschedule
+
+    user_ids = list(versions)
+    records = {uid: {} for uid in user_ids}
+    for record in db_session.query(TuitionRecord).filter(TuitionRecord.user_id.in_(user_ids)):
+        records[record.user_id][record.id] = _record_view(record)
+
+    reschedules = {uid: [] for uid in user_ids}
+    owner = {record_id: uid for uid, by_id in records.items() for record_id in by_id}
+    if owner:
+        for change in db_session.query(TuitionReschedule).filter(
+                TuitionReschedule.tuition_id.in_(list(owner)),
+                or_(TuitionReschedule.reschedule_status.in_(ACTIVE_RESCHEDULE_STATUSES),
+                    # Older completed moves only affect days that are already past
+                    and_(TuitionReschedule.reschedule_status == COMPLETED_RESCHEDULE_STATUS,
+                         TuitionReschedule.original_date >= date.today()))):
+            uid = owner[change.tuition_id]
+            reschedules[uid].append(_reschedule_view(change, records[uid][change.tuition_id]))
+
+    return {uid: WeeklySchedule(uid, versions[uid], list(records[uid].values()), reschedules[uid])
+            for uid in user_ids}
+
+
+def get_schedules(db_session, versions: Dict[int, int]) -> Dict[int, WeeklySchedule]:
+    """user_id -> schedule for every {user_id: schedule_version}, building only stale ones."""
+    found, missing = {}, {}
+    with _registry_lock:
+        for user_id, version in versions.items():
+            schedule = _schedules.get(user_id)
+            if schedule is not None and schedule.version == (version or 0):
+                _schedules.move_to_end(user_id)
+                found[user_id] = schedule
+            else:
+                missing[user_id] = version or 0
+
+    if missing:
+        built = _build_schedules(db_session, missing)
+        with _registry_lock:
+            for user_id, schedule in built.items():
+                current = _schedules.get(user_id)
+                # Never replace a schedule built from a newer version
+                if current is None or current.version <= schedule.version:
+                    _schedules[user_id] = schedule
+                    _schedules.move_to_end(user_id)
+            while len(_schedules) > MAX_CACHED_SCHEDULES:
+                _schedules.popitem(last=False)
+        found.update(built)
+    return found
+
+
+def get_schedule(db_session, user) -> WeeklySchedule:
+    """The schedule for a loaded User (e.g. current_user)."""
+    return get_schedules(db_session, {user.id: user.tuition_schedule_version})[user.id]
+
+
+def mark_changed(db_session, user_id: int) -> None:
+    """
+    Bump the user's schedule version in the current transaction; the caller commits.
+
+    Call this alongside any write to the user's tuition records or reschedules.
+    """
+    from routes.database import User
+
+    db_session.query(User).filter(User.id == user_id).update(
+        {User.tuition_schedule_version: User.tuition_schedule_version + 1}, synchronize_session=False)
+    drop_schedule(user_id)
+
+
+def drop_schedule(user_id: int) -> None:
+    with _registry_lock:
+        _schedules.pop(user_id, None)
@@ -0,0 +1,171 @@
+"""
+Tuition Session Service - per-class attendance history.
+
+Every class marked held (directly or through a completed reschedule) is
+appended to `tuition_session`; undo and corrections append an 'undone'
+row instead of editing history. The net number of classes on a date is
+completed minus undone, so attendance, earnings and streaks are grouped
+range scans over the (tuition_id, date) index. `total_completed` on the
+record is still maintained incrementally by the routes for the page.
+"""
+
+import calendar
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, func
+
+
+COMPLETED = 'completed'
+UNDONE = 'undone'
+STREAK_WINDOW_DAYS = 180
+
+
+def _net():
+    from routes.database import TuitionSession
+    return func.sum(case((TuitionSession.status == COMPLETED, 1), else_=-1))
+
+
+def log_session(db_session, tuition_id: int, day: date, status: str = COMPLETED,
+                reschedule_id: Optional[int] = None) -> None:
+    """Append one attendance event; the caller commits."""
+    from routes.database import TuitionSession
+
+    db_session.add(TuitionSession(tuition_id=tuition_id, date=day, status=status,
+                                  reschedule_id=reschedule_id))
+
+
+def last_held_date(db_session, tuition_id: int) -> Optional[date]:
+    """Most recent date with at least one class still counted as held."""
+    from routes.database import TuitionSession
+
+    row = db_session.query(TuitionSession.date).filter(
+        TuitionSession.tuition_id == tuition_id
+    ).group_by(TuitionSession.date).having(_net() > 0).order_by(
+        TuitionSession.date.desc()).first()
+    return row.date if row else None
+
+
+def undo_last_session(db_session, tuition_id: int) -> Optional[date]:
+    """Cancel the latest held class, whatever day it was; returns its date or None."""
+    day = last_held_date(db_session, tuition_id)
+    if day is not None:
+        log_session(db_session, tuition_id, day, UNDONE)
+    return day
+
+
+def undo_sessions(db_session, tuition_id: int, count: Optional[int] = None) -> int:
+    """
+    Cancel the latest `count` held classes (all of them when None); the caller commits.
+
+    Returns how many were undone, which is fewer than `count` when the log
+    holds fewer classes (e.g. progress entered before the log existed).
+    """
+    from routes.database import TuitionSession
+
+    net = _net()
+    undone = 0
+    for day, held in db_session.query(TuitionSession.date, net).filter(
+            TuitionSession.tuition_id == tuition_id
+    ).group_by(TuitionSession.date).having(net > 0).order_by(TuitionSession.date.desc()):
+        if count is not None and undone >= count:
+            break
+        take = held if count is None else min(held, count - undone)
+        for _ in range(take):
+            log_session(db_session, tuition_id, day, UNDONE)
+        undone += take
+    return undone
+
+
+def held_dates(db_session, tuition_ids: Iterable[int], start: date, end: date) -> Dict[int, Dict[date, int]]:
+    """tuition_id -> {date: classes held} for start..end inclusive."""
+    from routes.database import TuitionSession
+
+    ids = list(tuition_ids)
+    held = {tuition_id: {} for tuition_id in ids}
+    if not ids:
+        return held
+    net = _net()
+    for tuition_id, day, count in db_session.query(
+            TuitionSession.tuition_id, TuitionSession.date, net
+    ).filter(
+        TuitionSession.tuition_id.in_(ids),
+        TuitionSession.date >= start,
+        TuitionSession.date <= end
+    ).group_by(TuitionSession.tuition_id, TuitionSession.date).having(net > 0):
+        held[tuition_id][day] = count
+    return held
+
+
+def _excused_dates(db_session, tuition_ids, start: date, end: date) -> Dict[int, set]:
+    """Scheduled days that were moved elsewhere and so don't break a streak."""
+    from routes.database import TuitionReschedule
+
+    excused = {tuition_id: set() for tuition_id in tuition_ids}
+    for tuition_id, day in db_session.query(TuitionReschedule.tuition_id, TuitionReschedule.original_date).filter(
+            TuitionReschedule.tuition_id.in_(list(tuition_ids)),
+            TuitionReschedule.reschedule_status.in_(('confirmed', 'completed')),
+            TuitionReschedule.original_date >= start,
+            TuitionReschedule.original_date <= end):
+        excused[tuition_id].add(day)
+    return excused
+
+
+def _streak(days_mask: int, held: Dict[date, int], excused: set, today: date) -> int:
+    """Consecutive scheduled classes held, counting back from today."""
+    streak = 0
+    for offset in range(STREAK_WINDOW_DAYS + 1):
+        day = today - timedelta(days=offset)
+        if day in held:
+            streak += 1
+            continue
+        scheduled = days_mask & (1 << ((day.weekday() + 1) % 7))
+        if not scheduled or day in excused or day == today:
+            # Nothing due that day (or today's class may not have happened yet)
+            continue
+        break
+    return streak
+
+
+def monthly_summary(db_session, user_id: int, year: int, month: int, *, today: Optional[date] = None) -> dict:
+    """
+    Per-student attendance, earnings and current streak for one month.
+
+    `amount` is the fee for `total_days` classes, so a held class earns
+    amount / total_days.
+    """
+    from routes.database import TuitionRecord
+
+    today = today or date.today()
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    records = db_session.query(
+        TuitionRecord.id, TuitionRecord.student_name, TuitionRecord.amount,
+        TuitionRecord.total_days, TuitionRecord.days_mask
+    ).filter(TuitionRecord.user_id == user_id).order_by(TuitionRecord.student_name).all()
+    ids = [record.id for record in records]
+
+    in_month = held_dates(db_session, ids, start, end)
+    window_start = today - timedelta(days=STREAK_WINDOW_DAYS)
+    recent = held_dates(db_session, ids, window_start, today)
+    excused = _excused_dates(db_session, ids, window_start, today)
+
+    students = []
+    for record in records:
+        classes = sum(in_month[record.id].values())
+        per_class = (record.amount or 0) / record.total_days if record.total_days else 0
+        students.append({
+            'tuition_id': record.id,
+            'student_name': record.student_name,
+            'classes': classes,
+            'dates': sorted(day.isoformat() for day in in_month[record.id]),
+            'per_class': round(per_class, 2),
+            'earnings': round(classes * per_class, 2),
+            'streak': _streak(record.days_mask or 0, recent[record.id], excused[record.id], today),
+        })
+    return {
+        'month': f"{year:04d}-{month:02d}",
+        'classes': sum(student['classes'] for student in students),
+        'earnings': round(sum(student['earnings'] for student in students), 2),
+        'students': students,
+    }
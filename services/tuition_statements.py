@@ -0,0 +1,96 @@
+"""
+Tuition Statement Service - monthly per-student statements as plain data.
+
+A statement lists the classes a student actually had in the month (from
+the session log), the reschedules touching that month and the amount due
+at the per-class rate (`amount` / `total_days`). All of a tutor's students
+are collected together with one grouped query per table, so the batch PDF
+export costs the same handful of queries for 5 students or 50.
+"""
+
+import calendar
+from datetime import date
+
+from services.tuition_sessions import held_dates
+
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+STATEMENT_RESCHEDULE_STATUSES = ('pending', 'confirmed', 'completed', 'cancelled')
+
+
+def _month_reschedules(db_session, tuition_ids, start: date, end: date) -> dict:
+    """tuition_id -> reschedules moving a class out of or into the month, oldest first."""
+    from routes.database import TuitionReschedule
+
+    found = {tuition_id: [] for tuition_id in tuition_ids}
+    if not tuition_ids:
+        return found
+    for change in db_session.query(TuitionReschedule).filter(
+            TuitionReschedule.tuition_id.in_(tuition_ids),
+            TuitionReschedule.reschedule_status.in_(STATEMENT_RESCHEDULE_STATUSES),
+            ((TuitionReschedule.original_date >= start) & (TuitionReschedule.original_date <= end))
+            | ((TuitionReschedule.new_date >= start) & (TuitionReschedule.new_date <= end))
+    ).order_by(TuitionReschedule.original_date, TuitionReschedule.id):
+        found[change.tuition_id].append({
+            'original_date': change.original_date.isoformat(),
+            'original_time': change.original_time,
+            'new_date': change.new_date.isoformat(),
+            'new_time': change.new_time,
+            'status': change.reschedule_status,
+            'reason': change.reason or '',
+        })
+    return found
+
+
+def collect_statements(db_session, user_id: int, year: int, month: int) -> dict:
+    """
+    Every student's statement for one month, as JSON-able data.
+
+    Also the PDF cache key input: any held class, reschedule or fee change
+    in the month yields a different key.
+    """
+    from routes.database import Profile, TuitionRecord, User
+
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+
+    records = db_session.query(
+        TuitionRecord.id, TuitionRecord.student_name, TuitionRecord.address, TuitionRecord.amount,
+        TuitionRecord.total_days, TuitionRecord.total_completed, TuitionRecord.tuition_time,
+        TuitionRecord.days_mask
+    ).filter(TuitionRecord.user_id == user_id).order_by(TuitionRecord.student_name).all()
+    ids = [record.id for record in records]
+    held = held_dates(db_session, ids, start, end)
+    reschedules = _month_reschedules(db_session, ids, start, end)
+
+    tutor = db_session.query(User.username, Profile.profile_name).outerjoin(
+        Profile, Profile.user_id == User.id).filter(User.id == user_id).first()
+
+    statements = []
+    for record in records:
+        classes = sum(held[record.id].values())
+        per_class = (record.amount or 0) / record.total_days if record.total_days else 0
+        statements.append({
+            'tuition_id': record.id,
+            'student_name': record.student_name,
+            'address': record.address,
+            'tuition_time': record.tuition_time,
+            'days': [DAY_NAMES[day] for day in range(7) if (record.days_mask or 0) & (1 << day)],
+            'classes': classes,
+            'dates': [day.isoformat() for day in sorted(held[record.id])
+                      for _ in range(held[record.id][day])],
+            'reschedules': reschedules[record.id],
+            'fee': record.amount or 0,
+            'total_days': record.total_days,
+            'total_completed': record.total_completed,
+            'per_class': round(per_class, 2),
+            'amount_due': round(classes * per_class, 2),
+        })
+
+    return {
+        'month': f"{year:04d}-{month:02d}",
+        'month_label': start.strftime('%B %Y'),
+        'tutor_name': (tutor.profile_name or tutor.username) if tutor else '',
+        'total_due': round(sum(statement['amount_due'] for statement in statements), 2),
+        'statements': statements,
+    }
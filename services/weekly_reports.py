@@ -0,0 +1,131 @@
+"""
+Weekly Report Service - set-based weekly expense summaries.
+
+All recipients' numbers come from three grouped queries (totals, category
+breakdown, and the five latest transactions per user via ROW_NUMBER), not
+one query per user. Rendering uses the shared compiled email templates and
+delivery goes through the pooled mailer, so report night scales with the
+number of recipients rather than recipients x queries.
+"""
+
+import os
+from typing import Iterable, Optional
+
+from flask_mail import Message
+from sqlalchemy import func
+
+from services.email_render import render_batch
+from services.mailer import send_batch
+
+
+TOP_TRANSACTIONS = 5
+
+
+def _recipients(db_session, user_ids: Optional[Iterable[int]], opted_in_only: bool) -> dict:
+    """user_id -> email for everyone who should get a report."""
+    from routes.database import User, Profile
+
+    query = db_session.query(User.id, User.username, Profile.email).outerjoin(
+        Profile, Profile.user_id == User.id)
+    if opted_in_only:
+        query = query.filter(User.weekly_expense_report == True)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(list(user_ids)))
+
+    test_override = os.environ.get('REPORT_TEST_EMAIL')
+    recipients = {}
+    for user_id, username, email in query.all():
+        if email:
+            recipients[user_id] = email
+        elif isinstance(username, str) and '@' in username and '.' in username:
+            recipients[user_id] = username
+        elif test_override:
+            recipients[user_id] = test_override
+    return recipients
+
+
+def collect_weekly_stats(db_session, user_ids, start_date, end_date) -> dict:
+    """Totals, category breakdown and latest transactions for many users at once."""
+    from routes.database import Expense
+
+    ids = list(user_ids)
+    stats = {uid: {'total': 0.0, 'count': 0, 'categories': [], 'transactions': []} for uid in ids}
+    if not ids:
+        return stats
+
+    in_range = (
+        Expense.user_id.in_(ids),
+        Expense.date >= start_date,
+        Expense.date <= end_date,
+    )
+
+    for user_id, total, count in db_session.query(
+            Expense.user_id, func.sum(Expense.amount), func.count(Expense.id)
+    ).filter(*in_range).group_by(Expense.user_id):
+        stats[user_id]['total'] = float(total or 0)
+        stats[user_id]['count'] = count
+
+    category = func.coalesce(Expense.category, 'Other')
+    for user_id, cat, total, count in db_session.query(
+            Expense.user_id, category, func.sum(Expense.amount), func.count(Expense.id)
+    ).filter(*in_range).group_by(Expense.user_id, category).order_by(
+            Expense.user_id, func.sum(Expense.amount).desc()):
+        stats[user_id]['categories'].append((cat, float(total or 0), count))
+
+    rank = func.row_number().over(
+        partition_by=Expense.user_id,
+        order_by=(Expense.date.desc(), Expense.created_at.desc(), Expense.id.desc())
+    ).label('rank')
+    ranked = db_session.query(
+        Expense.user_id, Expense.name, Expense.amount, Expense.category, Expense.date, rank
+    ).filter(*in_range).subquery()
+    for row in db_session.query(ranked).filter(ranked.c.rank <= TOP_TRANSACTIONS).order_by(
+            ranked.c.user_id, ranked.c.rank):
+        stats[row.user_id]['transactions'].append(row)
+
+    return stats
+
+
+def _report_context(user_stats: dict, start_date, end_date) -> dict:
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'total': user_stats['total'],
+        'count': user_stats['count'],
+        'categories': [{'name': name, 'amount': amount, 'count': count}
+                       for name, amount, count in user_stats['categories']],
+        'transactions': user_stats['transactions'],
+    }
+
+
+def _subject(start_date, end_date) -> str:
+    return f"FinBuddy Weekly Report ({start_date} - {end_date})"
+
+
+def build_weekly_report_messages(db_session, start_date, end_date, *, user_ids=None,
+                                 opted_in_only: bool = True, recipient_override: Optional[str] = None) -> list:
+    """[(user_id, Message)] for every recipient, built from the grouped queries."""
+    recipients = _recipients(db_session, user_ids, opted_in_only)
+    if recipient_override and user_ids is not None:
+        for user_id in user_ids:
+            recipients.setdefault(user_id, recipient_override)
+
+    stats = collect_weekly_stats(db_session, recipients.keys(), start_date, end_date)
+    user_ids = list(recipients)
+    bodies = render_batch('email_weekly_report.html',
+                          (_report_context(stats[user_id], start_date, end_date) for user_id in user_ids))
+    subject = _subject(start_date, end_date)
+    return [(user_id, Message(subject=subject, recipients=[recipients[user_id]], html=html))
+            for user_id, html in zip(user_ids, bodies)]
+
+
+def send_weekly_reports(app, mail, start_date, end_date, *, chunk_size: int = 50, workers: int = 4) -> dict:
+    """Build and deliver every opted-in user's report; returns sent/failed counts."""
+    from routes.database import db
+
+    with app.app_context():
+        messages = build_weekly_report_messages(db.session, start_date, end_date)
+        db.session.close()
+
+    sent, failed = send_batch(app, mail, messages, chunk_size=chunk_size, workers=workers)
+    return {'recipients': len(messages), 'sent': len(sent), 'failed': len(failed)}
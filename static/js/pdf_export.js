@@ -0,0 +1,76 @@
+
+(function() {
+    'use strict';
+
+    // Export links: fetch the document, polling the job while a long render runs
+    const POLL_MS = 1500;
+
+    function saveBlob(blob, filename) {
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = filename;
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+        setTimeout(() => URL.revokeObjectURL(url), 10000);
+    }
+
+    function filenameOf(response, fallback) {
+        const match = /filename="?([^";]+)"?/.exec(response.headers.get('Content-Disposition') || '');
+        return match ? match[1] : fallback;
+    }
+
+    function poll(url) {
+        return fetch(url, { credentials: 'same-origin', headers: { Accept: 'application/json' } })
+            .then(response => response.json().then(data => {
+                if (!response.ok || data.status === 'failed') {
+                    throw new Error(data.error || 'Could not generate the PDF, please try again.');
+                }
+                if (data.download_url) return data.download_url;
+                return new Promise(resolve => setTimeout(resolve, POLL_MS)).then(() => poll(url));
+            }));
+    }
+
+    function exportDocument(link) {
+        const label = link.innerHTML;
+        link.classList.add('is-busy');
+        link.setAttribute('aria-busy', 'true');
+        link.textContent = '⏳ Preparing…';
+        const done = () => {
+            link.innerHTML = label;
+            link.classList.remove('is-busy');
+            link.removeAttribute('aria-busy');
+        };
+
+        fetch(link.href, { credentials: 'same-origin', headers: { Accept: 'application/json' } })
+            .then(response => {
+                if (response.redirected) {
+                    // Nothing to export; follow the server's redirect to show its message
+                    window.location.href = response.url;
+                    return;
+                }
+                if (response.status === 202) {
+                    return response.json().then(job => poll(job.poll_url)).then(url => {
+                        window.location.href = url;
+                    });
+                }
+                const type = response.headers.get('Content-Type') || '';
+                if (!response.ok || type.indexOf('application/json') !== -1) {
+                    return response.json().catch(() => ({})).then(data => {
+                        throw new Error(data.error || 'Could not generate the PDF, please try again.');
+                    });
+                }
+                return response.blob().then(blob => saveBlob(blob, filenameOf(response, 'export.pdf')));
+            })
+            .catch(error => alert(error.message))
+            .finally(done);
+    }
+
+    document.querySelectorAll('[data-pdf-export]').forEach(link => {
+        link.addEventListener('click', event => {
+            event.preventDefault();
+            if (!link.classList.contains('is-busy')) exportDocument(link);
+        });
+    });
+})();
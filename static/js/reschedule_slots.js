@@ -0,0 +1,60 @@
+
+(function() {
+    'use strict';
+
+    // Checks the chosen slot against the tutor's classes and suggests free ones
+    const form = document.querySelector('.reschedule-form');
+    if (!form) return;
+    const newDate = form.querySelector('#new_date');
+    const newTime = form.querySelector('#new_time');
+    const originalDate = form.querySelector('#original_date');
+    const box = document.getElementById('slot-suggestions');
+    const conflict = document.getElementById('slot-conflict');
+    const list = document.getElementById('slot-list');
+    const override = document.getElementById('slot-override');
+    let requestId = 0;
+
+    function render(data) {
+        box.hidden = false;
+        const clashes = data.conflicts || [];
+        conflict.hidden = clashes.length === 0;
+        override.hidden = clashes.length === 0;
+        conflict.textContent = clashes.length
+            ? '⚠️ Clashes with ' + clashes.map(c => c.description).join(', ')
+            : '';
+        list.innerHTML = '';
+        (data.slots || []).forEach(slot => {
+            const chip = document.createElement('button');
+            chip.type = 'button';
+            chip.className = 'slot-chip';
+            chip.textContent = slot.label;
+            chip.addEventListener('click', () => {
+                newDate.value = slot.date;
+                newTime.value = slot.time;
+                check();
+            });
+            list.appendChild(chip);
+        });
+    }
+
+    function check() {
+        if (!newDate.value) return;
+        const params = new URLSearchParams({ date: newDate.value, record_id: form.dataset.recordId });
+        if (newTime.value) params.set('time', newTime.value);
+        if (originalDate && originalDate.value) params.set('original_date', originalDate.value);
+        if (form.dataset.rescheduleId) params.set('reschedule_id', form.dataset.rescheduleId);
+        const current = ++requestId;
+        fetch(form.dataset.slotsUrl + '?' + params.toString(), { credentials: 'same-origin' })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                // Ignore answers to inputs the user has already changed
+                if (data && current === requestId) render(data);
+            })
+            .catch(() => {});
+    }
+
+    [newDate, newTime, originalDate].forEach(input => {
+        if (input) input.addEventListener('change', check);
+    });
+    check();
+})();
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Chatbot Load Benchmark
+
+Drives concurrent chat sessions against a running FinBuddy instance and
+reports throughput and latency percentiles for /api/chatbot. Each session
+registers (or logs in as) its own bench user, then sends a mix of
+fast-path and open-ended questions.
+
+Usage:
+    # 1. Start the mock LLM and the app pointed at it
+    python tools/mock_groq_server.py --port 8090
+    GROQ_API_KEY=mock GROQ_BASE_URL=http://127.0.0.1:8090 python app.py
+
+    # 2. Run the benchmark
+    python tools/bench_chatbot.py --base-url http://127.0.0.1:5000 \
+        --sessions 20 --messages 10
+
+Output:
+    Summary table on stdout; --json PATH also writes the raw numbers.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+
+QUESTIONS = [
+    "What did I spend this week?",
+    "Top category this month",
+    "How many classes left?",
+    "Who owes me?",
+    "How can I cut my food spending next month?",
+    "Explain where my money went and suggest a budget plan",
+    "When did I last pay for internet?",
+    "Should I save more given my tuition income?",
+]
+
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"|value="([^"]+)"[^>]*name="csrf_token"')
+
+
+def _csrf(session: requests.Session, url: str) -> str:
+    html = session.get(url, timeout=30).text
+    match = _CSRF_RE.search(html)
+    return (match.group(1) or match.group(2)) if match else ''
+
+
+def login_or_register(base_url: str, username: str, password: str) -> requests.Session:
+    """Return a session authenticated as `username`, registering it on first use."""
+    session = requests.Session()
+    token = _csrf(session, f"{base_url}/login")
+    resp = session.post(f"{base_url}/login", data={
+        'csrf_token': token, 'username': username, 'password': password
+    }, allow_redirects=False, timeout=30)
+    if resp.status_code in (301, 302):
+        return session
+
+    token = _csrf(session, f"{base_url}/register")
+    resp = session.post(f"{base_url}/register", data={
+        'csrf_token': token, 'username': username, 'password': password,
+        'email': f"{username}@bench.example.com"
+    }, allow_redirects=False, timeout=30)
+    if resp.status_code not in (301, 302):
+        raise RuntimeError(f"could not log in or register {username} (HTTP {resp.status_code})")
+    return session
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_session(base_url, index, messages, results, lock, think_time):
+    username = f"bench{index:04d}"[:15]
+    try:
+        session = login_or_register(base_url, username, 'bench-password-123')
+    except Exception as e:
+        with lock:
+            results['errors'][f'login:{type(e).__name__}'] += 1
+        return
+
+    for _ in range(messages):
+        question = random.choice(QUESTIONS)
+        t0 = time.perf_counter()
+        try:
+            resp = session.post(f"{base_url}/api/chatbot", json={'message': question}, timeout=60)
+            elapsed = (time.perf_counter() - t0) * 1000
+            data = resp.json() if resp.ok else {}
+            kind = 'fast_path' if data.get('intent') else 'llm'
+            with lock:
+                if resp.ok:
+                    results['latencies'].append(elapsed)
+                    results['by_kind'].setdefault(kind, []).append(elapsed)
+                    if 'trouble accessing my brain' in data.get('reply', ''):
+                        results['errors']['degraded_reply'] += 1
+                else:
+                    results['errors'][f'http_{resp.status_code}'] += 1
+        except Exception as e:
+            with lock:
+                results['errors'][type(e).__name__] += 1
+        if think_time:
+            time.sleep(random.uniform(0, think_time))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent /api/chatbot load benchmark')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--sessions', type=int, default=10, help='concurrent chat sessions')
+    parser.add_argument('--messages', type=int, default=10, help='messages per session')
+    parser.add_argument('--think-time', type=float, default=0.0, help='max random pause between messages (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write raw results to this file')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    base_url = args.base_url.rstrip('/')
+    results = {'latencies': [], 'by_kind': {}, 'errors': Counter()}
+    lock = threading.Lock()
+
+    threads = [
+        threading.Thread(target=run_session,
+                         args=(base_url, i, args.messages, results, lock, args.think_time))
+        for i in range(args.sessions)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies = results['latencies']
+    summary = {
+        'sessions': args.sessions,
+        'requests_ok': len(latencies),
+        'errors': dict(results['errors']),
+        'wall_seconds': round(wall, 2),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0,
+        'latency_ms': {p: round(percentile(latencies, p), 1) for p in (50, 90, 95, 99)},
+        'by_kind': {
+            kind: {'count': len(v), 'p50': round(percentile(v, 50), 1), 'p95': round(percentile(v, 95), 1)}
+            for kind, v in results['by_kind'].items()
+        },
+    }
+
+    print("=" * 50)
+    print("FinBuddy chatbot benchmark")
+    print("=" * 50)
+    print(f"Sessions: {args.sessions} x {args.messages} messages   Wall: {summary['wall_seconds']}s")
+    print(f"OK requests: {summary['requests_ok']}   Throughput: {summary['throughput_rps']} req/s")
+    print("Latency (ms): " + "  ".join(f"p{p}={v}" for p, v in summary['latency_ms'].items()))
+    for kind, stats in summary['by_kind'].items():
+        print(f"  {kind:<10} n={stats['count']:<5} p50={stats['p50']}  p95={stats['p95']}")
+    if summary['errors']:
+        print(f"Errors: {summary['errors']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Raw results written to {args.json}")
+    return 0 if latencies else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
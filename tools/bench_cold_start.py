@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+
+Measures how long a fresh interpreter takes to import the FinBuddy app,
+the cost every serverless cold start pays before serving a request. Each
+run is a new process so nothing is shared between samples.
+
+Two modes are compared:
+    lazy   - the app as shipped; ReportLab and the brand font load on the
+             first PDF render only
+    eager  - the PDF layouts (ReportLab + font registration) imported up
+             front, as the tuition blueprint used to do
+
+It also times the first routine PDF render in a lazy process, i.e. the
+one-off cost that moved from start-up to the first export.
+
+Usage:
+    python tools/bench_cold_start.py --runs 10
+    python tools/bench_cold_start.py --runs 10 --json cold_start.json
+
+The app is imported against a throwaway SQLite database with the
+scheduler disabled, so no services need to be running.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+{preload}
+import app
+print(time.perf_counter() - start)
+"""
+
+FIRST_RENDER_SNIPPET = """
+import time
+import app
+from services.pdf_render import render
+routine = {'days': [[{'student_name': 'Student', 'tuition_time': '16:00', 'address': 'Road 1'}]] * 7,
+           'total_students': 1, 'total_amount': 3000, 'total_classes': 12, 'brand_font': ''}
+start = time.perf_counter()
+render('routine', routine)
+first = time.perf_counter() - start
+start = time.perf_counter()
+render('routine', routine)
+print(first, time.perf_counter() - start)
+"""
+
+
+def _env(db_path: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'SCHEDULER_LEADER_ELECTION': 'false',
+        'ENABLE_TUITION_REMINDERS': 'false',
+        'ENABLE_ROUTINE_PRERENDER': 'false',
+        'PYTHONPATH': ROOT + os.pathsep + env.get('PYTHONPATH', ''),
+    })
+    return env
+
+
+def _run(code: str, env: dict) -> list:
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'benchmark failed')
+    return [float(value) for value in result.stdout.strip().splitlines()[-1].split()]
+
+
+def summarize(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        'runs': len(samples),
+        'median_ms': round(statistics.median(ordered) * 1000, 1),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 1),
+        'min_ms': round(ordered[0] * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=7, help='fresh processes per mode')
+    parser.add_argument('--json', help='also write the raw numbers to this path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, 'bench.db'))
+        # Warm-up: creates the SQLite tables and bytecode caches
+        _run(IMPORT_SNIPPET.format(preload=''), env)
+
+        samples = {'lazy': [], 'eager': []}
+        for _ in range(args.runs):
+            # Interleave modes so drift on the machine affects both equally
+            samples['lazy'].extend(_run(IMPORT_SNIPPET.format(preload=''), env))
+            samples['eager'].extend(_run(IMPORT_SNIPPET.format(preload='import services.pdf_layouts'), env))
+        first, warm = _run(FIRST_RENDER_SNIPPET, env)
+
+    report = {mode: summarize(values) for mode, values in samples.items()}
+    report['saved_ms'] = round(report['eager']['median_ms'] - report['lazy']['median_ms'], 1)
+    report['first_render_ms'] = round(first * 1000, 1)
+    report['warm_render_ms'] = round(warm * 1000, 1)
+
+    print(f"{'mode':<8}{'median':>10}{'mean':>10}{'min':>10}{'max':>10}")
+    for mode in ('lazy', 'eager'):
+        row = report[mode]
+        print(f"{mode:<8}{row['median_ms']:>9.1f}ms{row['mean_ms']:>8.1f}ms"
+              f"{row['min_ms']:>8.1f}ms{row['max_ms']:>8.1f}ms")
+    print(f"\nCold start saved by lazy PDF loading: {report['saved_ms']:.1f} ms (median)")
+    print(f"First routine PDF render (pays the deferred load): {report['first_render_ms']:.1f} ms; "
+          f"next render: {report['warm_render_ms']:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'samples': samples, **report}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
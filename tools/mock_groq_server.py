@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Mock Groq/OpenAI-compatible LLM server for chatbot load testing
+
+Serves /openai/v1/chat/completions (the path the Groq SDK uses) and
+/v1/chat/completions with configurable latency, token rate, streaming and
+error injection, so /api/chatbot can be load-tested offline without
+sending traffic to Groq.
+
+Usage:
+    python tools/mock_groq_server.py --port 8090 --tokens-per-sec 250 \
+        --latency-ms 300 --jitter 0.4 --error-rate 0.02
+
+Point the app at it:
+    GROQ_API_KEY=mock GROQ_BASE_URL=http://127.0.0.1:8090 python app.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+WORDS = ("your spending this week looks steady with food and transport as the main "
+         "categories try setting a small daily limit and review bills before the "
+         "month ends to keep savings on track").split()
+
+
+class MockConfig:
+    """Runtime knobs, shared by all handler threads."""
+
+    def __init__(self, args):
+        self.latency_ms = args.latency_ms
+        self.jitter = args.jitter
+        self.tokens_per_sec = args.tokens_per_sec
+        self.completion_tokens = args.completion_tokens
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.tool_call_rate = args.tool_call_rate
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def first_token_delay(self) -> float:
+        """Lognormal delay around latency_ms; jitter is the sigma of the underlying normal."""
+        base = self.latency_ms / 1000
+        if self.jitter <= 0:
+            return base
+        return random.lognormvariate(0, self.jitter) * base
+
+    def count(self, error: bool):
+        with self.lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+
+
+def _estimate_tokens(messages) -> int:
+    return sum(max(1, len(str(m.get('content') or '')) // 4) for m in messages)
+
+
+def _completion_words(n: int):
+    return [WORDS[i % len(WORDS)] for i in range(n)]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server_version = 'MockGroq/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        config = self.server.config
+        if self.path.rstrip('/') in ('/openai/v1/models', '/v1/models'):
+            self._send_json(200, {'object': 'list', 'data': [
+                {'id': 'mock-model', 'object': 'model', 'owned_by': 'mock'}]})
+        elif self.path == '/stats':
+            self._send_json(200, {'requests': config.requests, 'errors': config.errors})
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/openai/v1/chat/completions', '/v1/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        config = self.server.config
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid JSON'}})
+            return
+
+        if random.random() < config.error_rate:
+            config.count(error=True)
+            time.sleep(config.first_token_delay() / 2)
+            self._send_json(config.error_status, {'error': {
+                'message': 'injected failure', 'type': 'mock_error', 'code': config.error_status}})
+            return
+        config.count(error=False)
+
+        model = body.get('model', 'mock-model')
+        messages = body.get('messages', [])
+        prompt_tokens = _estimate_tokens(messages)
+        max_tokens = int(body.get('max_tokens') or config.completion_tokens)
+        n_tokens = max(1, min(config.completion_tokens, max_tokens))
+
+        # Ask for a tool on the first round if the client offered tools
+        tool_call = None
+        tools = body.get('tools') or []
+        already_called = any(m.get('role') == 'tool' for m in messages)
+        if tools and not already_called and random.random() < config.tool_call_rate:
+            tool_call = {
+                'index': 0,
+                'id': f'call_{uuid.uuid4().hex[:12]}',
+                'type': 'function',
+                'function': {'name': random.choice(tools)['function']['name'], 'arguments': '{}'}
+            }
+            n_tokens = 12
+
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': n_tokens,
+                 'total_tokens': prompt_tokens + n_tokens}
+        completion_id = f'chatcmpl-{uuid.uuid4().hex[:24]}'
+        created = int(time.time())
+        per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+
+        time.sleep(config.first_token_delay())
+
+        if not body.get('stream'):
+            time.sleep(per_token * n_tokens)
+            message = {'role': 'assistant', 'content': None if tool_call else ' '.join(_completion_words(n_tokens))}
+            if tool_call:
+                message['tool_calls'] = [{k: v for k, v in tool_call.items() if k != 'index'}]
+            self._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': message,
+                             'finish_reason': 'tool_calls' if tool_call else 'stop'}],
+                'usage': usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(delta, finish_reason=None, extra=None):
+            chunk = {
+                'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            if extra:
+                chunk.update(extra)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            emit({'role': 'assistant', 'content': ''})
+            if tool_call:
+                emit({'tool_calls': [tool_call]})
+            else:
+                for i, word in enumerate(_completion_words(n_tokens)):
+                    emit({'content': word if i == 0 else ' ' + word})
+                    if per_token:
+                        time.sleep(per_token)
+            emit({}, 'tool_calls' if tool_call else 'stop', {'x_groq': {'id': completion_id, 'usage': usage}})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled (e.g. a losing hedged request)
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mock Groq/OpenAI-compatible chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=300, help='median time to first token')
+    parser.add_argument('--jitter', type=float, default=0.3, help='lognormal sigma for latency (0 = fixed)')
+    parser.add_argument('--tokens-per-sec', type=float, default=250, help='streaming token rate (0 = instant)')
+    parser.add_argument('--completion-tokens', type=int, default=80, help='tokens per completion')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status for injected failures')
+    parser.add_argument('--tool-call-rate', type=float, default=0.5,
+                        help='chance of answering the first round with a tool call when tools are offered')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    server.config = MockConfig(args)
+    server.verbose = args.verbose
+    print(f"Mock Groq server on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:.0f}ms, {args.tokens_per_sec:.0f} tok/s, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())